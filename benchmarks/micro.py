@@ -0,0 +1,373 @@
+"""
+Micro-benchmarks for Version, Executor and PackageVersion hot paths.
+
+Reports time and allocated bytes per operation, saves results as JSON
+and compares them with a stored baseline.
+
+Usage:
+    python -m benchmarks.micro [--filter bump] [--output results.json]
+    python -m benchmarks.micro --baseline baseline.json [--threshold 0.1]
+"""
+
+import argparse
+import itertools
+import json
+import re
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections.abc import Callable, Iterator
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Optional
+
+from newversion.constants import VersionParts
+from newversion.distributions import DistributionFilter
+from newversion.executor import Executor
+from newversion.git_tags import GitTagIndex, GitTagReader, TagPattern, iter_packed_tags
+from newversion.package_version import PackageVersion
+from newversion.version import Version
+from newversion.version_index import VersionIndex
+
+RESULTS_FORMAT_VERSION = 1
+GENERATED_LINE_COUNTS = (100, 100_000)
+GIT_TAG_COUNT = 10_000
+TAKEN_COUNT = 5_000
+DIST_FILE_COUNT = 100_000
+
+
+@dataclass(frozen=True)
+class Benchmark:
+    """
+    Single benchmarked operation.
+    """
+
+    name: str
+    func: Callable[[], Any]
+
+
+@dataclass(frozen=True)
+class BenchmarkResult:
+    """
+    Benchmark measurement.
+
+    Attributes:
+        name: Benchmark name.
+        ns_per_op: Best time per operation in nanoseconds.
+        alloc_bytes_per_op: Mean peak of memory allocated during a single operation.
+        iterations: Number of operations in a timed round.
+    """
+
+    name: str
+    ns_per_op: float
+    alloc_bytes_per_op: float
+    iterations: int
+
+
+@dataclass(frozen=True)
+class Comparison:
+    """
+    Benchmark result compared with a baseline.
+    """
+
+    name: str
+    baseline_ns: float
+    current_ns: float
+
+    @property
+    def ratio(self) -> float:
+        """
+        Current to baseline time ratio, `1.1` means 10% slower.
+        """
+        return self.current_ns / self.baseline_ns
+
+    def is_regression(self, threshold: float) -> bool:
+        """
+        Check if current result is slower than baseline by more than `threshold`.
+        """
+        return self.ratio > 1 + threshold
+
+
+def _create_project(path: Path) -> None:
+    (path / "pyproject.toml").write_text(
+        '[project]\nname = "package"\nversion = "1.2.3"\n\n[tool.ruff]\nline-length = 100\n',
+        encoding="utf-8",
+    )
+    (path / "setup.cfg").write_text(
+        "[metadata]\nname = package\nversion = 1.2.3\n", encoding="utf-8"
+    )
+    (path / "setup.py").write_text(
+        "setup(\n    name='package',\n    version='1.2.3',\n)\n", encoding="utf-8"
+    )
+    for line_count in GENERATED_LINE_COUNTS:
+        _create_generated_project(path / f"generated-{line_count}", line_count)
+    _create_pyproject(path / "pyproject-toml", is_valid=True)
+    _create_pyproject(path / "pyproject-regex", is_valid=False)
+    _create_git_repo(path / "git-tags", GIT_TAG_COUNT)
+
+
+def _create_generated_project(path: Path, line_count: int) -> None:
+    path.mkdir()
+    lines = [f"    # generated line {i}\r\n".encode() for i in range(line_count)]
+    (path / "setup.py").write_bytes(
+        b"\xef\xbb\xbfsetup(\r\n    version='1.2.3',\r\n" + b"".join(lines) + b")\r\n"
+    )
+
+
+def _create_pyproject(path: Path, *, is_valid: bool) -> None:
+    path.mkdir()
+    tables = [f'[tool.plugin{i}]\nversion = "0.{i}.0"\nenabled = true\n\n' for i in range(20)]
+    # a repeated table makes the file invalid TOML, so the regex fallback is used
+    invalid_table = "" if is_valid else "[tool.plugin0]\n"
+    (path / "pyproject.toml").write_text(
+        f'[project]\nname = "package"\nversion = "1.2.3"\n\n{"".join(tables)}{invalid_table}',
+        encoding="utf-8",
+    )
+
+
+def _create_git_repo(path: Path, tag_count: int) -> None:
+    (path / ".git" / "refs" / "tags").mkdir(parents=True)
+    sha = "0" * 40
+    lines = [f"{sha} refs/tags/v{i // 400}.{i // 20 % 20}.{i % 20}\n" for i in range(tag_count)]
+    (path / ".git" / "packed-refs").write_text("".join(lines), encoding="utf-8")
+
+
+def _get_dist_file_names(count: int) -> list[str]:
+    # a flat mirror directory: 1000 projects with an sdist and 5 wheels per version
+    platforms = [f"cp3{i}-cp3{i}-manylinux_2_17_x86_64" for i in range(8, 13)]
+    names: list[str] = []
+    version_number = 0
+    while len(names) < count:
+        for project_number in range(1000):
+            project = f"project_{project_number}"
+            version = f"1.{version_number // 10}.{version_number % 10}"
+            names.append(f"{project}-{version}.tar.gz")
+            names.extend(f"{project}-{version}-{platform}.whl" for platform in platforms)
+        version_number += 1
+    return names[:count]
+
+
+def _iter_version_index_benchmarks(tag_versions: list[Version]) -> Iterator[Benchmark]:
+    version_index = VersionIndex(tag_versions)
+    yield Benchmark(f"version_index_build_{GIT_TAG_COUNT}", lambda: VersionIndex(tag_versions))
+    yield Benchmark(f"version_index_latest_{GIT_TAG_COUNT}", lambda: version_index.latest("12.7"))
+    yield Benchmark(
+        f"version_index_next_free_{GIT_TAG_COUNT}",
+        lambda: version_index.next_free(Version.bump_micro, "12.7"),
+    )
+    taken_index = VersionIndex(Version(f"3.1.0rc{i}") for i in range(1, TAKEN_COUNT + 1))
+    taken_version = Version("3.1.0rc1")
+    bump_rc = Executor.get_bump(VersionParts.RC, 1)
+    yield Benchmark(
+        f"version_index_bump_taken_{TAKEN_COUNT}",
+        lambda: taken_index.bump(taken_version, bump_rc),
+    )
+    dist_names = _get_dist_file_names(DIST_FILE_COUNT)
+    dist_filter = DistributionFilter.from_project("project-7")
+    yield Benchmark(
+        f"dist_filter_{DIST_FILE_COUNT}", lambda: dist_filter.parse_versions(dist_names)
+    )
+
+
+def iter_benchmarks(project_path: Path) -> Iterator[Benchmark]:
+    """
+    Create all benchmarks.
+
+    Arguments:
+        project_path: Directory with a synthetic project for package benchmarks.
+    """
+    version = Version("1.2.3")
+    pre_version = Version("1.2.3rc4.post5.dev6+local.7")
+    other = Version("1.2.4")
+    executor = Executor(version=pre_version, path=project_path)
+    package_version = PackageVersion(project_path)
+    # alternate versions, so every call rewrites package files
+    package_versions = itertools.cycle([Version("1.2.4"), Version("1.2.5")])
+
+    yield Benchmark("version_parse", lambda: Version("1.2.3rc4.post5.dev6+local.7"))
+    yield Benchmark("version_parse_cached", lambda: Version.parse("1.2.3rc4.post5.dev6"))
+    yield Benchmark("version_dumps", pre_version.dumps)
+    yield Benchmark("version_copy", pre_version.copy)
+    yield Benchmark("bump_major", version.bump_major)
+    yield Benchmark("bump_minor", version.bump_minor)
+    yield Benchmark("bump_micro", version.bump_micro)
+    yield Benchmark("bump_prerelease", pre_version.bump_prerelease)
+    yield Benchmark("bump_postrelease", pre_version.bump_postrelease)
+    yield Benchmark("bump_dev", pre_version.bump_dev)
+    yield Benchmark("bump_release", lambda: version.bump_release(VersionParts.MINOR.value))
+    yield Benchmark("replace", lambda: version.replace(rc=1, local="build.1"))
+    yield Benchmark("get_stable", pre_version.get_stable)
+    yield Benchmark("compare_lt", lambda: version < other)
+    yield Benchmark("compare_eq", lambda: version == other)
+    yield Benchmark("sort_key", lambda: pre_version.sort_key)
+    yield Benchmark("command_get", lambda: executor.command_get(VersionParts.PRE))
+    yield Benchmark("command_bump", lambda: executor.command_bump(VersionParts.MINOR, 1))
+    yield Benchmark("command_set", lambda: executor.command_set(VersionParts.MICRO, "7"))
+    yield Benchmark("package_get", package_version.get)
+    yield Benchmark("package_set", lambda: package_version.set(next(package_versions)))
+    for line_count in GENERATED_LINE_COUNTS:
+        generated_path = project_path / f"generated-{line_count}"
+        yield Benchmark(
+            f"get_generated_{line_count}", lambda path=generated_path: PackageVersion(path).get()
+        )
+    git_path = project_path / "git-tags"
+    packed_refs = (git_path / ".git" / "packed-refs").read_bytes()
+    tag_pattern = TagPattern.from_prefix()
+    yield Benchmark(
+        f"git_tags_index_{GIT_TAG_COUNT}",
+        lambda: GitTagIndex.from_tags(None, tag_pattern, iter_packed_tags(packed_refs)),
+    )
+    yield Benchmark(f"git_tags_latest_{GIT_TAG_COUNT}", lambda: GitTagReader(git_path).get_latest())
+    yield from _iter_version_index_benchmarks(GitTagReader(git_path).read())
+    for name in ("toml", "regex"):
+        pyproject_path = project_path / f"pyproject-{name}"
+        yield Benchmark(
+            f"pyproject_get_{name}", lambda path=pyproject_path: PackageVersion(path).get()
+        )
+
+
+def _get_alloc_bytes(func: Callable[[], Any], samples: int) -> float:
+    total = 0
+    tracemalloc.start()
+    try:
+        for _ in range(samples):
+            tracemalloc.reset_peak()
+            start, _peak = tracemalloc.get_traced_memory()
+            func()
+            _current, peak = tracemalloc.get_traced_memory()
+            total += peak - start
+    finally:
+        tracemalloc.stop()
+    return total / samples
+
+
+def measure(benchmark: Benchmark, min_time: float, repeat: int) -> BenchmarkResult:
+    """
+    Measure a benchmark.
+
+    Number of iterations is calibrated so a round takes at least `min_time` seconds,
+    the best of `repeat` rounds is reported.
+
+    Arguments:
+        benchmark: Benchmark to run.
+        min_time: Minimum round duration in seconds.
+        repeat: Number of timed rounds.
+
+    Returns:
+        Benchmark result.
+    """
+    func = benchmark.func
+    iterations = 1
+    while True:
+        start = time.perf_counter_ns()
+        for _ in range(iterations):
+            func()
+        elapsed = time.perf_counter_ns() - start
+        if elapsed >= min_time * 1e9:
+            break
+        iterations *= 2
+
+    best = elapsed
+    for _ in range(repeat - 1):
+        start = time.perf_counter_ns()
+        for _ in range(iterations):
+            func()
+        best = min(best, time.perf_counter_ns() - start)
+
+    return BenchmarkResult(
+        name=benchmark.name,
+        ns_per_op=best / iterations,
+        alloc_bytes_per_op=_get_alloc_bytes(func, min(iterations, 100)),
+        iterations=iterations,
+    )
+
+
+def load_results(path: Path) -> dict[str, BenchmarkResult]:
+    """
+    Load results saved by `save_results`.
+    """
+    data = json.loads(path.read_text(encoding="utf-8"))
+    return {item["name"]: BenchmarkResult(**item) for item in data["results"]}
+
+
+def save_results(path: Path, results: list[BenchmarkResult]) -> None:
+    """
+    Save results as JSON.
+    """
+    data = {
+        "format": RESULTS_FORMAT_VERSION,
+        "python": sys.version.split()[0],
+        "results": [asdict(result) for result in results],
+    }
+    path.write_text(json.dumps(data, indent=2) + "\n", encoding="utf-8")
+
+
+def compare(
+    results: list[BenchmarkResult], baseline: dict[str, BenchmarkResult]
+) -> list[Comparison]:
+    """
+    Compare results with a baseline, benchmarks missing from baseline are skipped.
+    """
+    return [
+        Comparison(
+            name=result.name,
+            baseline_ns=baseline[result.name].ns_per_op,
+            current_ns=result.ns_per_op,
+        )
+        for result in results
+        if result.name in baseline
+    ]
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    """
+    Run benchmarks.
+
+    Returns:
+        Exit code, `1` if there are regressions above threshold.
+    """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--filter", default="", help="Run benchmarks matching a regex")
+    parser.add_argument("--min-time", type=float, default=0.1, help="Seconds per round")
+    parser.add_argument("--repeat", type=int, default=5, help="Number of rounds")
+    parser.add_argument("--output", type=Path, help="Save results to a JSON file")
+    parser.add_argument("--baseline", type=Path, help="Compare with results from a JSON file")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="Allowed slowdown against baseline, 0.1 is 10%%. Default: 0.1",
+    )
+    args = parser.parse_args(argv)
+    name_re = re.compile(args.filter)
+    baseline = load_results(args.baseline) if args.baseline else {}
+
+    results: list[BenchmarkResult] = []
+    with tempfile.TemporaryDirectory() as temp_dir:
+        project_path = Path(temp_dir)
+        _create_project(project_path)
+        for benchmark in iter_benchmarks(project_path):
+            if not name_re.search(benchmark.name):
+                continue
+            result = measure(benchmark, args.min_time, args.repeat)
+            results.append(result)
+            sys.stdout.write(
+                f"{result.name:<22} {result.ns_per_op:12,.0f} ns/op"
+                f" {result.alloc_bytes_per_op:10,.0f} B/op\n"
+            )
+
+    if args.output:
+        save_results(args.output, results)
+
+    has_regressions = False
+    for comparison in compare(results, baseline):
+        is_regression = comparison.is_regression(args.threshold)
+        has_regressions = has_regressions or is_regression
+        mark = " REGRESSION" if is_regression else ""
+        sys.stdout.write(f"{comparison.name:<22} x{comparison.ratio:.2f} vs baseline{mark}\n")
+    return 1 if has_regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
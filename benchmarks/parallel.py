@@ -0,0 +1,115 @@
+"""
+Benchmark serial and process-pool batch processing throughput.
+
+Usage:
+    python -m benchmarks.parallel [--lines 1000000] [--chunk-size 4194304] [--command bump_pre]
+"""
+
+import argparse
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+from collections.abc import Callable
+from pathlib import Path
+from typing import Optional
+
+from newversion.batch import BatchRunner
+from newversion.constants import InvalidLinePolicy
+from newversion.parallel import ParallelRunner
+from newversion.version import Version
+
+SUFFIXES = ("", "", "", "rc1", "a2", "b3", ".dev4", ".post1")
+
+
+def bump_pre(version: Version) -> str:
+    """
+    Benchmark command: bump pre-release.
+    """
+    return version.bump_prerelease().dumps()
+
+
+def is_stable(version: Version) -> Optional[str]:
+    """
+    Benchmark command: filter stable versions.
+    """
+    return version.dumps() if version.is_stable else None
+
+
+COMMANDS = {
+    "bump_pre": bump_pre,
+    "is_stable": is_stable,
+}
+
+
+def generate(path: Path, lines: int) -> None:
+    """
+    Generate synthetic version list.
+    """
+    rng = random.Random(lines)  # noqa: S311
+    with path.open("w", encoding="utf-8") as f:
+        for _ in range(lines):
+            major = rng.randint(0, 20)
+            minor = rng.randint(0, 50)
+            micro = rng.randint(0, 200)
+            f.write(f"{major}.{minor}.{micro}{rng.choice(SUFFIXES)}\n")
+
+
+def measure(name: str, lines: int, func: Callable[[], None]) -> float:
+    """
+    Run benchmark function and print throughput.
+    """
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    sys.stdout.write(f"{name:<12} {elapsed:8.2f}s {lines / elapsed:12,.0f} lines/s\n")
+    return elapsed
+
+
+def main() -> None:
+    """
+    Run benchmark.
+    """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--lines", type=int, default=1_000_000)
+    parser.add_argument("--chunk-size", type=int, default=ParallelRunner.DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--command", choices=list(COMMANDS), default="bump_pre")
+    args = parser.parse_args()
+    command = COMMANDS[args.command]
+    cpu_count = os.cpu_count() or 1
+    jobs_list = sorted({2**i for i in range(cpu_count.bit_length()) if 2**i <= cpu_count})
+    jobs_list = sorted({*jobs_list, cpu_count})
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = Path(temp_dir) / "versions.txt"
+        generate(path, args.lines)
+        sys.stdout.write(
+            f"{args.lines:,} lines, {path.stat().st_size:,} bytes, {cpu_count} CPUs,"
+            f" command {args.command}\n"
+        )
+
+        def run_serial() -> None:
+            runner = BatchRunner(command, on_invalid=InvalidLinePolicy.SKIP)
+            with path.open(encoding="utf-8") as f:
+                runner.run(f, io.StringIO())
+
+        serial = measure("serial", args.lines, run_serial)
+        for jobs in jobs_list:
+
+            def run_parallel(jobs: int = jobs) -> None:
+                runner = ParallelRunner(
+                    command,
+                    on_invalid=InvalidLinePolicy.SKIP,
+                    jobs=jobs,
+                    chunk_size=args.chunk_size,
+                )
+                runner.run(path, io.StringIO())
+
+            elapsed = measure(f"jobs={jobs}", args.lines, run_parallel)
+            sys.stdout.write(f"{'':<12} speedup x{serial / elapsed:.2f}\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Check that every version source of a package defines the same version.
+"""
+
+import os
+from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional
+
+from newversion.exceptions import PackageVersionError
+from newversion.package_version import PackageVersion
+from newversion.source_file import VersionLocation
+from newversion.tree import find_package_roots
+from newversion.utils import bind_context
+from newversion.version import Version, VersionError
+
+
+@dataclass(frozen=True)
+class AuditEntry:
+    """
+    Versions defined by every source of a package.
+
+    Attributes:
+        path: Package root.
+        locations: Version locations by source name, in source order.
+        error: Error message if sources cannot be read.
+    """
+
+    path: Path
+    locations: dict[str, VersionLocation] = field(default_factory=dict[str, VersionLocation])
+    error: Optional[str] = None
+
+    @property
+    def versions(self) -> list[Version]:
+        """
+        Distinct versions in source order.
+        """
+        result: list[Version] = []
+        for location in self.locations.values():
+            if location.version not in result:
+                result.append(location.version)
+        return result
+
+    @property
+    def is_consistent(self) -> bool:
+        """
+        Whether package has a version and all sources agree on it.
+        """
+        return self.error is None and len(self.versions) == 1
+
+
+def audit_package(path: Path) -> AuditEntry:
+    """
+    Read version from every source of a single package.
+
+    Arguments:
+        path: Package root.
+
+    Returns:
+        Audit entry with version locations or an error.
+    """
+    try:
+        locations = PackageVersion(path).locate_all()
+    except (PackageVersionError, VersionError, OSError, UnicodeDecodeError) as e:
+        return AuditEntry(path=path, error=str(e))
+    if not locations:
+        return AuditEntry(path=path, error=str(PackageVersionError()))
+    return AuditEntry(path=path, locations=locations)
+
+
+class Auditor:
+    """
+    Audit version sources of a package or of all packages in a tree with a thread pool.
+
+    Arguments:
+        jobs: Number of threads, `0` to pick automatically.
+        exclude: Extra directory names to skip in a tree.
+    """
+
+    def __init__(self, jobs: int = 0, exclude: Iterable[str] = ()) -> None:
+        self.jobs = jobs if jobs > 0 else min(32, (os.cpu_count() or 1) + 4)
+        self.exclude = frozenset(exclude)
+
+    def audit(self, paths: list[Path]) -> list[AuditEntry]:
+        """
+        Audit packages, reading them concurrently.
+
+        Arguments:
+            paths: Package roots.
+
+        Returns:
+            Entries in `paths` order.
+        """
+        if self.jobs == 1 or len(paths) < 2:  # noqa: PLR2004
+            return [audit_package(path) for path in paths]
+
+        with ThreadPoolExecutor(max_workers=self.jobs) as executor:
+            return list(executor.map(bind_context(audit_package), paths))
+
+    def audit_tree(self, root: Path) -> list[AuditEntry]:
+        """
+        Find all Python packages under `root` in a single tree walk and audit them.
+
+        Arguments:
+            root: Tree root.
+
+        Returns:
+            Entries sorted by package path.
+        """
+        return self.audit(find_package_roots(root, self.exclude))
@@ -0,0 +1,186 @@
+"""
+Batch processing of versions read line by line.
+"""
+
+import logging
+from collections.abc import Callable, Iterable, Iterator
+from typing import Optional, TextIO
+
+from newversion.constants import LOGGER_NAME, InvalidLinePolicy
+from newversion.exceptions import CLIError, ExecutorError
+from newversion.version import Version, VersionError
+
+
+def clean_version_line(line: str) -> str:
+    """
+    Extract version string from an input line.
+
+    Drops surrounding whitespace, quotes and everything before the last space,
+    so lines like `version = "1.2.3"` are supported.
+
+    Arguments:
+        line: Input line.
+
+    Returns:
+        Version string.
+    """
+    return line.strip().split(" ")[-1].replace('"', "").replace("'", "")
+
+
+class BatchRunner:
+    """
+    Apply one command to every version from a stream of lines.
+
+    Arguments:
+        command: Callable that gets a version and returns output line or `None` to skip it.
+            Outputs version itself by default.
+        on_invalid: What to do with lines that cannot be parsed or processed.
+        chunk_size: Number of output lines to buffer before writing and flushing.
+    """
+
+    DEFAULT_CHUNK_SIZE = 1024
+
+    def __init__(
+        self,
+        command: Callable[[Version], Optional[str]] = Version.dumps,
+        on_invalid: InvalidLinePolicy = InvalidLinePolicy.ABORT,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ) -> None:
+        self._command = command
+        self._on_invalid = on_invalid
+        self._chunk_size = max(chunk_size, 1)
+        self._logger = logging.getLogger(LOGGER_NAME)
+        self.invalid_count = 0
+
+    def process_line(self, line: str, line_number: int) -> Optional[str]:
+        """
+        Process a single input line.
+
+        Arguments:
+            line: Input line.
+            line_number: 1-based line number for error messages.
+
+        Returns:
+            Output line or `None` if there is nothing to output.
+
+        Raises:
+            CLIError: If line is invalid and policy is `abort`.
+        """
+        try:
+            return self.run_line(line)
+        except (VersionError, ExecutorError) as e:
+            self.handle_invalid(line_number, str(e))
+            return None
+
+    def run_line(self, line: str) -> Optional[str]:
+        """
+        Run command for a single input line.
+
+        Arguments:
+            line: Input line.
+
+        Returns:
+            Output line or `None` if there is nothing to output.
+
+        Raises:
+            VersionError: If line is not a valid version.
+            ExecutorError: If command failed.
+        """
+        version_str = clean_version_line(line)
+        if not version_str:
+            return None
+
+        return self._command(Version.parse(version_str))
+
+    def handle_invalid(self, line_number: int, error: str) -> None:
+        """
+        Handle invalid line according to policy.
+
+        Arguments:
+            line_number: 1-based line number.
+            error: Error message.
+
+        Raises:
+            CLIError: If policy is `abort`.
+        """
+        self.invalid_count += 1
+        message = f"Line {line_number}: {error}"
+        if self._on_invalid == InvalidLinePolicy.ABORT:
+            raise CLIError(message)
+        if self._on_invalid == InvalidLinePolicy.REPORT:
+            self._logger.error(message)
+
+    def iter_versions(self, lines: Iterable[str]) -> Iterator[Version]:
+        """
+        Lazily parse input lines into versions without running the command.
+
+        Arguments:
+            lines: Input lines.
+
+        Yields:
+            Parsed versions.
+
+        Raises:
+            CLIError: If line is invalid and policy is `abort`.
+        """
+        for line_number, line in enumerate(lines, 1):
+            version_str = clean_version_line(line)
+            if not version_str:
+                continue
+            try:
+                yield Version.parse(version_str)
+            except VersionError as e:
+                self.handle_invalid(line_number, str(e))
+
+    def iter_results(self, lines: Iterable[str]) -> Iterable[str]:
+        """
+        Lazily process input lines.
+
+        Arguments:
+            lines: Input lines.
+
+        Yields:
+            Output lines.
+        """
+        for line_number, line in enumerate(lines, 1):
+            result = self.process_line(line, line_number)
+            if result is not None:
+                yield result
+
+    def write_results(self, results: Iterable[str], output: TextIO) -> None:
+        """
+        Write results to output stream in flushed chunks.
+
+        Arguments:
+            results: Output lines.
+            output: Output stream.
+        """
+        chunk: list[str] = []
+        try:
+            for result in results:
+                chunk.append(result)
+                if len(chunk) >= self._chunk_size:
+                    self._write_chunk(chunk, output)
+                    chunk = []
+        finally:
+            if chunk:
+                self._write_chunk(chunk, output)
+
+    @staticmethod
+    def _write_chunk(chunk: list[str], output: TextIO) -> None:
+        output.write("\n".join(chunk))
+        output.write("\n")
+        output.flush()
+
+    def run(self, lines: Iterable[str], output: TextIO) -> None:
+        """
+        Process input lines and write results with bounded memory.
+
+        Arguments:
+            lines: Input lines, e.g. `sys.stdin`.
+            output: Output stream.
+
+        Raises:
+            CLIError: If line is invalid and policy is `abort`.
+        """
+        self.write_results(self.iter_results(lines), output)
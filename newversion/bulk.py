@@ -0,0 +1,247 @@
+"""
+Set versions of many packages at once from a manifest.
+"""
+
+import json
+import os
+import time
+from collections.abc import Callable, Iterable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Optional, TypeVar, cast
+
+from newversion.exceptions import FileEditConflictError, ManifestError, PackageVersionError
+from newversion.file_edit import AtomicWriter, FileEdit
+from newversion.package_version import PackageVersion
+from newversion.pyproject import get_toml_loads
+from newversion.utils import bind_context
+from newversion.version import Version, VersionError
+
+_T = TypeVar("_T")
+_R = TypeVar("_R")
+
+ManifestTypeDef = dict[Path, Version]
+
+
+def _load_toml(text: str) -> dict[str, Any]:
+    loads = get_toml_loads()
+    if loads is None:
+        message = "TOML needs Python 3.11+ or tomli package"
+        raise ManifestError(message)
+    try:
+        return loads(text)
+    except ValueError as e:
+        raise ManifestError(str(e)) from None
+
+
+def _parse_lines(text: str) -> dict[str, Any]:
+    result: dict[str, Any] = {}
+    for line_number, line in enumerate(text.splitlines(), 1):
+        line = line.strip()  # noqa: PLW2901
+        if not line or line.startswith("#"):
+            continue
+        parts = line.split()
+        if len(parts) != 2:  # noqa: PLR2004
+            message = f"line {line_number} is not `path version`"
+            raise ManifestError(message)
+        result[parts[0]] = parts[1]
+    return result
+
+
+def parse_manifest(text: str, root: Path, suffix: str = "") -> ManifestTypeDef:
+    """
+    Parse manifest that maps package paths to new versions.
+
+    Supported formats:
+
+    - JSON object: `{"libs/a": "1.2.3"}`
+    - TOML table: `"libs/a" = "1.2.3"`
+    - lines: `libs/a 1.2.3`, same as `--tree` text output
+
+    Package paths must be inside `root`, so a manifest cannot change packages elsewhere.
+
+    Arguments:
+        text: Manifest content.
+        root: Directory to resolve relative package paths against.
+        suffix: Manifest file suffix, format is detected from content if it is not `.json`
+            or `.toml`.
+
+    Returns:
+        Absolute package paths with new versions in manifest order.
+
+    Raises:
+        ManifestError: If manifest cannot be parsed or a package path is outside `root`.
+    """
+    if suffix == ".toml":
+        data = _load_toml(text)
+    elif suffix == ".json" or text.lstrip().startswith("{"):
+        try:
+            data = json.loads(text)
+        except ValueError as e:
+            raise ManifestError(str(e)) from None
+    else:
+        data = _parse_lines(text)
+
+    if not isinstance(data, dict):
+        message = "expected a mapping of package paths to versions"
+        raise ManifestError(message)
+
+    resolved_root = root.resolve()
+    result: ManifestTypeDef = {}
+    for path_str, version_str in cast("dict[str, Any]", data).items():
+        if not isinstance(version_str, str):
+            message = f"version for {path_str} is not a string"
+            raise ManifestError(message)
+        try:
+            version = Version(version_str)
+        except VersionError as e:
+            raise ManifestError(str(e)) from None
+        path = root / path_str
+        if not path.resolve().is_relative_to(resolved_root):
+            message = f"package path {path_str} is outside {root.as_posix()}"
+            raise ManifestError(message)
+        result[path] = version
+    return result
+
+
+@dataclass(frozen=True)
+class BulkSetItem:
+    """
+    Planned version change of a single package.
+
+    Attributes:
+        path: Package root.
+        old_version: Current version, `None` if it cannot be determined.
+        new_version: New version.
+        edits: File edits that need to be applied.
+    """
+
+    path: Path
+    old_version: Optional[Version]
+    new_version: Version
+    edits: list[FileEdit]
+
+
+@dataclass(frozen=True)
+class BulkSetResult:
+    """
+    Result of a bulk version change.
+
+    Attributes:
+        items: Changes in manifest order.
+        edit_count: Number of written files.
+        plan_seconds: Time spent reading files and planning edits.
+        apply_seconds: Time spent writing files.
+    """
+
+    items: list[BulkSetItem]
+    edit_count: int
+    plan_seconds: float
+    apply_seconds: float
+
+
+class BulkSetter:
+    """
+    Set versions of many packages with a thread pool.
+
+    All edits are planned before anything is written, so a conflict leaves all files intact.
+    Every file is written at most once, even if several packages share it.
+
+    Files are replaced atomically, if any write fails, all files are restored.
+
+    Arguments:
+        jobs: Number of threads, `0` to pick automatically.
+        fsync: Flush written files to disk.
+        in_place: Patch version bytes in existing files instead of replacing them.
+    """
+
+    def __init__(self, jobs: int = 0, *, fsync: bool = True, in_place: bool = False) -> None:
+        self.jobs = jobs if jobs > 0 else min(32, (os.cpu_count() or 1) + 4)
+        self.fsync = fsync
+        self.in_place = in_place
+
+    def _map(self, func: Callable[[_T], _R], items: Iterable[_T]) -> list[_R]:
+        if self.jobs == 1:
+            return [func(item) for item in items]
+        with ThreadPoolExecutor(max_workers=self.jobs) as executor:
+            return list(executor.map(bind_context(func), items))
+
+    @staticmethod
+    def _plan_item(path_version: tuple[Path, Version]) -> BulkSetItem:
+        path, new_version = path_version
+        package_version = PackageVersion(path)
+        try:
+            old_version: Optional[Version] = package_version.get()
+        except (PackageVersionError, VersionError):
+            old_version = None
+        return BulkSetItem(
+            path=path,
+            old_version=old_version,
+            new_version=new_version,
+            edits=package_version.plan_set(new_version),
+        )
+
+    @staticmethod
+    def _check_items(items: Iterable[BulkSetItem]) -> None:
+        for item in items:
+            if not item.edits and item.old_version != item.new_version:
+                message = f"no version to update in {item.path.as_posix()}"
+                raise ManifestError(message)
+
+    @staticmethod
+    def _get_unique_edits(items: Iterable[BulkSetItem]) -> list[FileEdit]:
+        edits: dict[Path, FileEdit] = {}
+        for item in items:
+            for edit in item.edits:
+                key = edit.path.resolve()
+                planned = edits.get(key)
+                if planned is not None and planned.data != edit.data:
+                    raise FileEditConflictError(edit.path)
+                edits[key] = edit
+        return list(edits.values())
+
+    def plan(self, manifest: ManifestTypeDef) -> list[BulkSetItem]:
+        """
+        Read current versions and plan file edits without writing anything.
+
+        Arguments:
+            manifest: Package roots with new versions.
+
+        Returns:
+            Planned changes in manifest order.
+        """
+        return self._map(self._plan_item, manifest.items())
+
+    def run(self, manifest: ManifestTypeDef) -> BulkSetResult:
+        """
+        Plan and apply version changes.
+
+        Arguments:
+            manifest: Package roots with new versions.
+
+        Returns:
+            Applied changes with timings.
+
+        Raises:
+            FileEditConflictError: If packages need different content in the same file.
+            ManifestError: If a package has no version to update.
+        """
+        start = time.perf_counter()
+        items = self.plan(manifest)
+        self._check_items(items)
+        edits = self._get_unique_edits(items)
+        planned = time.perf_counter()
+        writer = AtomicWriter(fsync=self.fsync, in_place=self.in_place)
+        try:
+            self._map(writer.stage, edits)
+        except BaseException:
+            writer.rollback()
+            raise
+        writer.commit()
+        return BulkSetResult(
+            items=items,
+            edit_count=len(edits),
+            plan_seconds=planned - start,
+            apply_seconds=time.perf_counter() - planned,
+        )
@@ -5,39 +5,59 @@ Main CLI parser.
 import argparse
 import contextlib
 import enum
-import importlib.metadata
+import functools
 import logging
+import os
 import sys
-from collections.abc import Sequence
+import threading
+from collections.abc import Callable, Generator, Sequence
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Optional, Union
-
-from newversion.constants import PACKAGE_NAME, Commands, VersionParts
+from typing import Any, Final, Optional, TextIO, Union
+
+from newversion.batch import clean_version_line
+from newversion.constants import (
+    CACHE_ENV_NAME,
+    MULTI_VERSION_COMMANDS,
+    NO_FSYNC_ENV_NAME,
+    PACKAGE_NAME,
+    PROFILE_ENV_NAME,
+    Commands,
+    InvalidLinePolicy,
+    OutputFormat,
+    VersionParts,
+)
+from newversion.type_defs import PrereleaseTypeDef
 from newversion.version import Version
 
 
-def get_stdin() -> Version:
+def get_stdin(stdin: Optional[TextIO] = None) -> Version:
     """
     Get input from stdin.
 
+    Arguments:
+        stdin: Input stream, `sys.stdin` by default.
+
     Returns:
         Parsed version.
     """
-    if sys.stdin.isatty():
+    stream = sys.stdin if stdin is None else stdin
+    if stream.isatty():
         return Version.zero()
 
-    for line in sys.stdin.readlines():
-        safe_line = line.strip().split(" ")[-1].replace('"', "").replace("'", "")
-        return Version(safe_line)
+    line = stream.readline()
+    if not line:
+        return Version.zero()
 
-    return Version.zero()
+    return Version(clean_version_line(line))
 
 
 def get_program_version() -> str:
     """
     Get program version.
     """
+    import importlib.metadata  # noqa: PLC0415
+
     with contextlib.suppress(importlib.metadata.PackageNotFoundError):
         return importlib.metadata.version(PACKAGE_NAME)
 
@@ -60,6 +80,128 @@ class CLINamespace:
     package: bool
     save: bool
     path: Path
+    each: bool
+    on_invalid: InvalidLinePolicy
+    each_file: Optional[Path]
+    jobs: Optional[int]
+    chunk_size: Optional[int]
+    reverse: bool
+    stable_only: bool
+    series: Optional[str]
+    prerelease: Optional[PrereleaseTypeDef]
+    external: bool
+    memory_budget: Optional[int]
+    temp_dir: Optional[Path]
+    socket_path: Optional[Path]
+    idle_timeout: float
+    status: bool
+    stop: bool
+    tree: Optional[Path]
+    tree_exclude: list[str]
+    taken: Optional[str]
+    output_format: OutputFormat
+    manifest: Optional[str]
+    fsync: bool
+    in_place: bool
+    disk_cache: bool
+    from_git_tags: bool
+    tag_prefix: str
+    tag_pattern: Optional[str]
+    stable_tags: bool
+    from_dist: Optional[Path]
+    project: Optional[str]
+    profile: Optional[OutputFormat]
+    profile_output: Optional[Path]
+    profile_cprofile: Optional[Path]
+    profile_tracemalloc: Optional[Path]
+    clear: bool
+    invalidate: list[Path]
+
+
+class CLIArgumentParser(argparse.ArgumentParser):
+    """
+    Argument parser that can write help and errors to per-thread streams.
+
+    Parser is built once and shared between threads, so streams are set
+    with `redirect` for the current thread only.
+    """
+
+    _streams = threading.local()
+
+    @classmethod
+    @contextlib.contextmanager
+    def redirect(
+        cls, stdout: Optional[TextIO] = None, stderr: Optional[TextIO] = None
+    ) -> Generator[None, None, None]:
+        """
+        Send help and usage errors of all parsers in the current thread to given streams.
+
+        Arguments:
+            stdout: Stream for help and version output, `sys.stdout` by default.
+            stderr: Stream for usage errors, `sys.stderr` by default.
+        """
+        cls._streams.stdout = stdout
+        cls._streams.stderr = stderr
+        try:
+            yield
+        finally:
+            cls._streams.stdout = None
+            cls._streams.stderr = None
+
+    @classmethod
+    def get_stdout(cls) -> TextIO:
+        """
+        Get help output stream for the current thread.
+        """
+        stdout: Optional[TextIO] = getattr(cls._streams, "stdout", None)
+        return sys.stdout if stdout is None else stdout
+
+    @classmethod
+    def get_stderr(cls) -> TextIO:
+        """
+        Get usage errors stream for the current thread.
+        """
+        stderr: Optional[TextIO] = getattr(cls._streams, "stderr", None)
+        return sys.stderr if stderr is None else stderr
+
+    def _print_message(self, message: str, file: Any = None) -> None:  # noqa: ANN401
+        if file is sys.stdout:
+            file = self.get_stdout()
+        if file is sys.stderr:
+            file = self.get_stderr()
+        super()._print_message(message, file)
+
+
+class ProgramVersionAction(argparse.Action):
+    """
+    Argparse action that shows program version.
+
+    Package metadata is read only when the flag is used.
+    """
+
+    def __init__(
+        self,
+        option_strings: Sequence[str],
+        dest: str = argparse.SUPPRESS,
+        default: str = argparse.SUPPRESS,
+        help: Optional[str] = None,  # noqa: A002
+    ) -> None:
+        super().__init__(
+            option_strings=option_strings, dest=dest, default=default, nargs=0, help=help
+        )
+
+    def __call__(
+        self,
+        parser: argparse.ArgumentParser,
+        _namespace: argparse.Namespace,
+        _values: Union[str, Sequence[Any], None],
+        _option_string: Optional[str] = None,
+    ) -> None:
+        """
+        Print program version and exit.
+        """
+        CLIArgumentParser.get_stdout().write(f"{get_program_version()}\n")
+        parser.exit()
 
 
 class EnumListAction(argparse.Action):
@@ -121,58 +263,188 @@ class EnumListAction(argparse.Action):
         setattr(namespace, self.dest, enum_values)
 
 
-def parse_args(args: Sequence[str]) -> CLINamespace:
-    """
-    Parse CLI arguments.
-
-    Returns:
-        Argument parser Namespace.
-    """
-    parser = argparse.ArgumentParser(
-        "newversion",
-        description="SemVer helpers for PEP-440 versions",
+def _add_batch_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--each",
+        action="store_true",
+        help=(
+            "Apply command to every version read from stdin line by line."
+            " Comparison commands and is_stable output only matching versions."
+        ),
     )
     parser.add_argument(
-        "-V", "--version", action="version", version=get_program_version(), help="Show version"
+        "--on-invalid",
+        type=InvalidLinePolicy,
+        action=EnumListAction,
+        default=InvalidLinePolicy.ABORT,
+        help=(
+            "What to do with invalid input lines in --each mode and multi-version commands:"
+            " abort, skip or report and continue."
+            f" Default: {InvalidLinePolicy.ABORT.value}"
+        ),
     )
     parser.add_argument(
-        "-i",
-        "--input",
-        dest="version",
-        type=Version,
+        "--each-file",
+        type=Path,
         default=None,
-        help="Input version, can be provided as a pipe-in as well.",
+        help="Same as --each, but read versions from a file. Supports parallel processing.",
     )
     parser.add_argument(
-        "-p",
-        "--package",
+        "-j",
+        "--jobs",
+        type=int,
+        default=None,
+        help=(
+            "Number of worker processes for --each-file or threads for --tree,"
+            " 0 to pick automatically. Default: 1 for --each-file, 0 for --tree"
+        ),
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=None,
+        help="Input file byte range size per worker task for --each-file. Default: 4 MiB",
+    )
+
+
+def _add_tree_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--tree",
+        type=Path,
+        default=None,
+        metavar="ROOT",
+        help=(
+            "Find all Python packages under ROOT and read their versions."
+            " Use with package and audit subcommands."
+        ),
+    )
+    parser.add_argument(
+        "--tree-exclude",
+        action="append",
+        default=[],
+        metavar="NAME",
+        help=(
+            "Directory name to skip in --tree mode, can be used multiple times."
+            " Hidden, vendored, virtualenv and build directories are always skipped."
+        ),
+    )
+    parser.add_argument(
+        "--format",
+        dest="output_format",
+        type=OutputFormat,
+        action=EnumListAction,
+        default=OutputFormat.TEXT,
+        help=f"Output format for --tree mode and audit. Default: {OutputFormat.TEXT.value}",
+    )
+
+
+def _add_git_tags_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--from-git-tags",
         action="store_true",
         help=(
-            "Get Python package version as input, overrides --input and pipe in."
-            " Supports pyproject.toml, setup.cfg and setup.py."
+            "Get the latest version from git tags as input, overrides --input and pipe in."
+            " Commands that process many versions get all tag versions."
+            " Reads packed-refs and refs/tags directly, without running git."
         ),
     )
     parser.add_argument(
-        "-s",
-        "--save",
+        "--tag-prefix",
+        default="",
+        metavar="PREFIX",
+        help="Use only tags that start with PREFIX, e.g. `pkg-`. A `v` before version is allowed.",
+    )
+    parser.add_argument(
+        "--tag-pattern",
+        default=None,
+        metavar="REGEX",
+        help=(
+            "Use only tags that fully match REGEX, version is taken from `version` named group"
+            " or from the first group. Overrides --tag-prefix."
+        ),
+    )
+    parser.add_argument(
+        "--stable-tags",
         action="store_true",
+        help="Skip tags with pre- and dev releases for --from-git-tags.",
+    )
+
+
+def _add_distribution_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--from-dist",
+        type=Path,
+        default=None,
+        metavar="PATH",
         help=(
-            "Set output version as Python package version."
-            " Supports pyproject.toml, setup.cfg and setup.py."
+            "Read versions from wheel and sdist file names in PATH directory tree,"
+            " or from a PEP 503 simple index HTML page of a project."
+            " Use with sort, max, min, unique, latest and next_free."
         ),
     )
     parser.add_argument(
-        "--path",
+        "--project",
+        default=None,
+        metavar="NAME",
+        help="Use only distributions of project NAME for --from-dist and bump --taken",
+    )
+
+
+def _add_profile_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const=OutputFormat.TEXT.value,
+        default=None,
+        choices=[i.value for i in OutputFormat],
+        metavar="FORMAT",
+        help=(
+            "Print time spent in parsing, package files, version parsing and commands to stderr,"
+            f" as text or json. Can be set with {PROFILE_ENV_NAME}=1 or {PROFILE_ENV_NAME}=json."
+        ),
+    )
+    parser.add_argument(
+        "--profile-output",
         type=Path,
-        default=Path.cwd(),
-        help="Path to Python package root. Default: current working directory.",
+        default=None,
+        metavar="FILE",
+        help="Write --profile report to FILE instead of stderr.",
+    )
+    parser.add_argument(
+        "--profile-cprofile",
+        type=Path,
+        default=None,
+        metavar="FILE",
+        help="Dump cProfile stats of the command to FILE, enables --profile.",
+    )
+    parser.add_argument(
+        "--profile-tracemalloc",
+        type=Path,
+        default=None,
+        metavar="FILE",
+        help="Dump tracemalloc snapshot of the command to FILE, enables --profile.",
     )
-    parser.add_argument("-v", "--verbose", action="store_true", help="Verbose logging")
-    parser.add_argument("-q", "--quiet", action="store_true", help="No logging")
 
-    subparsers = parser.add_subparsers(help="Available subcommands", dest="command")
-    parser_bump = subparsers.add_parser(Commands.BUMP.value, help="Bump current version")
-    parser_bump.add_argument(
+
+def get_profile_format(result: argparse.Namespace) -> Optional[OutputFormat]:
+    """
+    Get profile report format from CLI arguments or `NEWVERSION_PROFILE` env variable.
+
+    Returns:
+        Report format, `None` if profiling is disabled.
+    """
+    value = result.profile or os.environ.get(PROFILE_ENV_NAME, "")
+    if value in {"", "0"}:
+        if result.profile_cprofile or result.profile_tracemalloc:
+            return OutputFormat.TEXT
+        return None
+    if value == OutputFormat.JSON.value:
+        return OutputFormat.JSON
+    return OutputFormat.TEXT
+
+
+def _add_bump_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
         "release",
         type=VersionParts,
         action=EnumListAction,
@@ -190,7 +462,7 @@ def parse_args(args: Sequence[str]) -> CLINamespace:
         default=VersionParts.MICRO,
         help=f"Release type. Default: {VersionParts.MICRO.value}",
     )
-    parser_bump.add_argument(
+    parser.add_argument(
         "increment",
         type=int,
         default=1,
@@ -198,8 +470,23 @@ def parse_args(args: Sequence[str]) -> CLINamespace:
         help="Version increment. Default: 1",
     )
 
-    parser_get = subparsers.add_parser(Commands.GET.value, help="Get release number")
-    parser_get.add_argument(
+
+def _add_bump_command_arguments(parser: argparse.ArgumentParser) -> None:
+    _add_bump_arguments(parser)
+    parser.add_argument(
+        "--taken",
+        default=None,
+        metavar="SOURCE",
+        help=(
+            "Bump until the result is not one of existing versions from SOURCE: a file with"
+            " a version per line relative to --path, `-` to read from stdin,"
+            " or a directory with wheels and sdists. Lines that are not versions are skipped."
+        ),
+    )
+
+
+def _add_get_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
         "release",
         type=VersionParts,
         action=EnumListAction,
@@ -207,100 +494,408 @@ def parse_args(args: Sequence[str]) -> CLINamespace:
         help="Release type",
     )
 
-    parser_set = subparsers.add_parser(Commands.SET.value, help="Set release value")
-    parser_set.add_argument(
+
+def _add_set_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
         "release",
         type=VersionParts,
         action=EnumListAction,
         help="Release type",
     )
-    parser_set.add_argument(
+    parser.add_argument(
         "value",
         type=str,
         help="Release number or string value",
     )
 
-    subparsers.add_parser(Commands.STABLE.value, help="Get stable release of current version")
 
-    subparsers.add_parser(
-        Commands.IS_STABLE.value,
-        help="Check if current version is not a pre- or dev release",
+def _add_compare_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "other",
+        type=Version,
+        help="Version to compare",
     )
 
-    subparsers.add_parser(
-        Commands.PACKAGE.value,
-        help="Get Python package version. Supports pyproject.toml, setup.cfg and setup.py.",
+
+def _add_stable_only_argument(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--stable-only", action="store_true", help="Skip pre- and dev releases")
+
+
+def _add_sort_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("-r", "--reverse", action="store_true", help="Descending order")
+    _add_stable_only_argument(parser)
+    parser.add_argument(
+        "--external",
+        action="store_true",
+        help="Sort with bounded memory using temporary files, for inputs larger than RAM",
     )
+    parser.add_argument(
+        "--memory-budget",
+        type=int,
+        default=None,
+        help="Approximate memory budget for --external sort in bytes. Default: 256 MiB",
+    )
+    parser.add_argument(
+        "--temp-dir",
+        type=Path,
+        default=None,
+        help="Directory for --external sort temporary files. Default: system temp directory",
+    )
+
 
-    subparsers.add_parser(
-        Commands.SET_PACKAGE.value,
-        help="Set Python package version. Supports pyproject.toml, setup.cfg and setup.py.",
+def _add_series_argument(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--series",
+        default=None,
+        metavar="RELEASE",
+        help="Use only versions of a release series, e.g. `1` for 1.*, `1.4` for 1.4.*",
     )
 
-    parser_lt = subparsers.add_parser(
-        Commands.LT.value,
-        help="Check if current version is lesser than the other",
+
+def _add_latest_arguments(parser: argparse.ArgumentParser) -> None:
+    _add_series_argument(parser)
+    parser.add_argument(
+        "--pre",
+        dest="prerelease",
+        choices=[VersionParts.ALPHA.value, VersionParts.BETA.value, VersionParts.RC.value],
+        default=None,
+        help="Use only pre-releases of this type of --series release, e.g. rc of 2.0.0",
     )
-    parser_lt.add_argument(
-        "other",
-        type=Version,
-        help="Version to compare",
+    _add_stable_only_argument(parser)
+
+
+def _add_next_free_arguments(parser: argparse.ArgumentParser) -> None:
+    _add_bump_arguments(parser)
+    _add_series_argument(parser)
+
+
+def _add_set_package_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--manifest",
+        default=None,
+        metavar="FILE",
+        help=(
+            "Set versions of many packages at once. FILE maps package paths inside --path"
+            " to versions as JSON, TOML or `path version` lines, `-` to read from stdin."
+            " Files are written with -j threads."
+        ),
     )
 
-    parser_lte = subparsers.add_parser(
-        Commands.LTE.value,
-        help="Check if current version is lesser or equal to the other",
+
+def _add_serve_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--socket",
+        dest="socket_path",
+        type=Path,
+        default=None,
+        help="Unix socket path. Default: $NEWVERSION_SOCKET or a per-user runtime path",
     )
-    parser_lte.add_argument(
-        "other",
-        type=Version,
-        help="Version to compare",
+    parser.add_argument(
+        "--idle-timeout",
+        type=float,
+        default=600.0,
+        help="Stop after this many seconds without requests, 0 to never stop. Default: 600",
     )
+    parser.add_argument("--status", action="store_true", help="Check if daemon is alive and exit")
+    parser.add_argument("--stop", action="store_true", help="Stop running daemon and exit")
 
-    parser_gt = subparsers.add_parser(
-        Commands.GT.value,
-        help="Check if current version is greater than the other",
-    )
-    parser_gt.add_argument(
-        "other",
-        type=Version,
-        help="Version to compare",
+
+def _add_cache_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--clear", action="store_true", help="Remove all cached versions")
+    parser.add_argument(
+        "--invalidate",
+        action="append",
+        type=Path,
+        default=[],
+        metavar="ROOT",
+        help="Remove cached version of a package root, can be repeated",
     )
 
-    parser_gte = subparsers.add_parser(
-        Commands.GTE.value,
-        help="Check if current version is greater or equal to the other",
+
+_MULTI_VERSION_INPUT_HELP: Final = " Reads versions line by line from stdin or --each-file."
+# default sources from `newversion.version_sources.DEFAULT_SOURCE_NAMES`
+_PACKAGE_SOURCES_HELP: Final = (
+    " Supports pyproject.toml, setup.cfg, setup.py, package __version__, VERSION file,"
+    " package.json and Cargo.toml, sources are set in [tool.newversion]."
+)
+
+COMMAND_HELP: Final = {
+    Commands.BUMP: "Bump current version",
+    Commands.GET: "Get release number",
+    Commands.SET: "Set release value",
+    Commands.STABLE: "Get stable release of current version",
+    Commands.IS_STABLE: "Check if current version is not a pre- or dev release",
+    Commands.PACKAGE: "Get Python package version." + _PACKAGE_SOURCES_HELP,
+    Commands.SET_PACKAGE: "Set Python package version." + _PACKAGE_SOURCES_HELP,
+    Commands.LT: "Check if current version is lesser than the other",
+    Commands.LTE: "Check if current version is lesser or equal to the other",
+    Commands.GT: "Check if current version is greater than the other",
+    Commands.GTE: "Check if current version is greater or equal to the other",
+    Commands.EQ: "Check if current version is equal to the other",
+    Commands.NE: "Check if current version is not equal to the other",
+    Commands.SORT: f"Sort versions in PEP 440 order.{_MULTI_VERSION_INPUT_HELP}",
+    Commands.MAX: f"Get the greatest version.{_MULTI_VERSION_INPUT_HELP}",
+    Commands.MIN: f"Get the least version.{_MULTI_VERSION_INPUT_HELP}",
+    Commands.UNIQUE: (f"Drop duplicate versions, keeping input order.{_MULTI_VERSION_INPUT_HELP}"),
+    Commands.SERVE: (
+        "Run a local daemon on a Unix socket to skip startup cost."
+        " Set NEWVERSION_DAEMON=1 to forward CLI calls to it."
+    ),
+    Commands.CACHE: ("Show package versions cached on disk by --cache, or invalidate them."),
+    Commands.AUDIT: (
+        "Check that every version source of the package defines the same version."
+        " Use --tree to audit all packages under ROOT. Exits with 1 on mismatch."
+    ),
+    Commands.LATEST: (
+        "Get the greatest version of a release series."
+        " Reads versions line by line from stdin, --each-file or --from-git-tags."
+    ),
+    Commands.NEXT_FREE: (
+        "Bump the latest version of a release series until it is not taken."
+        " Reads versions line by line from stdin, --each-file or --from-git-tags."
+    ),
+}
+
+_COMMAND_ARGUMENTS: Final[dict[Commands, Callable[[argparse.ArgumentParser], None]]] = {
+    Commands.BUMP: _add_bump_command_arguments,
+    Commands.GET: _add_get_arguments,
+    Commands.SET: _add_set_arguments,
+    Commands.LT: _add_compare_arguments,
+    Commands.LTE: _add_compare_arguments,
+    Commands.GT: _add_compare_arguments,
+    Commands.GTE: _add_compare_arguments,
+    Commands.EQ: _add_compare_arguments,
+    Commands.NE: _add_compare_arguments,
+    Commands.SET_PACKAGE: _add_set_package_arguments,
+    Commands.SORT: _add_sort_arguments,
+    Commands.MAX: _add_stable_only_argument,
+    Commands.MIN: _add_stable_only_argument,
+    Commands.UNIQUE: _add_stable_only_argument,
+    Commands.SERVE: _add_serve_arguments,
+    Commands.CACHE: _add_cache_arguments,
+    Commands.LATEST: _add_latest_arguments,
+    Commands.NEXT_FREE: _add_next_free_arguments,
+}
+
+
+# commands that read or write the package and ignore per-line input versions
+_EACH_EXCLUDED_COMMANDS: Final = (
+    Commands.PACKAGE,
+    Commands.SET_PACKAGE,
+    Commands.SERVE,
+    Commands.CACHE,
+)
+
+
+def _validate_args(parser: argparse.ArgumentParser, result: argparse.Namespace) -> None:
+    command = Commands(result.command) if result.command else Commands.UNKNOWN
+    if result.each_file is not None:
+        result.each = True
+
+    if result.each and (result.package or result.save):
+        parser.error("--each cannot be used with --package or --save")
+
+    if result.each and command in _EACH_EXCLUDED_COMMANDS:
+        parser.error(f"--each cannot be used with {command.value}")
+
+    if command in MULTI_VERSION_COMMANDS and (result.package or result.save):
+        parser.error(f"{command.value} cannot be used with --package or --save")
+
+    if getattr(result, "manifest", None) is not None and (result.each or result.package):
+        parser.error("--manifest cannot be used with --each or --package")
+
+    if result.from_git_tags and (
+        result.version is not None or result.package or result.each or result.tree is not None
+    ):
+        parser.error("--from-git-tags cannot be used with --input, --package, --each or --tree")
+
+    if result.from_dist is not None and (
+        command not in MULTI_VERSION_COMMANDS or result.each or result.from_git_tags
+    ):
+        commands = ", ".join(i.value for i in MULTI_VERSION_COMMANDS)
+        parser.error(
+            f"--from-dist can be used only with {commands}, without --each or --from-git-tags"
+        )
+
+    has_input = result.version is not None or result.package or result.from_git_tags
+    if getattr(result, "taken", None) == "-" and (
+        result.each_file is None if result.each else not has_input
+    ):
+        parser.error("--taken - needs input version from --input, --package or --from-git-tags")
+
+    if result.tree is not None and (
+        command not in {Commands.PACKAGE, Commands.AUDIT} or result.each or result.save
+    ):
+        parser.error("--tree can be used only with package and audit subcommands")
+
+
+def _get_commands_epilog() -> str:
+    lines = ["subcommands:"]
+    width = max(len(command.value) for command in COMMAND_HELP)
+    for command, help_text in COMMAND_HELP.items():
+        summary = help_text.split(". ")[0].rstrip(".")
+        lines.append(f"  {command.value:<{width}}  {summary}")
+    return "\n".join(lines)
+
+
+@functools.cache
+def create_parser() -> CLIArgumentParser:
+    """
+    Create CLI argument parser for global arguments.
+
+    Subcommand arguments are collected as a remainder and parsed
+    by a parser from `create_command_parser`, so only the used subcommand parser is built.
+    Parser is created once and reused, so it does not depend on the current directory.
+
+    Returns:
+        Argument parser.
+    """
+    parser = CLIArgumentParser(
+        "newversion",
+        description="SemVer helpers for PEP-440 versions",
+        epilog=_get_commands_epilog(),
+        formatter_class=argparse.RawDescriptionHelpFormatter,
     )
-    parser_gte.add_argument(
-        "other",
+    parser.add_argument("-V", "--version", action=ProgramVersionAction, help="Show version")
+    parser.add_argument(
+        "-i",
+        "--input",
+        dest="version",
         type=Version,
-        help="Version to compare",
+        default=None,
+        help="Input version, can be provided as a pipe-in as well.",
     )
-
-    parser_eq = subparsers.add_parser(
-        Commands.EQ.value,
-        help="Check if current version is equal to the other",
+    parser.add_argument(
+        "-p",
+        "--package",
+        action="store_true",
+        help=(
+            "Get Python package version as input, overrides --input and pipe in."
+            + _PACKAGE_SOURCES_HELP
+        ),
     )
-    parser_eq.add_argument(
-        "other",
-        type=Version,
-        help="Version to compare",
+    parser.add_argument(
+        "-s",
+        "--save",
+        action="store_true",
+        help="Set output version as Python package version." + _PACKAGE_SOURCES_HELP,
     )
-
-    parser_ne = subparsers.add_parser(
-        Commands.NE.value,
-        help="Check if current version is not equal to the other",
+    parser.add_argument(
+        "--path",
+        type=Path,
+        default=None,
+        help="Path to Python package root. Default: current working directory.",
     )
-    parser_ne.add_argument(
-        "other",
-        type=Version,
-        help="Version to compare",
+    parser.add_argument(
+        "--in-place",
+        action="store_true",
+        help=(
+            "Patch version bytes in existing package files on save instead of replacing them."
+            " Faster for huge generated files, but not atomic for concurrent readers."
+        ),
+    )
+    parser.add_argument(
+        "--cache",
+        dest="disk_cache",
+        action="store_true",
+        help=(
+            "Cache package versions on disk between calls, files are checked with stat only."
+            f" Can be set with {CACHE_ENV_NAME}=1."
+        ),
     )
+    parser.add_argument(
+        "--no-fsync",
+        action="store_true",
+        help=(
+            "Do not flush package files to disk on save, for tmpfs and throwaway CI runners."
+            f" Can be set with {NO_FSYNC_ENV_NAME}=1."
+        ),
+    )
+    _add_batch_arguments(parser)
+    _add_tree_arguments(parser)
+    _add_git_tags_arguments(parser)
+    _add_distribution_arguments(parser)
+    _add_profile_arguments(parser)
+    parser.add_argument("-v", "--verbose", action="store_true", help="Verbose logging")
+    parser.add_argument("-q", "--quiet", action="store_true", help="No logging")
+    parser.add_argument(
+        "command",
+        nargs="?",
+        choices=[command.value for command in COMMAND_HELP],
+        metavar="command",
+        help="Subcommand, see the list below",
+    )
+    parser.add_argument("command_args", nargs=argparse.REMAINDER, help=argparse.SUPPRESS)
+    return parser
+
+
+@functools.cache
+def create_command_parser(command: Commands) -> CLIArgumentParser:
+    """
+    Create argument parser for a single subcommand.
+
+    Arguments:
+        command: Subcommand.
 
-    result = parser.parse_args(args)
+    Returns:
+        Argument parser.
+    """
+    parser = CLIArgumentParser(f"newversion {command.value}", description=COMMAND_HELP[command])
+    add_arguments = _COMMAND_ARGUMENTS.get(command)
+    if add_arguments is not None:
+        add_arguments(parser)
+    return parser
+
+
+def _resolve_manifest(manifest: Optional[str], cwd: Path) -> Optional[str]:
+    if manifest is None or manifest == "-":
+        return manifest
+    return (cwd / manifest).as_posix()
+
+
+def parse_args(
+    args: Sequence[str],
+    *,
+    stdin: Optional[TextIO] = None,
+    stdout: Optional[TextIO] = None,
+    stderr: Optional[TextIO] = None,
+    cwd: Optional[Path] = None,
+) -> CLINamespace:
+    """
+    Parse CLI arguments.
+
+    Arguments:
+        args: CLI arguments.
+        stdin: Stream to read input version from, `sys.stdin` by default.
+        stdout: Stream for help output, `sys.stdout` by default.
+        stderr: Stream for usage errors, `sys.stderr` by default.
+        cwd: Directory to resolve relative paths against, current working directory by default.
+
+    Returns:
+        Argument parser Namespace.
+    """
+    cwd = cwd or Path.cwd()
+    parser = create_parser()
+    with CLIArgumentParser.redirect(stdout, stderr):
+        result = parser.parse_args(args)
+        command = Commands(result.command) if result.command else Commands.UNKNOWN
+        if command != Commands.UNKNOWN:
+            create_command_parser(command).parse_args(result.command_args, namespace=result)
+        _validate_args(parser, result)
+
+    is_multi_version = command in MULTI_VERSION_COMMANDS
 
     if result.version is None:
-        result.version = get_stdin()
+        skip_stdin = (
+            result.each
+            or is_multi_version
+            or command in {Commands.SERVE, Commands.CACHE, Commands.AUDIT}
+            or result.tree is not None
+            or result.from_git_tags
+            or getattr(result, "manifest", None) is not None
+            or getattr(result, "taken", None) == "-"
+        )
+        result.version = Version.zero() if skip_stdin else get_stdin(stdin)
 
     log_level = logging.DEBUG if result.verbose else logging.INFO
     if result.quiet:
@@ -308,7 +903,7 @@ def parse_args(args: Sequence[str]) -> CLINamespace:
 
     return CLINamespace(
         version=result.version,
-        command=Commands(result.command) if result.command else Commands.UNKNOWN,
+        command=command,
         release=result.release if getattr(result, "release", "") else VersionParts.MICRO,
         increment=getattr(result, "increment", 1),
         other=getattr(result, "other", Version.zero()),
@@ -316,5 +911,43 @@ def parse_args(args: Sequence[str]) -> CLINamespace:
         log_level=log_level,
         package=result.package,
         save=result.save,
-        path=result.path,
+        path=cwd / result.path if result.path else cwd,
+        each=result.each,
+        on_invalid=result.on_invalid,
+        each_file=cwd / result.each_file if result.each_file else None,
+        jobs=result.jobs,
+        chunk_size=result.chunk_size,
+        reverse=getattr(result, "reverse", False),
+        stable_only=getattr(result, "stable_only", False),
+        series=getattr(result, "series", None),
+        prerelease=getattr(result, "prerelease", None),
+        external=getattr(result, "external", False),
+        memory_budget=getattr(result, "memory_budget", None),
+        temp_dir=cwd / result.temp_dir if getattr(result, "temp_dir", None) else None,
+        socket_path=getattr(result, "socket_path", None),
+        idle_timeout=getattr(result, "idle_timeout", 0.0),
+        status=getattr(result, "status", False),
+        stop=getattr(result, "stop", False),
+        tree=cwd / result.tree if result.tree else None,
+        tree_exclude=result.tree_exclude,
+        taken=getattr(result, "taken", None),
+        output_format=result.output_format,
+        manifest=_resolve_manifest(getattr(result, "manifest", None), cwd),
+        fsync=not result.no_fsync and os.environ.get(NO_FSYNC_ENV_NAME) != "1",
+        in_place=result.in_place,
+        disk_cache=result.disk_cache or os.environ.get(CACHE_ENV_NAME) == "1",
+        from_git_tags=result.from_git_tags,
+        tag_prefix=result.tag_prefix,
+        tag_pattern=result.tag_pattern,
+        stable_tags=result.stable_tags,
+        from_dist=cwd / result.from_dist if result.from_dist else None,
+        project=result.project,
+        profile=get_profile_format(result),
+        profile_output=cwd / result.profile_output if result.profile_output else None,
+        profile_cprofile=cwd / result.profile_cprofile if result.profile_cprofile else None,
+        profile_tracemalloc=(
+            cwd / result.profile_tracemalloc if result.profile_tracemalloc else None
+        ),
+        clear=getattr(result, "clear", False),
+        invalidate=[cwd / path for path in getattr(result, "invalidate", [])],
     )
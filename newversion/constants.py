@@ -7,6 +7,11 @@ from typing import Final
 
 PACKAGE_NAME: Final = "newversion"
 LOGGER_NAME: Final = "newversion"
+DAEMON_ENV_NAME: Final = "NEWVERSION_DAEMON"
+SOCKET_ENV_NAME: Final = "NEWVERSION_SOCKET"
+NO_FSYNC_ENV_NAME: Final = "NEWVERSION_NO_FSYNC"
+CACHE_ENV_NAME: Final = "NEWVERSION_CACHE"
+PROFILE_ENV_NAME: Final = "NEWVERSION_PROFILE"
 
 
 class Prerelease:
@@ -57,4 +62,42 @@ class Commands(enum.Enum):
     STABLE = "stable"
     PACKAGE = "package"
     SET_PACKAGE = "set_package"
+    SORT = "sort"
+    MAX = "max"
+    MIN = "min"
+    UNIQUE = "unique"
+    SERVE = "serve"
+    CACHE = "cache"
+    AUDIT = "audit"
+    LATEST = "latest"
+    NEXT_FREE = "next_free"
     UNKNOWN = "unknown"
+
+
+MULTI_VERSION_COMMANDS: Final = (
+    Commands.SORT,
+    Commands.MAX,
+    Commands.MIN,
+    Commands.UNIQUE,
+    Commands.LATEST,
+    Commands.NEXT_FREE,
+)
+
+
+class InvalidLinePolicy(enum.Enum):
+    """
+    What to do with invalid lines in batch mode.
+    """
+
+    ABORT = "abort"
+    SKIP = "skip"
+    REPORT = "report"
+
+
+class OutputFormat(enum.Enum):
+    """
+    Output format for commands with structured output.
+    """
+
+    TEXT = "text"
+    JSON = "json"
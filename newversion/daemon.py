@@ -0,0 +1,362 @@
+r"""
+Local daemon that serves CLI calls over a Unix socket.
+
+Protocol is newline-delimited JSON, one request and one response per line,
+several requests can be sent over the same connection.
+
+Requests:
+
+- `{"argv": ["bump", "minor"], "cwd": "/path", "stdin": "1.2.3\\n"}` - run CLI command
+- `{"command": "ping"}` - check if daemon is alive
+- `{"command": "stop"}` - stop daemon
+
+Responses: `{"code": 0, "stdout": "1.3.0\\n", "stderr": ""}`.
+"""
+
+import contextlib
+import io
+import json
+import logging
+import os
+import socket
+import socketserver
+import stat
+import tempfile
+import threading
+import time
+from collections.abc import Sequence
+from pathlib import Path
+from typing import Any, Optional, TextIO, cast
+
+from newversion.cli_parser import CLINamespace
+from newversion.constants import LOGGER_NAME, SOCKET_ENV_NAME
+from newversion.exceptions import DaemonAlreadyRunningError, DaemonSocketError
+from newversion.package_version import PackageVersionCache
+
+ResponseTypeDef = dict[str, Any]
+
+
+def get_socket_path(path: Optional[Path] = None) -> Path:
+    """
+    Get daemon socket path.
+
+    Arguments:
+        path: Explicit socket path.
+
+    Returns:
+        `path` if it is set, `$NEWVERSION_SOCKET`, `$XDG_RUNTIME_DIR/newversion.sock`
+        or a socket in a per-user private directory from `get_default_socket_dir`.
+    """
+    if path is not None:
+        return path
+    env_path = os.environ.get(SOCKET_ENV_NAME)
+    if env_path:
+        return Path(env_path)
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_dir:
+        return Path(runtime_dir) / "newversion.sock"
+    return get_default_socket_dir() / "daemon.sock"
+
+
+def get_default_socket_dir() -> Path:
+    """
+    Get per-user socket directory in a temporary directory, it is created by the daemon.
+    """
+    return Path(tempfile.gettempdir()) / f"newversion-{os.getuid()}"
+
+
+def is_private(path: Path, file_type: int) -> bool:
+    """
+    Check that path is owned by the current user and is closed to group and others.
+
+    Symlinks are not followed.
+
+    Arguments:
+        path: Path to check.
+        file_type: Expected `stat.S_IFMT` value, e.g. `stat.S_IFSOCK`.
+    """
+    try:
+        path_stat = path.lstat()
+    except OSError:
+        return False
+    return (
+        stat.S_IFMT(path_stat.st_mode) == file_type
+        and path_stat.st_uid == os.getuid()
+        and not path_stat.st_mode & 0o077
+    )
+
+
+class DaemonRequestHandler(socketserver.StreamRequestHandler):
+    """
+    Handle JSON requests from a single client connection.
+    """
+
+    def handle(self) -> None:
+        """
+        Read requests line by line and write a response for each of them.
+        """
+        server = cast("DaemonServer", self.server)
+        for line in self.rfile:
+            server.touch()
+            try:
+                request = json.loads(line)
+                response = server.handle_request_data(request)
+            except (ValueError, TypeError, KeyError) as e:
+                response = {"code": 2, "stdout": "", "stderr": f"Invalid request: {e}\n"}
+            self.wfile.write(json.dumps(response).encode() + b"\n")
+            self.wfile.flush()
+            server.touch()
+
+
+class DaemonServer(socketserver.ThreadingUnixStreamServer):
+    """
+    Threaded Unix socket server that runs CLI commands in-process.
+
+    Package versions are kept in a shared `PackageVersionCache`,
+    so repeated calls read package files only if they changed.
+
+    Arguments:
+        socket_path: Unix socket path.
+        idle_timeout: Stop after this many seconds without requests, `0` to never stop.
+    """
+
+    daemon_threads = True
+    WATCHDOG_INTERVAL = 1.0
+
+    def __init__(self, socket_path: Path, idle_timeout: float = 0.0) -> None:
+        self.socket_path = socket_path
+        self.idle_timeout = idle_timeout
+        self.package_cache = PackageVersionCache()
+        self._last_request = time.monotonic()
+        self._stopped = threading.Event()
+        self._logger = logging.getLogger(LOGGER_NAME)
+        self._create_socket_dir()
+        self._remove_stale_socket()
+        # socket is created private, other users must not connect before chmod
+        old_umask = os.umask(0o077)
+        try:
+            super().__init__(str(socket_path), DaemonRequestHandler)
+        finally:
+            os.umask(old_umask)
+        socket_path.chmod(0o600)
+
+    def _create_socket_dir(self) -> None:
+        socket_dir = self.socket_path.parent
+        if socket_dir != get_default_socket_dir():
+            return
+        # shared temporary directory, so anyone could create this path first
+        with contextlib.suppress(FileExistsError):
+            socket_dir.mkdir(mode=0o700)
+        if not is_private(socket_dir, stat.S_IFDIR):
+            raise DaemonSocketError(self.socket_path, "directory is not private to current user")
+
+    def _remove_stale_socket(self) -> None:
+        if not self.socket_path.exists():
+            return
+        if is_alive(self.socket_path):
+            raise DaemonAlreadyRunningError(self.socket_path)
+        self.socket_path.unlink()
+
+    def touch(self) -> None:
+        """
+        Mark server as active to postpone idle shutdown.
+        """
+        self._last_request = time.monotonic()
+
+    def handle_request_data(self, request: dict[str, Any]) -> ResponseTypeDef:
+        """
+        Handle a decoded request.
+
+        Arguments:
+            request: Request data.
+
+        Returns:
+            Response data.
+        """
+        from newversion.main import run_cli  # noqa: PLC0415
+
+        command = request.get("command")
+        if command == "ping":
+            return {"code": 0, "pid": os.getpid()}
+        if command == "stop":
+            threading.Thread(target=self.shutdown, daemon=True).start()
+            return {"code": 0}
+
+        stdout = io.StringIO()
+        stderr = io.StringIO()
+        code = run_cli(
+            [str(i) for i in request["argv"]],
+            stdin=io.StringIO(request.get("stdin") or ""),
+            stdout=stdout,
+            stderr=stderr,
+            cwd=Path(request["cwd"]) if request.get("cwd") else None,
+            package_cache=self.package_cache,
+        )
+        return {"code": code, "stdout": stdout.getvalue(), "stderr": stderr.getvalue()}
+
+    def _watch_idle(self) -> None:
+        interval = min(self.WATCHDOG_INTERVAL, self.idle_timeout)
+        while not self._stopped.wait(interval):
+            if time.monotonic() - self._last_request > self.idle_timeout:
+                self._logger.debug("Idle for %ss, stopping daemon", self.idle_timeout)
+                self.shutdown()
+                return
+
+    def run(self) -> None:
+        """
+        Serve requests until stopped or idle timeout is reached, then remove the socket.
+        """
+        watchdog = None
+        if self.idle_timeout > 0:
+            watchdog = threading.Thread(target=self._watch_idle, daemon=True)
+            watchdog.start()
+        try:
+            self.serve_forever()
+        finally:
+            self._stopped.set()
+            self.server_close()
+            if self.socket_path.exists():
+                self.socket_path.unlink()
+
+
+def _connect(socket_path: Path, timeout: Optional[float] = None) -> socket.socket:
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        client.settimeout(timeout)
+        client.connect(str(socket_path))
+    except OSError:
+        client.close()
+        raise
+    return client
+
+
+def _exchange(client: socket.socket, socket_path: Path, request: dict[str, Any]) -> ResponseTypeDef:
+    client.sendall(json.dumps(request).encode() + b"\n")
+    with client.makefile("rb") as f:
+        line = f.readline()
+    if not line:
+        message = f"Daemon on {socket_path} closed connection"
+        raise ConnectionError(message)
+    return json.loads(line)
+
+
+def send_request(
+    socket_path: Path, request: dict[str, Any], timeout: Optional[float] = None
+) -> ResponseTypeDef:
+    """
+    Send a single request to daemon.
+
+    Arguments:
+        socket_path: Unix socket path.
+        request: Request data.
+        timeout: Socket timeout in seconds.
+
+    Returns:
+        Response data.
+
+    Raises:
+        OSError: If daemon is not reachable.
+    """
+    with _connect(socket_path, timeout) as client:
+        return _exchange(client, socket_path, request)
+
+
+def is_alive(socket_path: Path) -> bool:
+    """
+    Check if daemon responds on a socket.
+
+    Arguments:
+        socket_path: Unix socket path.
+    """
+    try:
+        response = send_request(socket_path, {"command": "ping"}, timeout=1.0)
+    except (OSError, ValueError):
+        return False
+    return response.get("code") == 0
+
+
+def forward(
+    args: Sequence[str],
+    stdin: TextIO,
+    stdout: TextIO,
+    stderr: TextIO,
+    socket_path: Optional[Path] = None,
+) -> Optional[int]:
+    """
+    Forward CLI call to a running daemon.
+
+    Arguments:
+        args: CLI arguments without program name.
+        stdin: Input stream, read completely after connecting unless it is a TTY.
+        stdout: Output stream.
+        stderr: Error stream.
+        socket_path: Unix socket path.
+
+    Returns:
+        Exit code or `None` if daemon is not running and command should be run locally,
+        `stdin` is not read in this case.
+    """
+    socket_path = get_socket_path(socket_path)
+    if not socket_path.exists():
+        return None
+    # calls can contain private paths and responses are trusted, so only own sockets are used
+    if not is_private(socket_path, stat.S_IFSOCK):
+        error = DaemonSocketError(socket_path, "socket is not private to current user")
+        stderr.write(f"{error}, running locally\n")
+        return None
+    # stdin is read only after daemon accepts connection, so a local run still gets it
+    try:
+        client = _connect(socket_path)
+    except OSError:
+        return None
+    with client:
+        request = {
+            "argv": list(args),
+            "cwd": str(Path.cwd()),
+            "stdin": "" if stdin.isatty() else stdin.read(),
+        }
+        try:
+            response = _exchange(client, socket_path, request)
+        except (OSError, ValueError) as e:
+            # daemon could have run the command already, so it is not repeated locally
+            stderr.write(f"{DaemonSocketError(socket_path, str(e))}\n")
+            return 1
+    stdout.write(response.get("stdout", ""))
+    stderr.write(response.get("stderr", ""))
+    return int(response.get("code", 1))
+
+
+def run_serve_command(config: CLINamespace, stdout: TextIO) -> int:
+    """
+    Run `serve` CLI command.
+
+    Arguments:
+        config: Parsed CLI arguments.
+        stdout: Output stream for status messages.
+
+    Returns:
+        Exit code.
+    """
+    socket_path = get_socket_path(config.socket_path)
+    if config.status:
+        alive = is_alive(socket_path)
+        stdout.write(f"{'running' if alive else 'stopped'}: {socket_path}\n")
+        return 0 if alive else 1
+    if config.stop:
+        try:
+            send_request(socket_path, {"command": "stop"}, timeout=1.0)
+        except (OSError, ValueError):
+            stdout.write(f"stopped: {socket_path}\n")
+            return 1
+        stdout.write(f"stopping: {socket_path}\n")
+        return 0
+
+    try:
+        server = DaemonServer(socket_path, idle_timeout=config.idle_timeout)
+    except (DaemonAlreadyRunningError, DaemonSocketError) as e:
+        stdout.write(f"{e}\n")
+        return 1
+    stdout.write(f"listening: {socket_path}\n")
+    stdout.flush()
+    server.run()
+    return 0
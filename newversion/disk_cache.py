@@ -0,0 +1,239 @@
+"""
+Persistent package version cache shared between CLI calls.
+"""
+
+import json
+import logging
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Final, Optional, TextIO
+
+from newversion.cli_parser import CLINamespace
+from newversion.constants import LOGGER_NAME
+from newversion.file_edit import AtomicWriter, FileEdit
+from newversion.package_version import PackageVersion, PackageVersionCache, SignatureTypeDef
+from newversion.utils import get_cache_dir
+from newversion.version import Version
+
+CACHE_FORMAT_VERSION: Final = 1
+
+
+def get_cache_path() -> Path:
+    """
+    Get cache file path.
+
+    Returns:
+        `$XDG_CACHE_HOME/newversion/package-versions.json`, `~/.cache` is used
+        if `XDG_CACHE_HOME` is not set.
+    """
+    return get_cache_dir() / "package-versions.json"
+
+
+@dataclass(frozen=True)
+class DiskCacheEntry:
+    """
+    Cached package version.
+
+    Attributes:
+        root: Package root.
+        source: File the version was found in.
+        line: Line number in `source`, starting from 1.
+        version: Package version.
+        files: Candidate source files that were checked.
+        signature: `(mtime_ns, size, inode)` of every file from `files`, `None` for missing files.
+    """
+
+    root: Path
+    source: Path
+    line: int
+    version: Version
+    files: list[Path]
+    signature: SignatureTypeDef
+
+    def to_dict(self) -> dict[str, Any]:
+        """
+        Serialize to a JSON-compatible dict.
+        """
+        return {
+            "source": self.source.as_posix(),
+            "line": self.line,
+            "version": self.version.dumps(),
+            "files": [[path.as_posix(), stat] for path, stat in zip(self.files, self.signature)],
+        }
+
+    @classmethod
+    def from_dict(cls, root: str, data: dict[str, Any]) -> "DiskCacheEntry":
+        """
+        Deserialize from a dict created by `to_dict`.
+        """
+        files: list[list[Any]] = data["files"]
+        return cls(
+            root=Path(root),
+            source=Path(data["source"]),
+            line=int(data["line"]),
+            version=Version(data["version"]),
+            files=[Path(path) for path, _stat in files],
+            signature=tuple(tuple(stat) if stat is not None else None for _path, stat in files),
+        )
+
+
+class DiskPackageVersionCache(PackageVersionCache):
+    """
+    Package version cache stored in a JSON file.
+
+    A warm lookup reads the cache file and calls `stat` for every candidate source file
+    of the package. Entries are validated by `(mtime_ns, size, inode)`, so a changed
+    or replaced file is always read again.
+
+    Arguments:
+        path: Cache file path, see `get_cache_path` for the default.
+    """
+
+    MAX_ENTRIES: Final = 1000
+
+    def __init__(self, path: Optional[Path] = None) -> None:
+        super().__init__()
+        self.path = path or get_cache_path()
+        self._entries: Optional[dict[str, DiskCacheEntry]] = None
+        self._logger = logging.getLogger(LOGGER_NAME)
+
+    def _load(self) -> dict[str, DiskCacheEntry]:
+        if self._entries is not None:
+            return self._entries
+
+        self._entries = {}
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+            if data.get("format") != CACHE_FORMAT_VERSION:
+                return self._entries
+            for root, entry_data in data["entries"].items():
+                self._entries[root] = DiskCacheEntry.from_dict(root, entry_data)
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, LookupError, TypeError, AttributeError) as e:
+            self._logger.debug(f"Ignoring invalid cache file {self.path}: {e}")
+            self._entries = {}
+        return self._entries
+
+    def _save(self) -> None:
+        entries = self._load()
+        data = {
+            "format": CACHE_FORMAT_VERSION,
+            "entries": {root: entry.to_dict() for root, entry in entries.items()},
+        }
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            text = json.dumps(data, indent=1)
+            AtomicWriter(fsync=False).write([FileEdit.from_text(self.path, f"{text}\n")])
+        except OSError as e:
+            self._logger.debug(f"Cannot save cache file {self.path}: {e}")
+
+    def is_valid(self, entry: DiskCacheEntry) -> bool:
+        """
+        Check if source files of a cache entry did not change.
+        """
+        return self._get_signature(entry.files) == entry.signature
+
+    def get(self, path: Path) -> Version:
+        """
+        Get package version, reading files only if they changed since it was cached.
+
+        Arguments:
+            path: Package root.
+
+        Returns:
+            Package version.
+
+        Raises:
+            PackageVersionError: If the package version cannot be determined.
+        """
+        root = path.absolute()
+        key = root.as_posix()
+        with self._lock:
+            entries = self._load()
+            entry = entries.get(key)
+            if entry is not None and self.is_valid(entry):
+                self._logger.debug(f"Using cached version from {entry.source}:{entry.line}")
+                return entry.version
+
+            source_paths = self._get_source_paths(root)
+            signature = self._get_signature(source_paths)
+            location = PackageVersion(root).locate()
+            source_paths, signature = self._add_location(source_paths, signature, location)
+            entries.pop(key, None)
+            entries[key] = DiskCacheEntry(
+                root=root,
+                source=location.path,
+                line=location.line,
+                version=location.version,
+                files=source_paths,
+                signature=signature,
+            )
+            for old_key in list(entries)[: -self.MAX_ENTRIES]:
+                del entries[old_key]
+            self._save()
+        return location.version
+
+    def get_entries(self) -> list[DiskCacheEntry]:
+        """
+        Get all cached entries sorted by package root.
+        """
+        with self._lock:
+            return sorted(self._load().values(), key=lambda entry: entry.root)
+
+    def invalidate(self, path: Path) -> bool:
+        """
+        Remove cached version of a package.
+
+        Arguments:
+            path: Package root.
+
+        Returns:
+            True if the package was cached.
+        """
+        with self._lock:
+            entry = self._load().pop(path.absolute().as_posix(), None)
+            if entry is not None:
+                self._save()
+        return entry is not None
+
+    def clear(self) -> None:
+        """
+        Remove all cached versions.
+        """
+        with self._lock:
+            self._entries = {}
+            self.path.unlink(missing_ok=True)
+
+
+def run_cache_command(config: CLINamespace, stdout: TextIO) -> int:
+    """
+    Run `cache` CLI command.
+
+    Arguments:
+        config: Parsed CLI arguments.
+        stdout: Output stream.
+
+    Returns:
+        Exit code.
+    """
+    cache = DiskPackageVersionCache()
+    if config.clear:
+        cache.clear()
+        stdout.write(f"cleared: {cache.path}\n")
+        return 0
+
+    if config.invalidate:
+        for root in config.invalidate:
+            status = "invalidated" if cache.invalidate(root) else "not cached"
+            stdout.write(f"{status}: {root.as_posix()}\n")
+        return 0
+
+    stdout.write(f"cache: {cache.path}\n")
+    for entry in cache.get_entries():
+        status = "valid" if cache.is_valid(entry) else "stale"
+        stdout.write(
+            f"{entry.root.as_posix()} {entry.version.dumps()}"
+            f" {entry.source.as_posix()}:{entry.line} {status}\n"
+        )
+    return 0
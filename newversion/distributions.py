@@ -0,0 +1,172 @@
+"""
+Read versions of built distributions from their file names.
+"""
+
+import html
+import operator
+import os
+import re
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+from itertools import starmap
+from pathlib import Path
+from typing import Final, Optional
+
+from newversion.version import Version, VersionError
+
+WHEEL_SUFFIX: Final = ".whl"
+SDIST_SUFFIXES: Final = (".tar.gz", ".zip")
+SIMPLE_INDEX_SUFFIXES: Final = (".html", ".htm")
+
+SORT_KEY: Final = operator.attrgetter("sort_key")
+
+_RE_NAME_SEPARATORS: Final = re.compile(r"[-_.]+")
+_RE_ANCHOR_TEXT: Final = re.compile(r"<a\b[^>]*>\s*([^<]*?)\s*</a\s*>", re.IGNORECASE)
+
+
+def normalize_project_name(name: str) -> str:
+    """
+    Normalize project name as in PEP 503, e.g. `My_Package` to `my-package`.
+    """
+    return _RE_NAME_SEPARATORS.sub("-", name).lower()
+
+
+def iter_file_names(path: Path) -> Iterator[str]:
+    """
+    Get names of all files in a directory tree with `os.scandir`.
+
+    Symlinked directories are not followed.
+    """
+    stack = [path]
+    while stack:
+        with os.scandir(stack.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(Path(entry.path))
+                else:
+                    yield entry.name
+
+
+def iter_simple_index_file_names(text: str) -> Iterator[str]:
+    """
+    Get file names from a PEP 503 simple index project page.
+
+    Anchor text must match the file name of the link target, so links are not parsed.
+    """
+    for match in _RE_ANCHOR_TEXT.finditer(text):
+        yield html.unescape(match.group(1))
+
+
+@dataclass(frozen=True)
+class DistributionFilter:
+    """
+    Rule to get a version from a wheel or sdist file name.
+
+    Attributes:
+        project: Normalized project name, `None` to accept all projects.
+        prefix: Pattern that matches the project name in any spelling and a dash after it.
+    """
+
+    project: Optional[str] = None
+    prefix: Optional[re.Pattern[str]] = None
+
+    @classmethod
+    def from_project(cls, project: Optional[str] = None) -> "DistributionFilter":
+        """
+        Create a filter for a project name in any spelling, e.g. `My.Package`.
+        """
+        if not project:
+            return cls()
+        normalized = normalize_project_name(project)
+        name_pattern = "[-_.]+".join(re.escape(part) for part in normalized.split("-"))
+        return cls(normalized, re.compile(f"{name_pattern}-", re.IGNORECASE))
+
+    def _iter_matching(self, file_names: Iterable[str]) -> Iterator[tuple[str, str]]:
+        if self.prefix is None:
+            for file_name in file_names:
+                yield file_name, file_name
+            return
+
+        for match in filter(None, map(self.prefix.match, file_names)):
+            yield match.string, match.string[match.end() :]
+
+    def _get_version_string(self, file_name: str, rest: str) -> Optional[str]:
+        # without a project, version is the part after the project name
+        version_index = 0 if self.prefix is not None else 1
+        if file_name.endswith(WHEEL_SUFFIX):
+            parts = rest.split("-")
+            # version, optional build tag, python tag, abi tag and platform tag
+            if len(parts) < version_index + 4:
+                return None
+            version_string = parts[version_index]
+        else:
+            suffix = next((i for i in SDIST_SUFFIXES if file_name.endswith(i)), None)
+            if suffix is None:
+                return None
+            parts = rest[: -len(suffix)].rsplit("-", version_index)
+            if len(parts) <= version_index:
+                return None
+            version_string = parts[-1]
+
+        return version_string if version_string[:1].isdigit() else None
+
+    def get_version_string(self, file_name: str) -> Optional[str]:
+        """
+        Get version part of a wheel or sdist file name.
+
+        Entries of other projects are rejected by a single prefix match,
+        before the suffix is checked or the name is split.
+
+        Arguments:
+            file_name: File name, e.g. `my_package-1.2.3-py3-none-any.whl`.
+
+        Returns:
+            Version string, `None` if file is not a distribution of the project.
+        """
+        for matching_name, rest in self._iter_matching([file_name]):
+            return self._get_version_string(matching_name, rest)
+        return None
+
+    def parse_versions(self, file_names: Iterable[str]) -> list[Version]:
+        """
+        Parse versions of all matching file names, invalid versions are skipped.
+
+        Names are matched against the project prefix in bulk and every unique version
+        string is parsed once, so wheels for many platforms cost a single `Version`.
+
+        Returns:
+            Sorted unique versions.
+        """
+        version_strings = set(starmap(self._get_version_string, self._iter_matching(file_names)))
+        versions: set[Version] = set()
+        for version_string in version_strings:
+            if version_string is None:
+                continue
+            try:
+                versions.add(Version.parse(version_string))
+            except VersionError:
+                continue
+        return sorted(versions, key=SORT_KEY)
+
+
+def read_distribution_versions(path: Path, project: Optional[str] = None) -> list[Version]:
+    """
+    Get versions of wheels and sdists from a directory tree or a simple index page.
+
+    Arguments:
+        path: Directory with distributions, e.g. `dist` or a mirror root,
+            or a PEP 503 simple index HTML file of a project.
+        project: Use only distributions of this project, all projects if `None`.
+
+    Returns:
+        Sorted unique versions.
+
+    Raises:
+        OSError: If path cannot be read.
+    """
+    distribution_filter = DistributionFilter.from_project(project)
+    if path.is_dir():
+        return distribution_filter.parse_versions(iter_file_names(path))
+
+    text = path.read_text(encoding="utf-8", errors="replace")
+    return distribution_filter.parse_versions(iter_simple_index_file_names(text))
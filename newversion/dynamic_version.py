@@ -0,0 +1,273 @@
+"""
+Static resolution of dynamic package versions without importing any code.
+"""
+
+import ast
+import re
+from collections.abc import Iterator, Sequence
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional, Union
+
+VERSION_FILE_NAMES = ("VERSION", "VERSION.txt", "version.txt")
+
+_module_paths: dict[tuple[tuple[Path, ...], str], Path] = {}
+
+
+@dataclass(frozen=True)
+class DynamicVersion:
+    """
+    Place a dynamic version is read from.
+
+    Attributes:
+        module: Dotted module name, `None` if `path` is set.
+        path: File path relative to the package root, `None` if `module` is set.
+        attribute: Module variable with the version, `None` for a plain text version file.
+    """
+
+    module: Optional[str] = None
+    path: Optional[str] = None
+    attribute: Optional[str] = None
+
+    @classmethod
+    def from_attr(cls, attr: str) -> "DynamicVersion":
+        """
+        Create from a setuptools `attr` directive value, e.g. `pkg.__version__`.
+        """
+        module, _, attribute = attr.rpartition(".")
+        return cls(module=module or None, attribute=attribute)
+
+
+@dataclass(frozen=True)
+class Assignment:
+    """
+    Module-level assignment of a string literal.
+
+    Attributes:
+        line: Line index, starting from 0.
+        offset: Byte offset of the string content, without quotes.
+        value: String content.
+    """
+
+    line: int
+    offset: int
+    value: str
+
+
+@dataclass(frozen=True)
+class ImportReference:
+    """
+    Module-level `from module import name` that defines a variable.
+
+    Attributes:
+        module: Imported module, starts with dots for relative imports.
+        name: Variable name in the imported module.
+    """
+
+    module: str
+    name: str
+
+
+def find_module_path(bases: Sequence[Path], module: str) -> Optional[Path]:
+    """
+    Find module source file without importing it.
+
+    Found paths are cached for the process lifetime and checked with a single `stat` call,
+    so repeated lookups skip the search.
+
+    Arguments:
+        bases: Directories to search in, e.g. package root and `src`.
+        module: Dotted module name.
+
+    Returns:
+        Path to `__init__.py` of a package or to a module file, `None` if not found.
+    """
+    key = (tuple(bases), module)
+    cached = _module_paths.get(key)
+    if cached is not None and cached.is_file():
+        return cached
+
+    parts = module.split(".")
+    for base in bases:
+        module_path = base.joinpath(*parts)
+        for path in (module_path / "__init__.py", module_path.with_name(f"{parts[-1]}.py")):
+            if path.is_file():
+                _module_paths[key] = path
+                return path
+    return None
+
+
+def resolve_import(path: Path, module: str, bases: Sequence[Path]) -> Optional[Path]:
+    """
+    Find source file of a module imported from `path`.
+
+    Arguments:
+        path: Importing module file.
+        module: Imported module, starts with dots for relative imports.
+        bases: Directories to search absolute imports in.
+    """
+    name = module.lstrip(".")
+    level = len(module) - len(name)
+    if not level:
+        return find_module_path(bases, name)
+
+    package_path = path.parent
+    for _ in range(level - 1):
+        package_path = package_path.parent
+    if not name:
+        init_path = package_path / "__init__.py"
+        return init_path if init_path.is_file() else None
+    return find_module_path([package_path], name)
+
+
+def _get_literal_offset(line: bytes, node: ast.Constant) -> Optional[int]:
+    raw = line[node.col_offset : node.end_col_offset or len(line)]
+    prefix_length = len(raw) - len(raw.lstrip(b"rRuU"))
+    raw = raw[prefix_length:]
+    for quote in (b'"""', b"'''", b'"', b"'"):
+        if raw.startswith(quote):
+            content = raw[len(quote) : len(raw) - len(quote)]
+            if content.decode("utf-8", "surrogateescape") != node.value:
+                return None
+            return node.col_offset + prefix_length + len(quote)
+    return None
+
+
+def _iter_statements(data: bytes, name: str) -> Iterator[tuple[int, int, bytes, ast.stmt]]:
+    escaped_name = re.escape(name.encode("utf-8"))
+    pattern = re.compile(
+        rb"^(?:" + escaped_name + rb"\s*[:=]|from\s+[\w.]+\s+import\s.*\b" + escaped_name + rb"\b)",
+        re.MULTILINE,
+    )
+    for match in pattern.finditer(data):
+        start = match.start()
+        end = data.find(b"\n", start)
+        line = data[start:] if end == -1 else data[start:end]
+        try:
+            statements = ast.parse(line.decode("utf-8", "surrogateescape")).body
+        except SyntaxError:
+            continue
+        if statements:
+            yield data.count(b"\n", 0, start), start, line, statements[0]
+
+
+def find_assignment(data: bytes, name: str) -> Union[Assignment, ImportReference, None]:
+    """
+    Find a module-level string assignment with a targeted scan.
+
+    Only lines that start with `name =`, `name: str =` or `from ... import` are parsed,
+    so nothing is imported and large modules are not parsed completely.
+    Assignments of another module-level name, e.g. `__version__ = VERSION`, are followed.
+
+    Arguments:
+        data: Module source.
+        name: Variable name.
+
+    Returns:
+        String assignment, import that defines the name or `None` if not found.
+    """
+    return _find_assignment(data, name, set())
+
+
+def _find_assignment(
+    data: bytes, name: str, seen: set[str]
+) -> Union[Assignment, ImportReference, None]:
+    seen.add(name)
+    for line_index, start, line, statement in _iter_statements(data, name):
+        if isinstance(statement, ast.ImportFrom):
+            for alias in statement.names:
+                if (alias.asname or alias.name) == name:
+                    module = "." * statement.level + (statement.module or "")
+                    return ImportReference(module=module, name=alias.name)
+            continue
+
+        value = statement.value if isinstance(statement, (ast.Assign, ast.AnnAssign)) else None
+        if isinstance(value, ast.Name) and value.id not in seen:
+            return _find_assignment(data, value.id, seen)
+        if not isinstance(value, ast.Constant) or not isinstance(value.value, str):
+            continue
+        offset = _get_literal_offset(line, value)
+        if offset is not None:
+            return Assignment(line=line_index, offset=start + offset, value=value.value)
+    return None
+
+
+def _get_keyword(call: ast.Call, name: str) -> Optional[ast.expr]:
+    for keyword in call.keywords:
+        if keyword.arg == name:
+            return keyword.value
+    return None
+
+
+def _get_dotted_name(node: ast.expr) -> Optional[str]:
+    if isinstance(node, ast.Name):
+        return node.id
+    if isinstance(node, ast.Attribute):
+        parent = _get_dotted_name(node.value)
+        return f"{parent}.{node.attr}" if parent else None
+    return None
+
+
+def _iter_referenced_paths(tree: ast.Module) -> Iterator[str]:
+    for node in ast.walk(tree):
+        parts: list[str] = []
+        if isinstance(node, ast.Call):
+            parts = [
+                arg.value
+                for arg in node.args
+                if isinstance(arg, ast.Constant) and isinstance(arg.value, str)
+            ]
+        elif isinstance(node, ast.Constant) and isinstance(node.value, str):
+            parts = [node.value]
+        if not parts:
+            continue
+        path = "/".join(parts)
+        if path.endswith(".py") or Path(path).name in VERSION_FILE_NAMES:
+            yield path
+
+
+def _find_setup_call(tree: ast.Module) -> Optional[ast.Call]:
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Call) and _get_keyword(node, "version") is not None:
+            return node
+    return None
+
+
+def get_setup_py_versions(data: bytes) -> list[DynamicVersion]:
+    """
+    Find where a `setup.py` with a computed `setup(version=...)` gets the version from.
+
+    Arguments:
+        data: `setup.py` source.
+
+    Returns:
+        Candidate version places in priority order: a module-level variable or module
+        attribute passed as `version`, Python and version files referenced from string
+        literals, and `__version__` of the package named in `setup(name=...)`.
+    """
+    try:
+        tree = ast.parse(data.decode("utf-8", "surrogateescape"))
+    except SyntaxError:
+        return []
+
+    setup_call = _find_setup_call(tree)
+    if setup_call is None:
+        return []
+
+    result: list[DynamicVersion] = []
+    version_node = _get_keyword(setup_call, "version")
+    dotted_name = _get_dotted_name(version_node) if version_node is not None else None
+    if isinstance(version_node, ast.Name):
+        result.append(DynamicVersion(path="setup.py", attribute=version_node.id))
+    elif dotted_name:
+        result.append(DynamicVersion.from_attr(dotted_name))
+
+    for path in _iter_referenced_paths(tree):
+        attribute = "__version__" if path.endswith(".py") else None
+        result.append(DynamicVersion(path=path, attribute=attribute))
+
+    name_node = _get_keyword(setup_call, "name")
+    if isinstance(name_node, ast.Constant) and isinstance(name_node.value, str):
+        module = re.sub(r"[-.]+", "_", name_node.value)
+        result.append(DynamicVersion(module=module, attribute="__version__"))
+    return result
@@ -2,6 +2,8 @@
 Exceptions.
 """
 
+from pathlib import Path
+
 from newversion.constants import Commands, VersionParts
 from newversion.version import Version
 
@@ -11,11 +13,20 @@ class PackageVersionError(Exception):
     Main PackageVersion error.
     """
 
-    def __init__(self) -> None:
-        self.message = "Cannot get Python package version."
+    def __init__(self, message: str = "Cannot get Python package version.") -> None:
+        self.message = message
         super().__init__(self.message)
 
 
+class VersionSourceError(PackageVersionError):
+    """
+    Version sources are misconfigured error.
+    """
+
+    def __init__(self, reason: str) -> None:
+        super().__init__(f"Invalid version sources: {reason}")
+
+
 class ExecutorError(Exception):
     """
     Main CLI commands executor error.
@@ -75,3 +86,83 @@ class ValueMustBeIntError(ExecutorError):
     def __init__(self, release: VersionParts, value: str) -> None:
         self.message = f"Value for {release.value} must be a number, got: {value}"
         super().__init__(self.message)
+
+
+class NoVersionsError(ExecutorError):
+    """
+    No input versions error.
+    """
+
+    def __init__(self, command: Commands) -> None:
+        self.message = f"No input versions for {command.value}"
+        super().__init__(self.message)
+
+
+class NoSeriesVersionsError(ExecutorError):
+    """
+    No input versions in a release series error.
+    """
+
+    def __init__(self, series: str) -> None:
+        self.message = f"No input versions in series {series}"
+        super().__init__(self.message)
+
+
+class DaemonAlreadyRunningError(Exception):
+    """
+    Daemon is already running on a socket error.
+    """
+
+    def __init__(self, socket_path: Path) -> None:
+        self.message = f"Daemon is already running on {socket_path}"
+        super().__init__(self.message)
+
+
+class DaemonSocketError(Exception):
+    """
+    Daemon socket path is not private error.
+    """
+
+    def __init__(self, socket_path: Path, reason: str) -> None:
+        self.message = f"Cannot use daemon socket {socket_path}: {reason}"
+        super().__init__(self.message)
+
+
+class ManifestError(Exception):
+    """
+    Version manifest cannot be parsed error.
+    """
+
+    def __init__(self, reason: str) -> None:
+        self.message = f"Invalid version manifest: {reason}"
+        super().__init__(self.message)
+
+
+class FileEditConflictError(Exception):
+    """
+    Different changes are planned for the same file error.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.message = f"Conflicting version changes planned for {path}"
+        super().__init__(self.message)
+
+
+class FileChangedError(Exception):
+    """
+    File changed on disk while its version was being updated error.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.message = f"{path} changed on disk while its version was being updated"
+        super().__init__(self.message)
+
+
+class GitTagsError(Exception):
+    """
+    Versions cannot be read from git tags error.
+    """
+
+    def __init__(self, reason: str) -> None:
+        self.message = f"Cannot read git tags: {reason}"
+        super().__init__(self.message)
@@ -3,23 +3,37 @@ CLI commands executor.
 """
 
 import operator
+from collections.abc import Callable, Iterable, Iterator
 from pathlib import Path
-from typing import Optional
+from typing import TYPE_CHECKING, Optional
 
 from newversion.constants import Commands, Prerelease, VersionParts
 from newversion.exceptions import (
     ComparisonFailedError,
     ExecutorError,
+    FileEditConflictError,
+    GitTagsError,
+    NoSeriesVersionsError,
+    NoVersionsError,
     PackageVersionError,
     ReleaseCannotBeBumpedError,
     ValueMustBeIntError,
     VersionIsNotStableError,
 )
-from newversion.package_version import PackageVersion
-from newversion.type_defs import OperatorTypeDef
-from newversion.version import Version
+from newversion.package_version import PackageVersion, PackageVersionCache
+from newversion.profiling import instrument_methods
+from newversion.sort_key import SortKeyOverflowError
+from newversion.type_defs import OperatorTypeDef, PrereleaseTypeDef
+from newversion.version import Version, VersionError
 
+if TYPE_CHECKING:
+    from newversion.audit import AuditEntry
+    from newversion.bulk import BulkSetResult
+    from newversion.tree import TreeEntry
+    from newversion.version_index import VersionIndex
 
+
+@instrument_methods("executor", prefix="command_")
 class Executor:
     """
     CLI commands executor.
@@ -29,9 +43,24 @@ class Executor:
         self,
         version: Optional[Version] = None,
         path: Optional[Path] = None,
+        package_cache: Optional[PackageVersionCache] = None,
+        *,
+        fsync: bool = True,
+        in_place: bool = False,
     ) -> None:
         self.path = path or Path.cwd()
         self.version = version if version is not None else Version.zero()
+        self.package_cache = package_cache
+        self.fsync = fsync
+        self.in_place = in_place
+        self._package_version: Optional[PackageVersion] = None
+
+    def _get_package_version(self) -> PackageVersion:
+        if self._package_version is None or self._package_version.path != self.path:
+            self._package_version = PackageVersion(
+                self.path, fsync=self.fsync, in_place=self.in_place
+            )
+        return self._package_version
 
     def command_get(
         self,
@@ -92,42 +121,72 @@ class Executor:
         }[release]
         return str(result)
 
-    def command_bump(self, release: VersionParts, increment: int) -> Version:
+    @staticmethod
+    def get_bump(release: VersionParts, increment: int) -> Callable[[Version], Version]:
         """
-        Bump release.
+        Get a function that bumps release of a version.
 
         Arguments:
             release: Release name
             increment: Number to increase by
 
         Returns:
-            A new Version.
+            Function that takes a Version and returns a new one.
+
+        Raises:
+            ExecutorError: If release cannot be bumped.
         """
         if release in (
             VersionParts.MAJOR,
             VersionParts.MINOR,
             VersionParts.MICRO,
         ):
-            return self.version.bump_release(release.value, increment)
+            return lambda version: version.bump_release(release.value, increment)
 
         if release == VersionParts.PRE:
-            return self.version.bump_prerelease(increment)
+            return lambda version: version.bump_prerelease(increment)
 
         if release == VersionParts.POST:
-            return self.version.bump_postrelease(increment)
+            return lambda version: version.bump_postrelease(increment)
 
         if release in (
             VersionParts.RC,
             VersionParts.ALPHA,
             VersionParts.BETA,
         ):
-            return self.version.bump_prerelease(increment, release.value)
+            return lambda version: version.bump_prerelease(increment, release.value)
 
         if release == VersionParts.DEV:
-            return self.version.bump_dev(increment)
+            return lambda version: version.bump_dev(increment)
 
         raise ReleaseCannotBeBumpedError(release)
 
+    def command_bump(
+        self, release: VersionParts, increment: int, taken: Optional["VersionIndex"] = None
+    ) -> Version:
+        """
+        Bump release.
+
+        Arguments:
+            release: Release name
+            increment: Number to increase by
+            taken: Versions that already exist, bump is repeated until the result is not taken.
+
+        Returns:
+            A new Version.
+
+        Raises:
+            ExecutorError: If release cannot be bumped.
+        """
+        bump = self.get_bump(release, increment)
+        if taken is None:
+            return bump(self.version)
+
+        try:
+            return taken.bump(self.version, bump)
+        except ValueError as e:
+            raise ExecutorError(e) from None
+
     def command_set(self, release: VersionParts, value: str) -> Version:
         """
         Set version part.
@@ -227,10 +286,104 @@ class Executor:
             ExecutorError: If there is an error retrieving the package version.
         """
         try:
-            return PackageVersion(self.path).get()
+            if self.package_cache is not None:
+                return self.package_cache.get(self.path)
+            return self._get_package_version().get()
         except PackageVersionError as e:
             raise ExecutorError(e) from None
 
+    def command_get_git_tag_version(
+        self,
+        *,
+        prefix: str = "",
+        pattern: Optional[str] = None,
+        stable_only: bool = False,
+        cache_dir: Optional[Path] = None,
+    ) -> Version:
+        """
+        Get the latest version from git tags of the repository containing `path`.
+
+        Arguments:
+            prefix: Use only tags that start with prefix, e.g. `pkg-`.
+            pattern: Regular expression with a version group, overrides `prefix`.
+            stable_only: Skip pre- and dev releases.
+            cache_dir: Directory to keep parsed tag index in between calls.
+
+        Returns:
+            The greatest tag version.
+
+        Raises:
+            ExecutorError: If tags cannot be read or no tag matches.
+        """
+        from newversion.git_tags import GitTagReader, TagPattern  # noqa: PLC0415
+
+        try:
+            tag_pattern = (
+                TagPattern.from_regex(pattern) if pattern else TagPattern.from_prefix(prefix)
+            )
+            reader = GitTagReader(self.path, tag_pattern, cache_dir=cache_dir)
+            return reader.get_latest(stable_only=stable_only)
+        except (GitTagsError, OSError) as e:
+            raise ExecutorError(e) from None
+
+    def command_get_git_tag_versions(
+        self,
+        *,
+        prefix: str = "",
+        pattern: Optional[str] = None,
+        stable_only: bool = False,
+        cache_dir: Optional[Path] = None,
+    ) -> list[Version]:
+        """
+        Get all versions from git tags of the repository containing `path`.
+
+        Arguments:
+            prefix: Use only tags that start with prefix, e.g. `pkg-`.
+            pattern: Regular expression with a version group, overrides `prefix`.
+            stable_only: Skip pre- and dev releases.
+            cache_dir: Directory to keep parsed tag index in between calls.
+
+        Returns:
+            Sorted unique tag versions.
+
+        Raises:
+            ExecutorError: If tags cannot be read.
+        """
+        from newversion.git_tags import GitTagReader, TagPattern  # noqa: PLC0415
+
+        try:
+            tag_pattern = (
+                TagPattern.from_regex(pattern) if pattern else TagPattern.from_prefix(prefix)
+            )
+            versions = GitTagReader(self.path, tag_pattern, cache_dir=cache_dir).read()
+        except (GitTagsError, OSError) as e:
+            raise ExecutorError(e) from None
+        return list(self._filter_stable(versions, stable_only))
+
+    @staticmethod
+    def command_get_distribution_versions(
+        source: Path, *, project: Optional[str] = None
+    ) -> list[Version]:
+        """
+        Get versions of wheels and sdists from file names, without opening distributions.
+
+        Arguments:
+            source: Directory tree with distributions or a PEP 503 simple index HTML file.
+            project: Use only distributions of this project, name is normalized.
+
+        Returns:
+            Sorted unique versions.
+
+        Raises:
+            ExecutorError: If source cannot be read.
+        """
+        from newversion.distributions import read_distribution_versions  # noqa: PLC0415
+
+        try:
+            return read_distribution_versions(source, project)
+        except OSError as e:
+            raise ExecutorError(e) from None
+
     def command_set_version(self, version: Version) -> None:
         """
         Set the package version.
@@ -243,6 +396,283 @@ class Executor:
             ExecutorError: If there is an error setting the package version.
         """
         try:
-            PackageVersion(self.path).set(version)
+            self._get_package_version().set(version)
         except PackageVersionError as e:
             raise ExecutorError(e) from None
+
+    def command_get_tree_versions(
+        self, *, jobs: int = 0, exclude: Iterable[str] = ()
+    ) -> list["TreeEntry"]:
+        """
+        Find all Python packages under `path` and read their versions with a thread pool.
+
+        Arguments:
+            jobs: Number of threads, `0` to pick automatically.
+            exclude: Extra directory names to skip.
+
+        Returns:
+            Entries sorted by package path.
+        """
+        from newversion.tree import TreeReader  # noqa: PLC0415
+
+        reader = TreeReader(jobs=jobs, exclude=exclude)
+        return reader.read(self.path)
+
+    def command_audit(
+        self, *, tree: bool = False, jobs: int = 0, exclude: Iterable[str] = ()
+    ) -> list["AuditEntry"]:
+        """
+        Read version from every source of the package at `path` and report mismatches.
+
+        Arguments:
+            tree: Audit all Python packages under `path` instead, with a thread pool.
+            jobs: Number of threads, `0` to pick automatically.
+            exclude: Extra directory names to skip in a tree.
+
+        Returns:
+            Entries sorted by package path.
+        """
+        from newversion.audit import Auditor  # noqa: PLC0415
+
+        auditor = Auditor(jobs=jobs, exclude=exclude)
+        if tree:
+            return auditor.audit_tree(self.path)
+        return auditor.audit([self.path])
+
+    @staticmethod
+    def command_set_versions(
+        manifest: dict[Path, Version],
+        *,
+        jobs: int = 0,
+        fsync: bool = True,
+        in_place: bool = False,
+    ) -> "BulkSetResult":
+        """
+        Set versions of many packages, planning all file edits before writing any of them.
+
+        Arguments:
+            manifest: Package roots with new versions.
+            jobs: Number of threads, `0` to pick automatically.
+            fsync: Flush written files to disk.
+            in_place: Patch version bytes in existing files instead of replacing them.
+
+        Returns:
+            Applied changes with timings.
+
+        Raises:
+            ExecutorError: If different changes are planned for the same file.
+            ManifestError: If a package has no version to update.
+        """
+        from newversion.bulk import BulkSetter  # noqa: PLC0415
+
+        try:
+            return BulkSetter(jobs=jobs, fsync=fsync, in_place=in_place).run(manifest)
+        except FileEditConflictError as e:
+            raise ExecutorError(e) from None
+
+    @staticmethod
+    def _filter_stable(versions: Iterable[Version], stable_only: bool) -> Iterable[Version]:
+        if not stable_only:
+            return versions
+        return (version for version in versions if version.is_stable)
+
+    def command_sort(
+        self,
+        versions: Iterable[Version],
+        *,
+        reverse: bool = False,
+        stable_only: bool = False,
+    ) -> list[Version]:
+        """
+        Sort versions in PEP 440 order.
+
+        Sort key is computed once per version, equal versions keep input order.
+
+        Arguments:
+            versions: Versions to sort.
+            reverse: Sort in descending order.
+            stable_only: Skip pre- and dev releases.
+
+        Returns:
+            Sorted versions.
+        """
+        return sorted(
+            self._filter_stable(versions, stable_only),
+            key=operator.attrgetter("sort_key"),
+            reverse=reverse,
+        )
+
+    def command_sort_external(
+        self,
+        versions: Iterable[Version],
+        *,
+        reverse: bool = False,
+        stable_only: bool = False,
+        memory_budget: Optional[int] = None,
+        temp_dir: Optional[Path] = None,
+    ) -> Iterator[str]:
+        """
+        Sort versions in PEP 440 order with bounded memory using temporary files.
+
+        Arguments:
+            versions: Versions to sort.
+            reverse: Sort in descending order.
+            stable_only: Skip pre- and dev releases.
+            memory_budget: Approximate memory budget in bytes, 256 MiB by default.
+            temp_dir: Directory for temporary files.
+
+        Returns:
+            Iterator of sorted normalized version strings.
+
+        Raises:
+            ExecutorError: If a version cannot be encoded into a sort key.
+        """
+        from newversion.external_sort import ExternalSorter  # noqa: PLC0415
+
+        sorter = ExternalSorter(
+            memory_budget=memory_budget or ExternalSorter.DEFAULT_MEMORY_BUDGET,
+            temp_dir=temp_dir,
+        )
+        try:
+            yield from sorter.sort(self._filter_stable(versions, stable_only), reverse=reverse)
+        except SortKeyOverflowError as e:
+            raise ExecutorError(e) from None
+
+    def command_max(self, versions: Iterable[Version], *, stable_only: bool = False) -> Version:
+        """
+        Get the greatest version in a single pass.
+
+        Arguments:
+            versions: Versions to check.
+            stable_only: Skip pre- and dev releases.
+
+        Returns:
+            The first greatest version.
+
+        Raises:
+            ExecutorError: If there are no versions.
+        """
+        result = max(
+            self._filter_stable(versions, stable_only),
+            key=operator.attrgetter("sort_key"),
+            default=None,
+        )
+        if result is None:
+            raise NoVersionsError(Commands.MAX)
+        return result
+
+    def command_min(self, versions: Iterable[Version], *, stable_only: bool = False) -> Version:
+        """
+        Get the least version in a single pass.
+
+        Arguments:
+            versions: Versions to check.
+            stable_only: Skip pre- and dev releases.
+
+        Returns:
+            The first least version.
+
+        Raises:
+            ExecutorError: If there are no versions.
+        """
+        result = min(
+            self._filter_stable(versions, stable_only),
+            key=operator.attrgetter("sort_key"),
+            default=None,
+        )
+        if result is None:
+            raise NoVersionsError(Commands.MIN)
+        return result
+
+    def command_unique(
+        self,
+        versions: Iterable[Version],
+        *,
+        stable_only: bool = False,
+    ) -> Iterator[Version]:
+        """
+        Lazily drop duplicate versions by normalized form, keeping input order.
+
+        Arguments:
+            versions: Versions to deduplicate.
+            stable_only: Skip pre- and dev releases.
+
+        Yields:
+            The first occurrence of every normalized version.
+        """
+        seen: set[str] = set()
+        for version in self._filter_stable(versions, stable_only):
+            normalized = version.dumps()
+            if normalized in seen:
+                continue
+            seen.add(normalized)
+            yield version
+
+    @staticmethod
+    def command_latest(
+        versions: Iterable[Version],
+        *,
+        series: Optional[str] = None,
+        prerelease: Optional[PrereleaseTypeDef] = None,
+        stable_only: bool = False,
+    ) -> Version:
+        """
+        Get the greatest version of a release series.
+
+        Versions are indexed by release line once, the series is found with a binary search.
+
+        Arguments:
+            versions: Versions to check.
+            series: Release prefix, e.g. `1.4` for `1.4.*`, all versions if `None`.
+            prerelease: Only pre-releases of this type with release equal to `series`.
+            stable_only: Skip pre- and dev releases.
+
+        Returns:
+            The greatest matching version.
+
+        Raises:
+            ExecutorError: If series is invalid or has no versions.
+        """
+        from newversion.version_index import VersionIndex  # noqa: PLC0415
+
+        index = VersionIndex(versions)
+        try:
+            result = index.latest(series, prerelease=prerelease, stable_only=stable_only)
+        except (VersionError, ValueError) as e:
+            raise ExecutorError(e) from None
+        if result is None and series is not None:
+            raise NoSeriesVersionsError(series)
+        if result is None:
+            raise NoVersionsError(Commands.LATEST)
+        return result
+
+    def command_next_free(
+        self,
+        versions: Iterable[Version],
+        release: VersionParts,
+        increment: int,
+        *,
+        series: Optional[str] = None,
+    ) -> Version:
+        """
+        Bump the latest version of a release series to the first version that is not taken.
+
+        Arguments:
+            versions: Taken versions.
+            release: Release name
+            increment: Number to increase by
+            series: Release prefix, e.g. `1.4` for `1.4.*`, all versions if `None`.
+
+        Returns:
+            A new Version.
+
+        Raises:
+            ExecutorError: If series is invalid or release cannot be bumped.
+        """
+        from newversion.version_index import VersionIndex  # noqa: PLC0415
+
+        bump = self.get_bump(release, increment)
+        try:
+            return VersionIndex(versions).next_free(bump, series)
+        except (VersionError, ValueError) as e:
+            raise ExecutorError(e) from None
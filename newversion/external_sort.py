@@ -0,0 +1,158 @@
+"""
+External merge sort for version lists larger than memory.
+"""
+
+import heapq
+import operator
+import struct
+import tempfile
+from collections.abc import Iterable, Iterator
+from contextlib import ExitStack
+from pathlib import Path
+from typing import BinaryIO, Optional
+
+from newversion.sort_key import SortKeyEncoder
+from newversion.version import Version
+
+SortRecordTypeDef = tuple[bytes, str]
+
+
+class ExternalSorter:
+    """
+    Sort versions with a bounded memory budget.
+
+    Every version is encoded into a byte-comparable key with `SortKeyEncoder`
+    and only `(key, normalized version)` records are kept in memory.
+    When the budget is exceeded, records are sorted and written to a temporary run file.
+    Run files are k-way merged, in several passes if there are more than `max_fan_in` of them.
+    Equal versions keep input order.
+
+    Arguments:
+        memory_budget: Approximate memory budget for in-memory records in bytes.
+        temp_dir: Directory for run files, system default if not set.
+        encoder: Sort key encoder.
+        max_fan_in: Maximum number of run files merged at once.
+    """
+
+    DEFAULT_MEMORY_BUDGET = 256 * 1024 * 1024
+    DEFAULT_MAX_FAN_IN = 64
+    # approximate size of a record tuple, key bytes and str objects without payload
+    RECORD_OVERHEAD = 200
+
+    _HEADER = struct.Struct(">HH")
+
+    def __init__(
+        self,
+        memory_budget: int = DEFAULT_MEMORY_BUDGET,
+        temp_dir: Optional[Path] = None,
+        encoder: Optional[SortKeyEncoder] = None,
+        max_fan_in: int = DEFAULT_MAX_FAN_IN,
+    ) -> None:
+        self.memory_budget = memory_budget
+        self.temp_dir = temp_dir
+        self.encoder = encoder or SortKeyEncoder()
+        self.max_fan_in = max(max_fan_in, 2)
+        self.run_count = 0
+
+    def _iter_runs(
+        self, records: Iterable[SortRecordTypeDef], reverse: bool
+    ) -> Iterator[tuple[list[SortRecordTypeDef], bool]]:
+        """
+        Split records into sorted runs that fit into memory budget.
+
+        Yields:
+            Sorted run and whether it is the last one.
+        """
+        run: list[SortRecordTypeDef] = []
+        run_size = 0
+        for record in records:
+            if run_size >= self.memory_budget:
+                run.sort(key=operator.itemgetter(0), reverse=reverse)
+                yield run, False
+                run = []
+                run_size = 0
+            run.append(record)
+            run_size += len(record[0]) + len(record[1]) + self.RECORD_OVERHEAD
+
+        run.sort(key=operator.itemgetter(0), reverse=reverse)
+        yield run, True
+
+    def _write_run(self, records: Iterable[SortRecordTypeDef], temp_dir: Path) -> Path:
+        self.run_count += 1
+        path = temp_dir / f"run_{self.run_count:08d}.bin"
+        with path.open("wb", buffering=1024 * 1024) as f:
+            for key, text in records:
+                text_bytes = text.encode()
+                f.write(self._HEADER.pack(len(key), len(text_bytes)))
+                f.write(key)
+                f.write(text_bytes)
+        return path
+
+    def _read_run(self, f: BinaryIO) -> Iterator[SortRecordTypeDef]:
+        header_size = self._HEADER.size
+        while True:
+            header = f.read(header_size)
+            if not header:
+                return
+            key_size, text_size = self._HEADER.unpack(header)
+            key = f.read(key_size)
+            yield key, f.read(text_size).decode()
+
+    def _merge(self, paths: list[Path], reverse: bool) -> Iterator[SortRecordTypeDef]:
+        with ExitStack() as stack:
+            runs = [
+                self._read_run(stack.enter_context(path.open("rb", buffering=256 * 1024)))
+                for path in paths
+            ]
+            yield from heapq.merge(*runs, key=operator.itemgetter(0), reverse=reverse)
+
+    def sort_records(
+        self, records: Iterable[SortRecordTypeDef], *, reverse: bool = False
+    ) -> Iterator[SortRecordTypeDef]:
+        """
+        Sort `(key, text)` records by key.
+
+        Arguments:
+            records: Records to sort.
+            reverse: Sort in descending order.
+
+        Yields:
+            Sorted records.
+        """
+        runs = self._iter_runs(records, reverse)
+        first_run, is_last = next(runs)
+        if is_last:
+            yield from first_run
+            return
+
+        with tempfile.TemporaryDirectory(dir=self.temp_dir, prefix="newversion-") as temp:
+            temp_dir = Path(temp)
+            paths = [self._write_run(first_run, temp_dir)]
+            del first_run
+            paths.extend(self._write_run(run, temp_dir) for run, _is_last in runs)
+
+            while len(paths) > self.max_fan_in:
+                merged_paths: list[Path] = []
+                for start in range(0, len(paths), self.max_fan_in):
+                    group = paths[start : start + self.max_fan_in]
+                    merged_paths.append(self._write_run(self._merge(group, reverse), temp_dir))
+                    for path in group:
+                        path.unlink()
+                paths = merged_paths
+
+            yield from self._merge(paths, reverse)
+
+    def sort(self, versions: Iterable[Version], *, reverse: bool = False) -> Iterator[str]:
+        """
+        Sort versions in PEP 440 order.
+
+        Arguments:
+            versions: Versions to sort.
+            reverse: Sort in descending order.
+
+        Returns:
+            Iterator of sorted normalized version strings.
+        """
+        records = ((self.encoder.encode(version), version.dumps()) for version in versions)
+        sorted_records = self.sort_records(records, reverse=reverse)
+        return map(operator.itemgetter(1), sorted_records)
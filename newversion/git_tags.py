@@ -0,0 +1,388 @@
+"""
+Read versions from git tags without running git.
+"""
+
+import hashlib
+import json
+import operator
+import os
+import re
+import threading
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, ClassVar, Final, Optional
+
+from newversion.exceptions import GitTagsError
+from newversion.file_edit import AtomicWriter, FileEdit
+from newversion.version import Version, VersionError
+
+TAGS_REF_PREFIX: Final = b"refs/tags/"
+CACHE_FORMAT_VERSION: Final = 1
+
+SORT_KEY: Final = operator.attrgetter("sort_key")
+
+PackedSignatureTypeDef = Optional[tuple[int, int, int]]
+
+
+def find_git_dir(path: Path) -> Optional[Path]:
+    """
+    Find the git directory that holds refs of the repository containing `path`.
+
+    Worktrees and submodules with a `.git` file are supported, for a worktree
+    the common repository directory is returned, as tags are shared.
+
+    Arguments:
+        path: Any path inside a work tree.
+
+    Returns:
+        Git directory, `None` if `path` is not inside a repository.
+    """
+    for parent in (path, *path.parents):
+        git_path = parent / ".git"
+        if git_path.is_dir():
+            return git_path
+        if not git_path.is_file():
+            continue
+        text = git_path.read_text(encoding="utf-8", errors="replace").strip()
+        if not text.startswith("gitdir:"):
+            return None
+        git_dir = parent / text[len("gitdir:") :].strip()
+        common_dir_path = git_dir / "commondir"
+        if common_dir_path.is_file():
+            return git_dir / common_dir_path.read_text(encoding="utf-8").strip()
+        return git_dir
+    return None
+
+
+def iter_packed_tags(data: bytes) -> Iterator[str]:
+    """
+    Get tag names from `packed-refs` content.
+
+    Peeled lines of annotated tags and refs other than tags are skipped.
+    """
+    for line in data.splitlines():
+        _, _, ref = line.partition(b" ")
+        if ref.startswith(TAGS_REF_PREFIX):
+            yield ref[len(TAGS_REF_PREFIX) :].decode("utf-8", "surrogateescape")
+
+
+def iter_loose_tags(tags_path: Path) -> Iterator[str]:
+    """
+    Get names of loose tags under `refs/tags`, including names with slashes.
+    """
+    stack = [(tags_path, "")]
+    while stack:
+        path, prefix = stack.pop()
+        try:
+            entries = list(os.scandir(path))
+        except (FileNotFoundError, NotADirectoryError):
+            continue
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                stack.append((Path(entry.path), f"{prefix}{entry.name}/"))
+            elif not entry.name.endswith(".lock"):
+                yield f"{prefix}{entry.name}"
+
+
+@dataclass(frozen=True)
+class TagPattern:
+    """
+    Rule to get a version from a tag name.
+
+    Attributes:
+        regex: Pattern that must match the whole tag name, version is
+            in `version` named group or in the first group.
+    """
+
+    regex: re.Pattern[str]
+
+    @classmethod
+    def from_prefix(cls, prefix: str = "") -> "TagPattern":
+        """
+        Create a pattern for `<prefix><version>` tags, e.g. `v1.2.3` or `pkg-1.2.3`.
+
+        Tags that do not start with the prefix and a digit, optionally after `v`,
+        are rejected before a version is parsed.
+        """
+        return cls(re.compile(rf"{re.escape(prefix)}((?:[vV])?\d.*)", re.DOTALL))
+
+    @classmethod
+    def from_regex(cls, pattern: str) -> "TagPattern":
+        """
+        Create a pattern from a regular expression with `version` named group or one group.
+
+        Raises:
+            GitTagsError: If pattern is invalid or has no groups.
+        """
+        try:
+            regex = re.compile(pattern)
+        except re.error as e:
+            message = f"invalid tag pattern {pattern!r}: {e}"
+            raise GitTagsError(message) from None
+        if not regex.groups:
+            message = f"tag pattern {pattern!r} has no version group"
+            raise GitTagsError(message)
+        return cls(regex)
+
+    @property
+    def key(self) -> str:
+        """
+        Pattern identifier for caches.
+        """
+        return self.regex.pattern
+
+    def get_version_string(self, tag: str) -> Optional[str]:
+        """
+        Get version part of a tag name, `None` if tag does not match.
+        """
+        match = self.regex.fullmatch(tag)
+        if match is None:
+            return None
+        if "version" in self.regex.groupindex:
+            return match.group("version")
+        return match.group(1)
+
+    def parse_tags(self, tags: Iterable[str]) -> dict[Version, str]:
+        """
+        Parse versions of all matching tags, invalid versions are skipped.
+
+        Returns:
+            Unique versions with their version strings.
+        """
+        result: dict[Version, str] = {}
+        for tag in tags:
+            version_string = self.get_version_string(tag)
+            if version_string is None:
+                continue
+            try:
+                version = Version(version_string)
+            except VersionError:
+                continue
+            result.setdefault(version, version_string)
+        return result
+
+    def parse_versions(self, tags: Iterable[str]) -> list[Version]:
+        """
+        Parse versions of all matching tags, invalid versions are skipped.
+
+        Returns:
+            Sorted unique versions.
+        """
+        return sorted(self.parse_tags(tags), key=SORT_KEY)
+
+
+@dataclass
+class GitTagIndex:
+    """
+    Parsed versions of packed tags for a single tag pattern.
+
+    Attributes:
+        signature: `(mtime_ns, size, inode)` of `packed-refs`, `None` if it does not exist.
+        version_strings: Sorted unique version strings.
+        latest: Greatest version string.
+        latest_stable: Greatest stable version string.
+    """
+
+    signature: PackedSignatureTypeDef
+    version_strings: list[str]
+    latest: Optional[str] = None
+    latest_stable: Optional[str] = None
+    _versions: Optional[list[Version]] = field(default=None, repr=False, compare=False)
+
+    @classmethod
+    def from_tags(
+        cls, signature: PackedSignatureTypeDef, pattern: TagPattern, tags: Iterable[str]
+    ) -> "GitTagIndex":
+        """
+        Parse versions of tags that match `pattern`.
+
+        Versions are sorted by a precomputed key and version strings are kept
+        as they are in tag names, so nothing is compared pairwise or rendered.
+        """
+        version_strings = pattern.parse_tags(tags)
+        versions = sorted(version_strings, key=SORT_KEY)
+        stable_versions = [i for i in versions if i.is_stable]
+        return cls(
+            signature=signature,
+            version_strings=[version_strings[i] for i in versions],
+            latest=version_strings[versions[-1]] if versions else None,
+            latest_stable=version_strings[stable_versions[-1]] if stable_versions else None,
+            _versions=versions,
+        )
+
+    @property
+    def versions(self) -> list[Version]:
+        """
+        Sorted unique versions, parsed on first access.
+        """
+        if self._versions is None:
+            self._versions = [Version(i) for i in self.version_strings]
+        return self._versions
+
+    def to_dict(self) -> dict[str, Any]:
+        """
+        Serialize to a JSON-compatible dict.
+        """
+        return {
+            "format": CACHE_FORMAT_VERSION,
+            "signature": self.signature,
+            "versions": self.version_strings,
+            "latest": self.latest,
+            "latest_stable": self.latest_stable,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "GitTagIndex":
+        """
+        Deserialize from a dict created by `to_dict`.
+
+        Raises:
+            ValueError: If data has unknown format.
+        """
+        if data.get("format") != CACHE_FORMAT_VERSION:
+            message = "unknown cache format"
+            raise ValueError(message)
+        signature = data["signature"]
+        return cls(
+            signature=tuple(signature) if signature is not None else None,
+            version_strings=list(data["versions"]),
+            latest=data["latest"],
+            latest_stable=data["latest_stable"],
+        )
+
+
+class GitTagReader:
+    """
+    Read versions from `packed-refs` and loose `refs/tags` of a git repository.
+
+    Versions of packed tags are parsed once per `packed-refs` change: the index is kept
+    in memory for the process lifetime and, if `cache_dir` is set, on disk between calls.
+    Loose tags are listed on every call, they are usually few until the next `git gc`.
+
+    Arguments:
+        path: Any path inside a work tree.
+        pattern: Rule to get a version from a tag name, all tags that are versions by default.
+        cache_dir: Directory to keep parsed tag indexes in, `None` to cache in memory only.
+    """
+
+    _indexes: ClassVar[dict[tuple[Path, str], GitTagIndex]] = {}
+    _lock: ClassVar[threading.Lock] = threading.Lock()
+
+    def __init__(
+        self,
+        path: Path,
+        pattern: Optional[TagPattern] = None,
+        *,
+        cache_dir: Optional[Path] = None,
+    ) -> None:
+        git_dir = find_git_dir(path.absolute())
+        if git_dir is None:
+            message = f"{path} is not inside a git repository"
+            raise GitTagsError(message)
+        self.git_dir = git_dir.resolve()
+        self.pattern = pattern or TagPattern.from_prefix()
+        self.cache_dir = cache_dir
+
+    def _get_cache_path(self) -> Optional[Path]:
+        if self.cache_dir is None:
+            return None
+        key = f"{self.git_dir.as_posix()}\n{self.pattern.key}".encode()
+        return self.cache_dir / f"git-tags-{hashlib.sha256(key).hexdigest()[:16]}.json"
+
+    def _load_cached(self, signature: PackedSignatureTypeDef) -> Optional[GitTagIndex]:
+        key = (self.git_dir, self.pattern.key)
+        with self._lock:
+            index = self._indexes.get(key)
+        if index is not None and index.signature == signature:
+            return index
+
+        cache_path = self._get_cache_path()
+        if cache_path is None:
+            return None
+        try:
+            index = GitTagIndex.from_dict(json.loads(cache_path.read_bytes()))
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+        if index.signature != signature:
+            return None
+        with self._lock:
+            self._indexes[key] = index
+        return index
+
+    def _save(self, index: GitTagIndex) -> None:
+        with self._lock:
+            self._indexes[self.git_dir, self.pattern.key] = index
+        cache_path = self._get_cache_path()
+        if cache_path is None:
+            return
+        try:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            text = json.dumps(index.to_dict())
+            AtomicWriter(fsync=False).write([FileEdit.from_text(cache_path, text)])
+        except OSError:
+            return
+
+    def get_packed_index(self) -> GitTagIndex:
+        """
+        Get parsed versions of packed tags, reading `packed-refs` only if it changed.
+        """
+        packed_refs_path = self.git_dir / "packed-refs"
+        try:
+            stat = packed_refs_path.stat()
+        except FileNotFoundError:
+            signature = None
+        else:
+            signature = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+        index = self._load_cached(signature)
+        if index is not None:
+            return index
+
+        data = packed_refs_path.read_bytes() if signature is not None else b""
+        index = GitTagIndex.from_tags(signature, self.pattern, iter_packed_tags(data))
+        self._save(index)
+        return index
+
+    def get_loose_versions(self) -> list[Version]:
+        """
+        Get sorted unique versions of loose tags.
+        """
+        return self.pattern.parse_versions(iter_loose_tags(self.git_dir / "refs" / "tags"))
+
+    def read(self) -> list[Version]:
+        """
+        Get versions of all matching tags.
+
+        Returns:
+            Sorted unique versions.
+        """
+        loose_versions = self.get_loose_versions()
+        packed_versions = self.get_packed_index().versions
+        if not loose_versions:
+            return packed_versions
+        return sorted({*packed_versions, *loose_versions}, key=SORT_KEY)
+
+    def get_latest(self, *, stable_only: bool = False) -> Version:
+        """
+        Get the greatest version of all matching tags.
+
+        Only the greatest packed version is parsed if the index is cached.
+
+        Arguments:
+            stable_only: Skip pre- and dev releases.
+
+        Raises:
+            GitTagsError: If no tag matches.
+        """
+        index = self.get_packed_index()
+        latest = index.latest_stable if stable_only else index.latest
+        candidates = [Version.parse(latest)] if latest is not None else []
+        candidates.extend(
+            version for version in self.get_loose_versions() if version.is_stable or not stable_only
+        )
+        if not candidates:
+            kind = "stable versions" if stable_only else "versions"
+            message = f"no tags with {kind} matching {self.pattern.key!r}"
+            raise GitTagsError(message)
+        return max(candidates, key=SORT_KEY)
@@ -2,10 +2,25 @@
 Set up logging for CLI usage.
 """
 
+import contextlib
+import contextvars
 import logging
+from collections.abc import Generator
+from typing import Optional, TextIO
 
 from newversion.constants import LOGGER_NAME
 
+# scope of the innermost `log_to_stream` call, worker threads get it with `bind_context`
+_STREAM_SCOPE: contextvars.ContextVar[Optional[object]] = contextvars.ContextVar(
+    "newversion_log_stream_scope", default=None
+)
+
+
+def _get_formatter() -> logging.Formatter:
+    return logging.Formatter(
+        "%(asctime)s %(name)s: %(levelname)-7s %(message)s", datefmt="%H:%M:%S"
+    )
+
 
 def setup_logging(level: int) -> logging.Logger:
     """
@@ -13,11 +28,42 @@ def setup_logging(level: int) -> logging.Logger:
     """
     logger = logging.getLogger(LOGGER_NAME)
     logger.setLevel(level)
-    formatter = logging.Formatter(
-        "%(asctime)s %(name)s: %(levelname)-7s %(message)s", datefmt="%H:%M:%S"
-    )
     stream_handler = logging.StreamHandler()
     stream_handler.setLevel(level)
-    stream_handler.setFormatter(formatter)
+    stream_handler.setFormatter(_get_formatter())
     logger.addHandler(stream_handler)
     return logger
+
+
+@contextlib.contextmanager
+def log_to_stream(
+    level: int, stream: Optional[TextIO] = None
+) -> Generator[logging.Logger, None, None]:
+    """
+    Temporarily send log records of the current context to a stream.
+
+    Safe to use from concurrent threads, every call gets only its own records,
+    including records of worker threads started with `newversion.utils.bind_context`.
+
+    Arguments:
+        level: Logging level.
+        stream: Output stream, stderr by default.
+
+    Yields:
+        Package logger.
+    """
+    logger = logging.getLogger(LOGGER_NAME)
+    if logger.level == logging.NOTSET or logger.level > level:
+        logger.setLevel(level)
+    scope = object()
+    stream_handler = logging.StreamHandler(stream)
+    stream_handler.setLevel(level)
+    stream_handler.setFormatter(_get_formatter())
+    stream_handler.addFilter(lambda _record: _STREAM_SCOPE.get() is scope)
+    logger.addHandler(stream_handler)
+    token = _STREAM_SCOPE.set(scope)
+    try:
+        yield logger
+    finally:
+        _STREAM_SCOPE.reset(token)
+        logger.removeHandler(stream_handler)
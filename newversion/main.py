@@ -2,17 +2,59 @@
 Main entrypoint.
 """
 
+import contextlib
+import functools
+import json
+import logging
+import os
 import sys
+import time
+from collections.abc import Iterable, Sequence
+from pathlib import Path
+from typing import TYPE_CHECKING, Optional, TextIO
 
+from newversion.batch import BatchRunner
 from newversion.cli_parser import CLINamespace, parse_args
-from newversion.constants import Commands
-from newversion.exceptions import CLIError, ExecutorError
+from newversion.constants import (
+    DAEMON_ENV_NAME,
+    LOGGER_NAME,
+    MULTI_VERSION_COMMANDS,
+    PROFILE_ENV_NAME,
+    Commands,
+    InvalidLinePolicy,
+    OutputFormat,
+)
+from newversion.exceptions import (
+    CLIError,
+    ComparisonFailedError,
+    ExecutorError,
+    ManifestError,
+    VersionIsNotStableError,
+)
 from newversion.executor import Executor
-from newversion.logger import setup_logging
+from newversion.logger import log_to_stream
+from newversion.package_version import PackageVersionCache
+from newversion.profiling import IMPORT_STARTED, Profiler, ProfileReport
+from newversion.utils import get_cache_dir, print_path
 from newversion.version import Version
 
+if TYPE_CHECKING:
+    from newversion.version_index import VersionIndex
 
-def _run_main_api(executor: Executor, config: CLINamespace) -> str:
+CHECK_COMMANDS = (
+    Commands.LT,
+    Commands.LTE,
+    Commands.GT,
+    Commands.GTE,
+    Commands.EQ,
+    Commands.NE,
+    Commands.IS_STABLE,
+)
+
+
+def _run_main_api(
+    executor: Executor, config: CLINamespace, taken: Optional["VersionIndex"] = None
+) -> str:
     if config.command in (
         Commands.LT,
         Commands.LTE,
@@ -36,25 +78,88 @@ def _run_main_api(executor: Executor, config: CLINamespace) -> str:
     if config.command == Commands.GET:
         return executor.command_get(config.release)
     if config.command == Commands.BUMP:
-        return executor.command_bump(config.release, config.increment).dumps()
+        return executor.command_bump(config.release, config.increment, taken).dumps()
     if config.command == Commands.STABLE:
         return executor.command_stable().dumps()
 
     return executor.version.dumps()
 
 
-def main_api(config: CLINamespace) -> str:
+def get_taken_index(config: CLINamespace, stdin: Optional[TextIO]) -> Optional["VersionIndex"]:
+    """
+    Read existing versions from `config.taken` once for collision-aware bumps.
+
+    Arguments:
+        config: Parsed CLI arguments.
+        stdin: Stream to read versions from if source is `-`.
+
+    Returns:
+        Index of taken versions, `None` if source is not set.
+
+    Raises:
+        CLIError: If source cannot be read.
+    """
+    if config.taken is None:
+        return None
+
+    from newversion.version_index import VersionIndex  # noqa: PLC0415
+
+    runner = BatchRunner(on_invalid=InvalidLinePolicy.SKIP)
+    if config.taken == "-":
+        return VersionIndex(runner.iter_versions(stdin or sys.stdin))
+
+    from newversion.distributions import (  # noqa: PLC0415
+        SIMPLE_INDEX_SUFFIXES,
+        read_distribution_versions,
+    )
+
+    path = config.path / config.taken
+    try:
+        if path.is_dir() or path.suffix.lower() in SIMPLE_INDEX_SUFFIXES:
+            return VersionIndex(read_distribution_versions(path, config.project))
+        with path.open(encoding="utf-8", errors="replace") as f:
+            return VersionIndex(runner.iter_versions(f))
+    except OSError as e:
+        raise CLIError(e) from None
+
+
+def main_api(
+    config: CLINamespace,
+    package_cache: Optional[PackageVersionCache] = None,
+    stdin: Optional[TextIO] = None,
+) -> str:
     """
     Run main API entrypoint.
+
+    Arguments:
+        config: Parsed CLI arguments.
+        package_cache: Shared package version cache.
+        stdin: Stream to read taken versions from, `sys.stdin` by default.
     """
+    if package_cache is None and config.disk_cache:
+        from newversion.disk_cache import DiskPackageVersionCache  # noqa: PLC0415
+
+        package_cache = DiskPackageVersionCache()
+
     executor = Executor(
         version=config.version,
         path=config.path,
+        package_cache=package_cache,
+        fsync=config.fsync,
+        in_place=config.in_place,
     )
     if config.package:
         executor.version = executor.command_get_version()
+    taken = get_taken_index(config, stdin)
     try:
-        result = _run_main_api(executor, config)
+        if config.from_git_tags:
+            executor.version = executor.command_get_git_tag_version(
+                prefix=config.tag_prefix,
+                pattern=config.tag_pattern,
+                stable_only=config.stable_tags,
+                cache_dir=get_cache_dir() if config.disk_cache else None,
+            )
+        result = _run_main_api(executor, config, taken)
     except ExecutorError as e:
         raise CLIError(e) from None
 
@@ -65,18 +170,461 @@ def main_api(config: CLINamespace) -> str:
     return result
 
 
-def main_cli() -> None:
+def run_batch_command(
+    config: CLINamespace, version: Version, taken: Optional["VersionIndex"] = None
+) -> Optional[str]:
     """
-    Run main entrypoint for CLI.
+    Run configured command for a single version in batch mode.
+
+    Check commands act as filters and return the version itself if check passes.
+    Taken versions are shared by all lines, so the index is built once.
+
+    Returns:
+        Output line or `None` if version did not pass the check.
+    """
+    executor = Executor(
+        version=version,
+        path=config.path,
+    )
+    if config.command in CHECK_COMMANDS:
+        try:
+            _run_main_api(executor, config, taken)
+        except (ComparisonFailedError, VersionIsNotStableError):
+            return None
+        return version.dumps()
+
+    return _run_main_api(executor, config, taken)
+
+
+def main_batch(config: CLINamespace, lines: TextIO, output: TextIO) -> int:
     """
-    config = parse_args(sys.argv[1:])
+    Run batch API entrypoint.
+
+    Versions are read from `config.each_file` if it is set, otherwise from `lines`.
+
+    Returns:
+        Number of invalid lines.
+    """
+    command = functools.partial(run_batch_command, config, taken=get_taken_index(config, lines))
+    jobs = 1 if config.jobs is None else config.jobs
+    if config.each_file is not None and jobs != 1:
+        from newversion.parallel import ParallelRunner  # noqa: PLC0415
+
+        parallel_runner = ParallelRunner(
+            command,
+            on_invalid=config.on_invalid,
+            jobs=jobs,
+            chunk_size=config.chunk_size or ParallelRunner.DEFAULT_CHUNK_SIZE,
+        )
+        parallel_runner.run(config.each_file, output)
+        return parallel_runner.invalid_count
+
+    runner = BatchRunner(command, on_invalid=config.on_invalid)
+    if config.each_file is not None:
+        with config.each_file.open(encoding="utf-8", errors="replace") as f:
+            runner.run(f, output)
+    else:
+        runner.run(lines, output)
+    return runner.invalid_count
+
+
+def _run_multi_version_api(
+    executor: Executor, config: CLINamespace, versions: Iterable[Version]
+) -> Iterable[str]:
+    if config.command == Commands.SORT and config.external:
+        return executor.command_sort_external(
+            versions,
+            reverse=config.reverse,
+            stable_only=config.stable_only,
+            memory_budget=config.memory_budget,
+            temp_dir=config.temp_dir,
+        )
+    if config.command == Commands.SORT:
+        sorted_versions = executor.command_sort(
+            versions, reverse=config.reverse, stable_only=config.stable_only
+        )
+        return (version.dumps() for version in sorted_versions)
+    if config.command == Commands.MAX:
+        return [executor.command_max(versions, stable_only=config.stable_only).dumps()]
+    if config.command == Commands.MIN:
+        return [executor.command_min(versions, stable_only=config.stable_only).dumps()]
+    if config.command == Commands.UNIQUE:
+        unique_versions = executor.command_unique(versions, stable_only=config.stable_only)
+        return (version.dumps() for version in unique_versions)
+    if config.command == Commands.LATEST:
+        latest = executor.command_latest(
+            versions,
+            series=config.series,
+            prerelease=config.prerelease,
+            stable_only=config.stable_only,
+        )
+        return [latest.dumps()]
+    if config.command == Commands.NEXT_FREE:
+        next_free = executor.command_next_free(
+            versions, config.release, config.increment, series=config.series
+        )
+        return [next_free.dumps()]
+
+    return (version.dumps() for version in versions)
+
+
+def _get_multi_version_input(
+    executor: Executor, config: CLINamespace, runner: BatchRunner, lines: TextIO
+) -> Iterable[Version]:
+    if config.from_git_tags:
+        return executor.command_get_git_tag_versions(
+            prefix=config.tag_prefix,
+            pattern=config.tag_pattern,
+            stable_only=config.stable_tags,
+            cache_dir=get_cache_dir() if config.disk_cache else None,
+        )
+    if config.from_dist is not None:
+        return executor.command_get_distribution_versions(config.from_dist, project=config.project)
+    return runner.iter_versions(lines)
+
+
+def main_multi_version(config: CLINamespace, lines: TextIO, output: TextIO) -> int:
+    """
+    Run API entrypoint for commands that process many versions at once.
+
+    Versions are read from git tags if `config.from_git_tags` is set, from distribution
+    file names if `config.from_dist` is set, from `config.each_file` if it is set,
+    otherwise from `lines`.
+
+    Returns:
+        Number of invalid lines.
+    """
+    executor = Executor(path=config.path)
+    runner = BatchRunner(on_invalid=config.on_invalid)
+    with contextlib.ExitStack() as stack:
+        if config.each_file is not None:
+            lines = stack.enter_context(config.each_file.open(encoding="utf-8", errors="replace"))
+        try:
+            versions = _get_multi_version_input(executor, config, runner, lines)
+            results = _run_multi_version_api(executor, config, versions)
+            runner.write_results(results, output)
+        except ExecutorError as e:
+            raise CLIError(e) from None
+    return runner.invalid_count
+
+
+def main_tree(config: CLINamespace, output: TextIO) -> int:
+    """
+    Run API entrypoint for `--tree` mode.
+
+    Prints package paths relative to tree root with their versions.
+
+    Returns:
+        Number of packages with unknown version.
+    """
+    if config.tree is None:
+        return 0
+
+    logger = logging.getLogger(LOGGER_NAME)
+    executor = Executor(path=config.tree)
+    entries = executor.command_get_tree_versions(jobs=config.jobs or 0, exclude=config.tree_exclude)
+    result: dict[str, Optional[str]] = {}
+    error_count = 0
+    for entry in entries:
+        name = entry.path.relative_to(config.tree).as_posix()
+        result[name] = entry.version.dumps() if entry.version else None
+        if entry.error:
+            error_count += 1
+            logger.warning(f"{name}: {entry.error}")
+
+    if config.output_format == OutputFormat.JSON:
+        output.write(f"{json.dumps(result, indent=2)}\n")
+        return error_count
+
+    for name, version in result.items():
+        if version:
+            output.write(f"{name} {version}\n")
+    return error_count
+
+
+def main_audit(config: CLINamespace, output: TextIO) -> int:
+    """
+    Run API entrypoint for `audit` command.
+
+    Prints every version location of packages with mismatched versions,
+    file paths are relative to `--path` or `--tree` root.
+
+    Returns:
+        Number of packages with mismatched or unknown versions.
+    """
+    logger = logging.getLogger(LOGGER_NAME)
+    root = config.tree or config.path
+    executor = Executor(path=root)
+    entries = executor.command_audit(
+        tree=config.tree is not None, jobs=config.jobs or 0, exclude=config.tree_exclude
+    )
+    result: dict[str, object] = {}
+    failed_count = 0
+    for entry in entries:
+        name = entry.path.relative_to(root).as_posix()
+        result[name] = {
+            "consistent": entry.is_consistent,
+            "error": entry.error,
+            "locations": [
+                {
+                    "source": source_name,
+                    "path": location.path.relative_to(root).as_posix(),
+                    "line": location.line,
+                    "version": location.version.dumps(),
+                }
+                for source_name, location in entry.locations.items()
+            ],
+        }
+        if entry.is_consistent:
+            continue
+        failed_count += 1
+        if entry.error:
+            logger.warning(f"{name}: {entry.error}")
+            continue
+        logger.warning(f"{name}: versions do not match")
+        if config.output_format == OutputFormat.TEXT:
+            for source_name, location in entry.locations.items():
+                path = location.path.relative_to(root).as_posix()
+                output.write(f"{path}:{location.line} {location.version.dumps()} {source_name}\n")
+
+    if config.output_format == OutputFormat.JSON:
+        output.write(f"{json.dumps(result, indent=2)}\n")
+    logger.debug(f"Audited {len(entries)} packages, {failed_count} inconsistent")
+    return failed_count
 
-    logger = setup_logging(config.log_level)
+
+def _get_manifest_name(path: Path, root: Path) -> str:
+    try:
+        return path.relative_to(root).as_posix()
+    except ValueError:
+        return print_path(path)
+
+
+def main_bulk_set(config: CLINamespace, stdin: TextIO, output: TextIO) -> None:
+    """
+    Run API entrypoint for `set_package --manifest`.
+
+    Prints old and new version for every package from the manifest.
+
+    Raises:
+        CLIError: If manifest is invalid or changes conflict.
+    """
+    from newversion.bulk import parse_manifest  # noqa: PLC0415
+
+    if config.manifest is None:
+        return
+
+    logger = logging.getLogger(LOGGER_NAME)
+    if config.manifest == "-":
+        manifest_text = stdin.read()
+        manifest_suffix = ""
+    else:
+        manifest_path = Path(config.manifest)
+        manifest_suffix = manifest_path.suffix
+        try:
+            manifest_text = manifest_path.read_text(encoding="utf-8")
+        except OSError as e:
+            raise CLIError(e) from None
+
+    try:
+        manifest = parse_manifest(manifest_text, config.path, manifest_suffix)
+        names = {path: _get_manifest_name(path, config.path) for path in manifest}
+        result = Executor(path=config.path).command_set_versions(
+            manifest, jobs=config.jobs or 0, fsync=config.fsync, in_place=config.in_place
+        )
+    except (ManifestError, ExecutorError, OSError) as e:
+        raise CLIError(e) from None
+
+    for item in result.items:
+        name = names[item.path]
+        old_version = item.old_version.dumps() if item.old_version else "unknown"
+        output.write(f"{name} {old_version} -> {item.new_version.dumps()}\n")
+    logger.info(
+        f"Planned {len(result.items)} packages in {result.plan_seconds * 1000:.1f} ms,"
+        f" wrote {result.edit_count} files in {result.apply_seconds * 1000:.1f} ms"
+    )
+
+
+def run_tree_command(config: CLINamespace, stdout: TextIO) -> int:
+    """
+    Run `audit` command or `--tree` mode.
+
+    Returns:
+        Exit code, `1` if audit found packages with mismatched versions
+        or `--tree` found packages with unknown version.
+    """
+    if config.command == Commands.AUDIT:
+        return 1 if main_audit(config, stdout) else 0
+
+    return 1 if main_tree(config, stdout) else 0
+
+
+def run_service_command(config: CLINamespace, stdout: TextIO) -> int:
+    """
+    Run `serve` or `cache` CLI command, their modules are imported only when used.
+
+    Returns:
+        Exit code.
+    """
+    if config.command == Commands.CACHE:
+        from newversion.disk_cache import run_cache_command  # noqa: PLC0415
+
+        return run_cache_command(config, stdout)
+
+    from newversion.daemon import run_serve_command  # noqa: PLC0415
+
+    return run_serve_command(config, stdout)
+
+
+def write_profile_report(config: CLINamespace, report: ProfileReport, stderr: TextIO) -> None:
+    """
+    Write `--profile` report to `config.profile_output` or to `stderr`.
+    """
+    if config.profile == OutputFormat.JSON:
+        text = json.dumps(report.to_dict(), indent=2)
+    else:
+        text = report.render_text()
+
+    if config.profile_output is None:
+        stderr.write(f"{text}\n")
+        return
     try:
-        output = main_api(config)
-    except CLIError as e:
-        logger.error(e)  # noqa: TRY400
-        sys.exit(1)
+        config.profile_output.write_text(f"{text}\n", encoding="utf-8")
+    except OSError as e:
+        stderr.write(f"Cannot write profile report: {e}\n")
+
+
+def _run_command(
+    config: CLINamespace,
+    *,
+    stdin: TextIO,
+    stdout: TextIO,
+    stderr: TextIO,
+    package_cache: Optional[PackageVersionCache],
+) -> int:
+    if config.command in {Commands.SERVE, Commands.CACHE}:
+        return run_service_command(config, stdout)
+
+    with log_to_stream(config.log_level, stderr) as logger:
+        if config.tree is not None or config.command == Commands.AUDIT:
+            return run_tree_command(config, stdout)
+
+        if config.each or config.command in MULTI_VERSION_COMMANDS:
+            main_func = (
+                main_multi_version if config.command in MULTI_VERSION_COMMANDS else main_batch
+            )
+            try:
+                invalid_count = main_func(config, stdin, stdout)
+            except CLIError as e:
+                logger.error(e)  # noqa: TRY400
+                return 1
+            if invalid_count and config.on_invalid == InvalidLinePolicy.REPORT:
+                return 1
+            return 0
+
+        try:
+            if config.manifest is not None:
+                main_bulk_set(config, stdin, stdout)
+                return 0
+            output = main_api(config, package_cache, stdin)
+        except CLIError as e:
+            logger.error(e)  # noqa: TRY400
+            return 1
 
     if output:
-        sys.stdout.write(f"{output}\n")
+        stdout.write(f"{output}\n")
+    return 0
+
+
+def run_cli(
+    args: Sequence[str],
+    *,
+    stdin: TextIO,
+    stdout: TextIO,
+    stderr: TextIO,
+    cwd: Optional[Path] = None,
+    package_cache: Optional[PackageVersionCache] = None,
+    import_started: Optional[float] = None,
+) -> int:
+    """
+    Run CLI command with given streams and working directory.
+
+    Used by the CLI entrypoint and by the daemon to serve forwarded calls.
+    With `--profile` spans are timed only for this call and the report is written after it.
+
+    Arguments:
+        args: CLI arguments without program name.
+        stdin: Input stream.
+        stdout: Output stream.
+        stderr: Stream for usage errors, log records and profile report.
+        cwd: Directory to resolve relative paths against.
+        package_cache: Shared package version cache.
+        import_started: `time.perf_counter` value newversion imports started at,
+            to report import time with `--profile`.
+
+    Returns:
+        Exit code.
+    """
+    started = time.perf_counter()
+    try:
+        config = parse_args(args, stdin=stdin, stdout=stdout, stderr=stderr, cwd=cwd)
+    except SystemExit as e:
+        return e.code if isinstance(e.code, int) else 1
+    parsed = time.perf_counter()
+
+    if config.profile is None:
+        return _run_command(
+            config, stdin=stdin, stdout=stdout, stderr=stderr, package_cache=package_cache
+        )
+
+    profiler = Profiler(
+        started=import_started if import_started is not None else started,
+        cprofile_path=config.profile_cprofile,
+        tracemalloc_path=config.profile_tracemalloc,
+    )
+    if import_started is not None:
+        profiler.record("imports", started - import_started)
+    profiler.record("cli.parse_args", parsed - started)
+    with profiler.session():
+        code = _run_command(
+            config, stdin=stdin, stdout=stdout, stderr=stderr, package_cache=package_cache
+        )
+    write_profile_report(config, profiler.get_report(), stderr)
+    return code
+
+
+def main_cli() -> None:
+    """
+    Run main entrypoint for CLI.
+
+    If `NEWVERSION_DAEMON=1` is set and daemon is running, the call is forwarded to it,
+    unless it is profiled with `--profile` or `NEWVERSION_PROFILE`,
+    or streams stdin with `--each`.
+    """
+    args = sys.argv[1:]
+    is_profiled = os.environ.get(PROFILE_ENV_NAME, "0") != "0" or any(
+        arg.startswith("--profile") for arg in args
+    )
+    # daemon gets the whole stdin in a request, so streamed input stays local
+    is_streamed = any(arg.startswith("--ea") and "--each".startswith(arg) for arg in args)
+    if (
+        os.environ.get(DAEMON_ENV_NAME) == "1"
+        and args[:1] != [Commands.SERVE.value]
+        and not is_profiled
+        and not is_streamed
+    ):
+        from newversion.daemon import forward  # noqa: PLC0415
+
+        code = forward(args, sys.stdin, sys.stdout, sys.stderr)
+        if code is not None:
+            sys.exit(code)
+
+    sys.exit(
+        run_cli(
+            args,
+            stdin=sys.stdin,
+            stdout=sys.stdout,
+            stderr=sys.stderr,
+            import_started=IMPORT_STARTED,
+        )
+    )
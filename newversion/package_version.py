@@ -3,276 +3,512 @@ PackageVersion handler.
 """
 
 import logging
-import re
+import threading
+from collections.abc import Sequence
 from pathlib import Path
-from typing import Optional
+from typing import Any, Optional, cast
 
 from newversion.constants import LOGGER_NAME
-from newversion.eol_fixer import EOLFixer
-from newversion.exceptions import PackageVersionError
+from newversion.dynamic_version import (
+    Assignment,
+    DynamicVersion,
+    find_assignment,
+    find_module_path,
+    resolve_import,
+)
+from newversion.exceptions import PackageVersionError, VersionSourceError
+from newversion.file_edit import AtomicWriter, BytePatch, FileEdit
+from newversion.profiling import instrument
+from newversion.pyproject import PyprojectFile, get_toml_loads
+from newversion.source_file import SignatureTypeDef, SourceFile, VersionLocation, VersionMatch
 from newversion.utils import print_path
 from newversion.version import Version
+from newversion.version_sources import (
+    DEFAULT_AUTHORITATIVE_NAMES,
+    DEFAULT_SOURCE_NAMES,
+    SetupCfgSource,
+    VersionSource,
+    VersionSourceRegistry,
+    default_registry,
+)
 
 
 class PackageVersion:
     """
-    Handles the retrieval and setting of a Python package version from various configuration files.
+    Handles the retrieval and setting of a package version from various configuration files.
+
+    Package files are checked by version sources from a `VersionSourceRegistry`, the package
+    root is listed once and every entry is matched to the enabled sources. Built-in sources
+    in default order: `pyproject` (`[project]` or `[tool.poetry]` version in `pyproject.toml`),
+    `setup_cfg`, `setup_py`, `module` (`__version__` in a package module), `version_file`
+    (`VERSION`), `package_json` and `cargo` (`Cargo.toml`). Custom sources are loaded from
+    `newversion.sources` entry points when they are named in the configuration.
+
+    Source order and authoritative sources are set by arguments or by `sources` and
+    `authoritative` lists in `[tool.newversion]` table of `pyproject.toml`.
+    `get` returns the version from the first enabled source that defines it, `set` updates
+    that source and every authoritative source that defines a version.
+
+    `pyproject.toml` is parsed with `tomllib` or `tomli` to find the authoritative version
+    key and falls back to the first `version = "..."` line if it cannot be parsed.
+    `setup.cfg` and `setup.py` are scanned line by line as bytes and reading stops at
+    the first version line, so `get` time does not depend on the size of the rest of the file.
+
+    Dynamic versions from setuptools `attr` and `file` directives, Hatch version path
+    and computed `setup.py` versions are resolved statically: the module file is located
+    without importing it and only its `__version__ = "..."` line is parsed.
+
+    File contents and version line locations for `set` are cached for the lifetime
+    of the instance, so repeated plans read every file once. A file that changed on disk
+    in between is detected by `(mtime_ns, size, inode)` and read again.
+
+    Arguments:
+        path: Package root.
+        fsync: Flush written files to disk.
+        in_place: Overwrite files in place instead of replacing them.
+        sources: Enabled source names in priority order, overrides `pyproject.toml` config.
+        authoritative: Source names `set` always updates, overrides `pyproject.toml` config.
+        registry: Version sources registry.
     """
 
-    RE_PYPROJECT = re.compile(r"^version\s*=\s*['\"](\S+)['\"]")
-    RE_SETUP_CFG_FILE = re.compile(r"^version\s*=\s*file:\s*(\S+)")
-    RE_SETUP_CFG = re.compile(r"^version\s*=\s*(\S+)")
-    RE_SETUP_PY = re.compile(r"^\s*version\s*=\s*['\"](\S+)['\"]\s*,?")
-
-    def __init__(self, path: Path) -> None:
+    MAX_IMPORT_DEPTH = 5
+    CONFIG_KEY = ("tool", "newversion")
+
+    def __init__(
+        self,
+        path: Path,
+        *,
+        fsync: bool = True,
+        in_place: bool = False,
+        sources: Optional[Sequence[str]] = None,
+        authoritative: Optional[Sequence[str]] = None,
+        registry: VersionSourceRegistry = default_registry,
+    ) -> None:
         self._path = path
+        self._fsync = fsync
+        self._in_place = in_place
+        self._source_names = sources
+        self._authoritative_names = authoritative
+        self._registry = registry
+        self._files: dict[Path, SourceFile] = {}
+        self._pyprojects: dict[Path, tuple[SourceFile, Optional[PyprojectFile]]] = {}
         self._logger = logging.getLogger(LOGGER_NAME)
 
     @property
-    def _setup_py_path(self) -> Path:
-        return self._path / "setup.py"
-
-    @property
-    def _setup_cfg_path(self) -> Path:
-        return self._path / "setup.cfg"
+    def path(self) -> Path:
+        """
+        Package root.
+        """
+        return self._path
 
     @property
     def _pyproject_toml_path(self) -> Path:
         return self._path / "pyproject.toml"
 
-    def _get_from_pyproject(self) -> Optional[Version]:
-        if not self._pyproject_toml_path.exists():
-            return None
+    @instrument("package.read", detail="path")
+    def read(self, path: Path) -> Optional[SourceFile]:
+        """
+        Read a package file once per session.
 
-        self._logger.debug(
-            f"Found {print_path(self._pyproject_toml_path)}, extracting version from it"
-        )
-        text = self._pyproject_toml_path.read_text()
-        for line in text.splitlines():
-            if not line.startswith("version"):
-                continue
+        Arguments:
+            path: File path.
 
-            match = self.RE_PYPROJECT.match(line)
-            if not match:
-                continue
+        Returns:
+            File content, `None` if file does not exist.
+        """
+        try:
+            stat = path.stat()
+        except (FileNotFoundError, NotADirectoryError):
+            self._files.pop(path, None)
+            return None
 
-            version_str = match.group(1)
-            self._logger.debug(f"Version {version_str} found")
-            return Version(version_str)
+        signature = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+        source = self._files.get(path)
+        if source is not None and source.signature == signature:
+            return source
+
+        if source is not None:
+            self._logger.debug(f"{print_path(path)} changed on disk, reading it again")
+        data = path.read_bytes()
+        source = SourceFile(
+            path=path,
+            signature=signature,
+            data=data,
+            text=data.decode("utf-8", "surrogateescape"),
+            matches={},
+        )
+        self._files[path] = source
+        return source
 
-        return None
+    def plan_patch(
+        self, source: SourceFile, matches: list[VersionMatch], version: Version
+    ) -> Optional[FileEdit]:
+        """
+        Prepare a change that replaces version literals in a file.
 
-    def _set_in_pyproject(self, version: Version) -> None:
-        if not self._pyproject_toml_path.exists():
-            return
-
-        text = self._pyproject_toml_path.read_text()
-        line_ending = EOLFixer.get_line_ending(text)
-        lines: list[str] = []
-        changed = False
-        for line in text.splitlines():
-            if not line.startswith("version"):
-                lines.append(line)
-                continue
+        Arguments:
+            source: File read with `read`.
+            matches: Version literals to replace.
+            version: New version.
 
-            match = self.RE_PYPROJECT.match(line)
-            if not match:
-                lines.append(line)
-                continue
+        Returns:
+            File edit, `None` if there are no matches or version is already set.
+        """
+        if not matches:
+            return None
 
-            old_version = match.group(1)
-            new_version = version.dumps()
+        new_version = version.dumps()
+        patches: list[BytePatch] = []
+        for match in matches:
+            old_version = match.value
             if old_version == new_version:
                 self._logger.info(
-                    f"Version in {print_path(self._pyproject_toml_path)}"
+                    f"Version in {print_path(source.path)}"
                     f" is already set to {new_version}, no change needed"
                 )
-                return
+                return None
             self._logger.info(
-                f"Changing version in {print_path(self._pyproject_toml_path)}"
-                f" from {old_version} to {new_version}"
+                f"Changing version in {print_path(source.path)} from {old_version} to {new_version}"
+            )
+            patches.append(
+                BytePatch(
+                    offset=match.offset,
+                    old=old_version.encode("utf-8", "surrogateescape"),
+                    new=new_version.encode("utf-8"),
+                )
             )
-            new_line = line.replace(old_version, new_version)
-            lines.append(new_line)
-            changed = True
-
-        if changed:
-            text = EOLFixer.add_newline(line_ending.join(lines))
-            self._pyproject_toml_path.write_text(text)
-
-    def _get_from_setup_cfg(self) -> Optional[Version]:
-        if not self._setup_cfg_path.exists():
-            return None
-
-        self._logger.debug(f"Found {print_path(self._setup_cfg_path)}, extracting version from it")
-        text = self._setup_cfg_path.read_text()
-        for line in text.splitlines():
-            if not line.startswith("version"):
-                continue
-
-            match = self.RE_SETUP_CFG_FILE.match(line)
-            if match:
-                version_path = self._path / Path(match.group(1))
-                self._logger.debug(f"Getting version from {match.group(1)}")
-                return Version(version_path.read_text().strip())
-
-            match = self.RE_SETUP_CFG.match(line)
-            if not match:
-                continue
 
-            version_str = match.group(1)
-            self._logger.debug(f"Version {version_str} found")
-            return Version(version_str)
+        return FileEdit.from_patches(source.path, source.data, patches)
 
-        return None
+    def parse_toml(self, source: SourceFile) -> Optional[PyprojectFile]:
+        """
+        Parse a TOML file once per file content.
 
-    def _set_in_setup_cfg(self, version: Version) -> None:
-        if not self._setup_cfg_path.exists():
-            return
-
-        text = self._setup_cfg_path.read_text()
-        line_ending = EOLFixer.get_line_ending(text)
-        lines: list[str] = []
-        changed = False
-        for line in text.splitlines():
-            if not line.startswith("version"):
-                lines.append(line)
-                continue
+        Arguments:
+            source: File read with `read`.
 
-            match = self.RE_SETUP_CFG_FILE.match(line)
-            if match:
-                version_path = self._path / Path(match.group(1))
-                self._logger.info(f"Changing version in {match.group(1)} to {version.dumps()}")
-                version_path.write_text(f"{version.dumps()}{line_ending}")
-                return
-
-            match = self.RE_SETUP_CFG.match(line)
-            if not match:
-                lines.append(line)
-                continue
+        Returns:
+            Parsed file, `None` if there is no TOML parser or file is not valid TOML.
+        """
+        cached = self._pyprojects.get(source.path)
+        if cached is not None and cached[0] is source:
+            return cached[1]
+
+        loads = get_toml_loads()
+        pyproject = None
+        if loads is not None:
+            try:
+                pyproject = PyprojectFile.parse(source.data, loads)
+            except ValueError as e:
+                self._logger.debug(f"Cannot parse {print_path(source.path)}: {e}")
+        self._pyprojects[source.path] = (source, pyproject)
+        return pyproject
+
+    def _get_pyproject(self) -> Optional[PyprojectFile]:
+        source = self.read(self._pyproject_toml_path)
+        return self.parse_toml(source) if source is not None else None
+
+    def _get_module_bases(self) -> list[Path]:
+        result = [self._path, self._path / "src"]
+        pyproject = self._get_pyproject()
+        package_dir = pyproject.get_package_dir() if pyproject is not None else None
+        if package_dir is not None:
+            result.insert(0, self._path / package_dir)
+        return result
+
+    def find_dynamic(self, dynamic: DynamicVersion) -> Optional[tuple[SourceFile, VersionMatch]]:
+        """
+        Resolve a dynamic version statically.
 
-            old_version = match.group(1)
-            new_version = version.dumps()
-            if old_version == new_version:
-                self._logger.info(
-                    f"Version in {print_path(self._setup_cfg_path)}"
-                    f" is already set to {new_version}, no change needed"
-                )
-                return
-            self._logger.info(
-                f"Changing version in {print_path(self._setup_cfg_path)}"
-                f" from {old_version} to {new_version}"
-            )
-            new_line = line.replace(old_version, version.dumps())
-            lines.append(new_line)
-            changed = True
+        Module imports are followed up to `MAX_IMPORT_DEPTH` levels.
 
-        if changed:
-            text = EOLFixer.add_newline(line_ending.join(lines))
-            self._setup_cfg_path.write_text(text)
+        Arguments:
+            dynamic: Module attribute or version file.
 
-    def _get_from_setup_py(self) -> Optional[Version]:
-        if not self._setup_py_path.exists():
+        Returns:
+            File and version literal, `None` if version cannot be resolved.
+        """
+        bases = self._get_module_bases()
+        if dynamic.path is not None:
+            path: Optional[Path] = self._path / dynamic.path
+        elif dynamic.module:
+            path = find_module_path(bases, dynamic.module)
+        else:
+            return None
+        if path is None:
             return None
 
-        self._logger.debug(f"Found {print_path(self._setup_py_path)}, extracting version from it")
-        text = self._setup_py_path.read_text()
-        for line in text.splitlines():
-            if not line.lstrip().startswith("version"):
-                continue
-
-            match = self.RE_SETUP_PY.match(line)
-            if not match:
-                continue
-
-            version_str = match.group(1)
-            self._logger.debug(f"Version {version_str} found")
-            return Version(version_str)
-
+        if dynamic.attribute is None:
+            source = self.read(path)
+            if source is None or not source.data.strip():
+                return None
+            offset = len(source.data) - len(source.data.lstrip())
+            value = source.data.strip().decode("utf-8", "surrogateescape")
+            line = source.data.count(b"\n", 0, offset)
+            return source, VersionMatch(line=line, offset=offset, value=value, pattern=None)
+
+        name = dynamic.attribute
+        for _ in range(self.MAX_IMPORT_DEPTH):
+            source = self.read(path) if path is not None else None
+            if source is None:
+                return None
+            result = find_assignment(source.data, name)
+            if result is None:
+                return None
+            if isinstance(result, Assignment):
+                match = VersionMatch(
+                    line=result.line, offset=result.offset, value=result.value, pattern=None
+                )
+                return source, match
+            self._logger.debug(f"Following import of {result.name} from {result.module}")
+            path = resolve_import(source.path, result.module, bases)
+            name = result.name
         return None
 
-    def _set_in_setup_py(self, version: Version) -> None:
-        if not self._setup_py_path.exists():
-            return
-
-        text = self._setup_py_path.read_text()
-        line_ending = EOLFixer.get_line_ending(text)
-        lines: list[str] = []
-        changed = False
-        for line in text.splitlines():
-            if not line.lstrip().startswith("version"):
-                lines.append(line)
-                continue
-
-            match = self.RE_SETUP_PY.match(line)
-            if not match:
-                lines.append(line)
+    def _get_config_names(self, key: str) -> Optional[list[str]]:
+        pyproject = self._get_pyproject()
+        names = pyproject.get((*self.CONFIG_KEY, key)) if pyproject is not None else None
+        if names is None:
+            return None
+        if not isinstance(names, list) or not all(
+            isinstance(i, str) for i in cast("list[Any]", names)
+        ):
+            message = f"tool.newversion.{key} must be a list of source names"
+            raise VersionSourceError(message)
+        return cast("list[str]", names)
+
+    def _get_sources(self) -> list[VersionSource]:
+        names = self._source_names
+        if names is None:
+            names = self._get_config_names("sources")
+        if names is None:
+            names = DEFAULT_SOURCE_NAMES
+        return [self._registry.get(name) for name in names]
+
+    def _get_authoritative_names(self) -> Sequence[str]:
+        names = self._authoritative_names
+        if names is None:
+            names = self._get_config_names("authoritative")
+        if names is None:
+            names = DEFAULT_AUTHORITATIVE_NAMES
+        for name in names:
+            self._registry.get(name)
+        return names
+
+    def _locate(
+        self, sources: list[VersionSource], paths: dict[str, list[Path]]
+    ) -> Optional[tuple[VersionSource, VersionLocation]]:
+        for source in sources:
+            source_paths = paths[source.name]
+            if not source_paths:
                 continue
-
-            old_version = match.group(1)
-            new_version = version.dumps()
-            if old_version == new_version:
-                self._logger.info(
-                    f"Version in {print_path(self._setup_py_path)}"
-                    f" is already set to {new_version}, no change needed"
+            location = source.locate(self, source_paths)
+            if location is not None:
+                self._logger.debug(
+                    f"Version {location.version} found in {print_path(location.path)}"
                 )
-                return
-            self._logger.info(
-                f"Changing version in {print_path(self._setup_py_path)}"
-                f" from {old_version} to {version.dumps()}"
-            )
-            new_line = line.replace(old_version, version.dumps())
-            lines.append(new_line)
-            changed = True
-
-        if changed:
-            text = EOLFixer.add_newline(line_ending.join(lines))
-            self._setup_py_path.write_text(text)
+                return source, location
+        return None
 
     def get(self) -> Version:
         """
-        Retrieve the version of the Python package.
+        Retrieve the version of the package.
 
-        This method attempts to get the package version from different sources
-        in the following order:
+        This method attempts to get the package version from enabled sources
+        in the following default order:
         1. pyproject.toml
         2. setup.cfg
         3. setup.py
+        4. `__version__` in a package module
+        5. VERSION file
+        6. package.json
+        7. Cargo.toml
 
         If the version is found in any of these sources, it is returned.
         If the version cannot be determined from any of these sources, a
         PackageVersionError is raised.
 
         Returns:
-            Version: The version of the Python package.
+            Version: The version of the package.
 
         Raises:
             PackageVersionError: If the package version cannot be determined.
+            VersionSourceError: If sources configuration is invalid.
         """
-        result = self._get_from_pyproject()
-        if result:
-            return result
-        result = self._get_from_setup_cfg()
-        if result:
-            return result
-        result = self._get_from_setup_py()
-        if result:
-            return result
+        return self.locate().version
 
-        raise PackageVersionError
+    @instrument("package.get", detail="self.path")
+    def locate(self) -> VersionLocation:
+        """
+        Find the version of the package and the file and line it is defined in.
+
+        Sources are checked in the same order as in `get`.
+
+        Returns:
+            Version location.
 
+        Raises:
+            PackageVersionError: If the package version cannot be determined.
+            VersionSourceError: If sources configuration is invalid.
+        """
+        sources = self._get_sources()
+        found = self._locate(sources, self._registry.scan(self._path, sources))
+        if found is None:
+            raise PackageVersionError
+        return found[1]
+
+    def locate_all(self) -> dict[str, VersionLocation]:
+        """
+        Find the version in every enabled source that defines it.
+
+        The package root is listed once and every file is read at most once.
+
+        Returns:
+            Version locations by source name, in source order.
+
+        Raises:
+            VersionSourceError: If sources configuration is invalid.
+        """
+        sources = self._get_sources()
+        paths = self._registry.scan(self._path, sources)
+        result: dict[str, VersionLocation] = {}
+        for source in sources:
+            if not paths[source.name]:
+                continue
+            location = source.locate(self, paths[source.name])
+            if location is not None:
+                result[source.name] = location
+        return result
+
+    @instrument("package.set", detail="self.path")
     def set(self, version: Version) -> None:
         """
         Set the version for the package.
 
-        This method updates the version in multiple configuration files:
+        This method updates the version in the source `get` found it in
+        and in every authoritative source that defines it, by default:
         - pyproject.toml
         - setup.cfg
         - setup.py
 
+        Files are replaced atomically, if any write fails, all files are restored.
+
         Args:
             version (Version): The new version to set.
         """
-        self._set_in_pyproject(version)
-        self._set_in_setup_cfg(version)
-        self._set_in_setup_py(version)
+        edits = self.plan_set(version)
+        AtomicWriter(fsync=self._fsync, in_place=self._in_place).write(edits)
+        for edit in edits:
+            self._files.pop(edit.path, None)
+
+    def plan_set(self, version: Version) -> list[FileEdit]:
+        """
+        Prepare changes to set the version for the package without writing them.
+
+        Arguments:
+            version: The new version to set.
+
+        Returns:
+            File edits for sources that need a change.
+        """
+        sources = self._get_sources()
+        authoritative_names = self._get_authoritative_names()
+        paths = self._registry.scan(self._path, sources)
+        found = self._locate(sources, paths)
+        found_source = found[0] if found is not None else None
+
+        # dynamic versions of several files can point to the same module
+        unique_edits: dict[Path, FileEdit] = {}
+        for source in sources:
+            if source.name not in authoritative_names and source is not found_source:
+                continue
+            if not paths[source.name]:
+                continue
+            edit = source.plan_set(self, paths[source.name], version)
+            if edit is not None:
+                unique_edits.setdefault(edit.path, edit)
+        return list(unique_edits.values())
+
+
+class PackageVersionCache:
+    """
+    In-memory cache for `PackageVersion.get` results.
+
+    Entries are keyed by package root and validated by `(mtime_ns, size, inode)` of every
+    root file the registered version sources look for, of a version file referenced from
+    `setup.cfg` and of the file the version was found in, so changed files are always read again.
+    """
+
+    def __init__(self, registry: VersionSourceRegistry = default_registry) -> None:
+        self._registry = registry
+        self._data: dict[Path, tuple[list[Path], SignatureTypeDef, Version]] = {}
+        self._lock = threading.Lock()
+
+    def _get_source_paths(self, path: Path) -> list[Path]:
+        result = self._registry.get_file_paths(path)
+        try:
+            setup_cfg_lines = (path / "setup.cfg").read_text().splitlines()
+        except OSError:
+            return result
+        for line in setup_cfg_lines:
+            match = SetupCfgSource.RE_FILE.match(line)
+            if match:
+                result.append(path / match.group(1))
+        return result
+
+    @classmethod
+    def _add_location(
+        cls, paths: list[Path], signature: SignatureTypeDef, location: VersionLocation
+    ) -> tuple[list[Path], SignatureTypeDef]:
+        if location.path in paths:
+            return paths, signature
+        return [*paths, location.path], signature + cls._get_signature([location.path])
+
+    @staticmethod
+    def _get_signature(paths: list[Path]) -> SignatureTypeDef:
+        result: list[Optional[tuple[int, int, int]]] = []
+        for source_path in paths:
+            try:
+                stat = source_path.stat()
+            except OSError:
+                result.append(None)
+                continue
+            result.append((stat.st_mtime_ns, stat.st_size, stat.st_ino))
+        return tuple(result)
+
+    def get(self, path: Path) -> Version:
+        """
+        Get package version, reading files only if they changed since the last call.
+
+        Arguments:
+            path: Package root.
+
+        Returns:
+            Package version.
+
+        Raises:
+            PackageVersionError: If the package version cannot be determined.
+        """
+        path = path.absolute()
+        with self._lock:
+            cached = self._data.get(path)
+        if cached is not None:
+            source_paths, signature, version = cached
+            if self._get_signature(source_paths) == signature:
+                return version
+
+        source_paths = self._get_source_paths(path)
+        signature = self._get_signature(source_paths)
+        location = PackageVersion(path, registry=self._registry).locate()
+        source_paths, signature = self._add_location(source_paths, signature, location)
+        version = location.version
+        with self._lock:
+            self._data[path] = (source_paths, signature, version)
+        return version
+
+    def clear(self) -> None:
+        """
+        Remove all cached versions.
+        """
+        with self._lock:
+            self._data.clear()
@@ -0,0 +1,213 @@
+"""
+Order-preserving process-pool batch processing of large version files.
+"""
+
+import os
+from collections import deque
+from collections.abc import Callable, Iterator
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional, TextIO
+
+from newversion.batch import BatchRunner
+from newversion.constants import InvalidLinePolicy
+from newversion.exceptions import ExecutorError
+from newversion.version import Version, VersionError
+
+
+@dataclass(frozen=True)
+class ByteRange:
+    """
+    Line-aligned byte range of an input file.
+    """
+
+    start: int
+    end: int
+
+
+@dataclass(frozen=True)
+class RangeTask:
+    """
+    Work item for a single worker process.
+    """
+
+    path: Path
+    byte_range: ByteRange
+    command: Callable[[Version], Optional[str]]
+    stop_on_invalid: bool
+
+
+@dataclass(frozen=True)
+class RangeResult:
+    """
+    Processed byte range.
+
+    Attributes:
+        results: Output lines.
+        errors: Pairs of range-relative 1-based line numbers and error messages.
+        line_count: Number of processed input lines.
+    """
+
+    results: list[str]
+    errors: list[tuple[int, str]]
+    line_count: int
+
+
+def split_byte_ranges(path: Path, chunk_size: int) -> list[ByteRange]:
+    """
+    Split file into byte ranges that start and end at line boundaries.
+
+    Arguments:
+        path: Input file path.
+        chunk_size: Approximate range size in bytes.
+
+    Returns:
+        Consecutive byte ranges covering the whole file.
+    """
+    file_size = path.stat().st_size
+    chunk_size = max(chunk_size, 1)
+    result: list[ByteRange] = []
+    start = 0
+    with path.open("rb") as f:
+        while start < file_size:
+            end = start + chunk_size
+            if end < file_size:
+                f.seek(end - 1)
+                f.readline()
+                end = f.tell()
+            end = min(end, file_size)
+            result.append(ByteRange(start, end))
+            start = end
+    return result
+
+
+def process_range(task: RangeTask) -> RangeResult:
+    """
+    Run command for every line in a byte range. Executed in a worker process.
+
+    Arguments:
+        task: Work item.
+
+    Returns:
+        Processed range.
+    """
+    runner = BatchRunner(task.command)
+    results: list[str] = []
+    errors: list[tuple[int, str]] = []
+    line_count = 0
+    position = task.byte_range.start
+    with task.path.open("rb") as f:
+        f.seek(position)
+        while position < task.byte_range.end:
+            line = f.readline()
+            if not line:
+                break
+            position += len(line)
+            line_count += 1
+            try:
+                result = runner.run_line(line.decode("utf-8", "replace"))
+            except (VersionError, ExecutorError) as e:
+                errors.append((line_count, str(e)))
+                if task.stop_on_invalid:
+                    break
+                continue
+            if result is not None:
+                results.append(result)
+
+    return RangeResult(results=results, errors=errors, line_count=line_count)
+
+
+class ParallelRunner:
+    """
+    Apply one command to every version from a file using a process pool.
+
+    Input file is split into line-aligned byte ranges, every worker reads and processes
+    its own range, results are written in input order.
+
+    Arguments:
+        command: Picklable callable that gets a version and returns output line
+            or `None` to skip it.
+        on_invalid: What to do with lines that cannot be parsed or processed.
+        jobs: Number of worker processes, `0` to use all CPUs.
+        chunk_size: Byte range size per work item.
+    """
+
+    DEFAULT_CHUNK_SIZE = 4 * 1024 * 1024
+
+    def __init__(
+        self,
+        command: Callable[[Version], Optional[str]],
+        on_invalid: InvalidLinePolicy = InvalidLinePolicy.ABORT,
+        jobs: int = 0,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ) -> None:
+        self._command = command
+        self._on_invalid = on_invalid
+        self.jobs = jobs if jobs > 0 else (os.cpu_count() or 1)
+        self._chunk_size = chunk_size
+        self._batch_runner = BatchRunner(command, on_invalid=on_invalid)
+
+    @property
+    def invalid_count(self) -> int:
+        """
+        Number of invalid lines found so far.
+        """
+        return self._batch_runner.invalid_count
+
+    def _iter_range_results(self, path: Path) -> Iterator[RangeResult]:
+        byte_ranges = split_byte_ranges(path, self._chunk_size)
+        stop_on_invalid = self._on_invalid == InvalidLinePolicy.ABORT
+        tasks = (
+            RangeTask(
+                path=path,
+                byte_range=byte_range,
+                command=self._command,
+                stop_on_invalid=stop_on_invalid,
+            )
+            for byte_range in byte_ranges
+        )
+        max_pending = self.jobs * 2
+        with ProcessPoolExecutor(max_workers=self.jobs) as executor:
+            pending: deque[Future[RangeResult]] = deque()
+            try:
+                for task in tasks:
+                    pending.append(executor.submit(process_range, task))
+                    if len(pending) >= max_pending:
+                        yield pending.popleft().result()
+                while pending:
+                    yield pending.popleft().result()
+            finally:
+                for future in pending:
+                    future.cancel()
+
+    def iter_results(self, path: Path) -> Iterator[str]:
+        """
+        Lazily process input file in parallel.
+
+        Arguments:
+            path: Input file path.
+
+        Yields:
+            Output lines in input order.
+        """
+        line_offset = 0
+        for range_result in self._iter_range_results(path):
+            # on abort worker stops at the first invalid line, so all results are valid
+            yield from range_result.results
+            for line_number, error in range_result.errors:
+                self._batch_runner.handle_invalid(line_offset + line_number, error)
+            line_offset += range_result.line_count
+
+    def run(self, path: Path, output: TextIO) -> None:
+        """
+        Process input file and write results in input order.
+
+        Arguments:
+            path: Input file path.
+            output: Output stream.
+
+        Raises:
+            CLIError: If line is invalid and policy is `abort`.
+        """
+        self._batch_runner.write_results(self.iter_results(path), output)
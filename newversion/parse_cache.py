@@ -0,0 +1,117 @@
+"""
+Size-bounded LRU cache for parsed values.
+"""
+
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from dataclasses import dataclass
+from typing import Generic, TypeVar
+
+_K = TypeVar("_K", bound=Hashable)
+_V = TypeVar("_V")
+
+
+@dataclass(frozen=True)
+class ParseCacheStats:
+    """
+    Parse cache counters snapshot.
+    """
+
+    hits: int
+    misses: int
+    evictions: int
+    size: int
+    max_size: int
+
+
+class ParseCache(Generic[_K, _V]):
+    """
+    Thread-safe size-bounded LRU cache for parsed values.
+
+    Cached values are shared between callers, so they must be immutable.
+
+    Arguments:
+        max_size: Maximum number of cached values.
+    """
+
+    DEFAULT_MAX_SIZE = 4096
+
+    def __init__(self, max_size: int = DEFAULT_MAX_SIZE) -> None:
+        self._max_size = max(max_size, 0)
+        self._data: OrderedDict[_K, _V] = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def get(self, key: _K, factory: Callable[[], _V]) -> _V:
+        """
+        Get cached value or create and cache a new one.
+
+        Arguments:
+            key: Cache key.
+            factory: Callable to create a value on cache miss.
+
+        Returns:
+            Cached or a new value.
+        """
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self._hits += 1
+                return self._data[key]
+            self._misses += 1
+
+        value = factory()
+
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            self._evict(self._max_size)
+        return value
+
+    def _evict(self, max_size: int) -> None:
+        while len(self._data) > max_size:
+            self._data.popitem(last=False)
+            self._evictions += 1
+
+    def resize(self, max_size: int) -> None:
+        """
+        Change maximum cache size, evicting least recently used values if needed.
+
+        Arguments:
+            max_size: Maximum number of cached values.
+        """
+        with self._lock:
+            self._max_size = max(max_size, 0)
+            self._evict(self._max_size)
+
+    def clear(self) -> None:
+        """
+        Remove all cached values and reset counters.
+        """
+        with self._lock:
+            self._data.clear()
+            self._hits = 0
+            self._misses = 0
+            self._evictions = 0
+
+    def stats(self) -> ParseCacheStats:
+        """
+        Get cache counters snapshot.
+        """
+        with self._lock:
+            return ParseCacheStats(
+                hits=self._hits,
+                misses=self._misses,
+                evictions=self._evictions,
+                size=len(self._data),
+                max_size=self._max_size,
+            )
+
+    def __len__(self) -> int:
+        """
+        Get number of cached values.
+        """
+        return len(self._data)
@@ -0,0 +1,378 @@
+"""
+Opt-in timing spans and profiling reports.
+
+Functions are only registered as spans on import, they are wrapped with timers
+by `Profiler.install` and restored by `Profiler.uninstall`, so a disabled span costs nothing.
+"""
+
+import contextlib
+import functools
+import sys
+import threading
+import time
+from collections.abc import Callable, Generator
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Final, Optional, TypeVar, cast
+
+from newversion.utils import print_path
+
+_FuncT = TypeVar("_FuncT", bound=Callable[..., Any])
+_ClassT = TypeVar("_ClassT", bound=type)
+
+# when newversion started importing its own modules, to report import time of CLI calls
+IMPORT_STARTED: Final = time.perf_counter()
+
+
+@dataclass(frozen=True)
+class SpanTarget:
+    """
+    Function registered as a timing span.
+
+    Attributes:
+        module: Module name.
+        qualname: Qualified name of the function in the module.
+        name: Span name in reports.
+        detail: Argument with span detail, e.g. a file path, optionally with an attribute.
+    """
+
+    module: str
+    qualname: str
+    name: str
+    detail: Optional[str] = None
+
+
+_TARGETS: Final[list[SpanTarget]] = []
+
+
+def instrument(name: str, *, detail: Optional[str] = None) -> Callable[[_FuncT], _FuncT]:
+    """
+    Register a function or method as a timing span, the function is returned unchanged.
+
+    Arguments:
+        name: Span name, e.g. `package.get`.
+        detail: Argument name with span detail, optionally with an attribute,
+            e.g. `path` or `self.path`, spans are reported by detail as well, e.g. per file.
+
+    Examples:
+        ```python
+        @instrument("package.read", detail="path")
+        def read(self, path: Path) -> Optional[SourceFile]: ...
+        ```
+    """
+
+    def decorator(func: _FuncT) -> _FuncT:
+        _TARGETS.append(SpanTarget(func.__module__, func.__qualname__, name, detail))
+        return func
+
+    return decorator
+
+
+def instrument_methods(name: str, *, prefix: str) -> Callable[[_ClassT], _ClassT]:
+    """
+    Register every class method that starts with `prefix` as a timing span.
+
+    Span names are `<name>.<method name without prefix>`, e.g. `executor.bump`.
+    """
+
+    def decorator(cls: _ClassT) -> _ClassT:
+        for attr_name in vars(cls):
+            if attr_name.startswith(prefix):
+                _TARGETS.append(
+                    SpanTarget(
+                        cls.__module__,
+                        f"{cls.__qualname__}.{attr_name}",
+                        f"{name}.{attr_name.removeprefix(prefix)}",
+                    )
+                )
+        return cls
+
+    return decorator
+
+
+def get_targets() -> list[SpanTarget]:
+    """
+    Get all registered span targets.
+    """
+    return list(_TARGETS)
+
+
+@dataclass
+class SpanStats:
+    """
+    Calls and total time of a span.
+    """
+
+    calls: int = 0
+    seconds: float = 0.0
+    details: dict[str, "SpanStats"] = field(default_factory=dict[str, "SpanStats"])
+
+    def add(self, seconds: float) -> None:
+        """
+        Record a single call.
+        """
+        self.calls += 1
+        self.seconds += seconds
+
+
+@dataclass
+class ProfileReport:
+    """
+    Time spent in every span of a profiled call.
+
+    Span times are inclusive, so nested spans are counted in their parents as well.
+
+    Attributes:
+        total_seconds: Wall time from the start of profiling.
+        spans: Span stats by name in first call order.
+    """
+
+    total_seconds: float
+    spans: dict[str, SpanStats]
+
+    def _get_percent(self, seconds: float) -> float:
+        if not self.total_seconds:
+            return 0.0
+        return seconds / self.total_seconds * 100
+
+    def to_dict(self) -> dict[str, Any]:
+        """
+        Serialize to a JSON-compatible dict for build metrics collectors.
+        """
+        return {
+            "total_ms": round(self.total_seconds * 1000, 3),
+            "spans": [
+                {
+                    "name": name,
+                    "calls": stats.calls,
+                    "total_ms": round(stats.seconds * 1000, 3),
+                    "percent": round(self._get_percent(stats.seconds), 1),
+                    "details": [
+                        {
+                            "detail": detail,
+                            "calls": detail_stats.calls,
+                            "total_ms": round(detail_stats.seconds * 1000, 3),
+                        }
+                        for detail, detail_stats in stats.details.items()
+                    ],
+                }
+                for name, stats in self.spans.items()
+            ],
+        }
+
+    def render_text(self) -> str:
+        """
+        Render a phase breakdown table, details are indented under their spans.
+        """
+        names = [*self.spans, *(f"  {i}" for stats in self.spans.values() for i in stats.details)]
+        width = max((len(name) for name in names), default=0)
+        lines = [
+            f"profile: {self.total_seconds * 1000:.2f} ms total",
+            f"{'span':<{width}} {'calls':>8} {'ms':>10} {'%':>6}",
+        ]
+        for name, stats in self.spans.items():
+            percent = self._get_percent(stats.seconds)
+            lines.append(
+                f"{name:<{width}} {stats.calls:>8} {stats.seconds * 1000:>10.3f} {percent:>5.1f}%"
+            )
+            for detail, detail_stats in stats.details.items():
+                detail_name = f"  {detail}"
+                lines.append(
+                    f"{detail_name:<{width}} {detail_stats.calls:>8}"
+                    f" {detail_stats.seconds * 1000:>10.3f}"
+                )
+        return "\n".join(lines)
+
+
+class Profiler:
+    """
+    Collect timing spans and optional cProfile and tracemalloc stats for a call.
+
+    Registered functions are wrapped with timers only while the profiler is installed.
+    Patched functions are process-wide, so a single profiler should be installed at a time.
+    Spans of modules that are imported after `install` are not timed.
+
+    Arguments:
+        started: `time.perf_counter` value to measure total time from, now by default.
+        cprofile_path: File to dump `pstats` data to.
+        tracemalloc_path: File to dump `tracemalloc` snapshot to.
+
+    Examples:
+        ```python
+        profiler = Profiler()
+        with profiler.session():
+            Executor(path=Path("."), version=Version("1.2.3")).command_bump(VersionParts.MINOR, 1)
+        print(profiler.get_report().render_text())
+        ```
+    """
+
+    def __init__(
+        self,
+        *,
+        started: Optional[float] = None,
+        cprofile_path: Optional[Path] = None,
+        tracemalloc_path: Optional[Path] = None,
+    ) -> None:
+        self.cprofile_path = cprofile_path
+        self.tracemalloc_path = tracemalloc_path
+        self.started = started if started is not None else time.perf_counter()
+        self.finished: Optional[float] = None
+        self.spans: dict[str, SpanStats] = {}
+        self._patched: list[tuple[Any, str, object]] = []
+        self._lock = threading.Lock()
+
+    def record(self, name: str, seconds: float, detail: Optional[object] = None) -> None:
+        """
+        Record a single call of a span.
+
+        Arguments:
+            name: Span name.
+            seconds: Call duration.
+            detail: Span detail, e.g. a file path.
+        """
+        with self._lock:
+            stats = self.spans.get(name)
+            if stats is None:
+                stats = self.spans[name] = SpanStats()
+            stats.add(seconds)
+            if detail is None:
+                return
+            detail_key = print_path(detail) if isinstance(detail, Path) else str(detail)
+            detail_stats = stats.details.get(detail_key)
+            if detail_stats is None:
+                detail_stats = stats.details[detail_key] = SpanStats()
+            detail_stats.add(seconds)
+
+    @contextlib.contextmanager
+    def span(self, name: str, detail: Optional[object] = None) -> Generator[None, None, None]:
+        """
+        Time a block of code as a span.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start, detail)
+
+    @staticmethod
+    def _get_detail_getter(
+        func: Callable[..., Any], detail: str
+    ) -> Callable[[tuple[Any, ...], dict[str, Any]], object]:
+        import inspect  # noqa: PLC0415
+
+        arg_name, _, attr_name = detail.partition(".")
+        index = list(inspect.signature(func).parameters).index(arg_name)
+
+        def get_detail(args: tuple[Any, ...], kwargs: dict[str, Any]) -> object:
+            value = kwargs[arg_name] if arg_name in kwargs else args[index]
+            return getattr(value, attr_name) if attr_name else value
+
+        return get_detail
+
+    def _wrap(self, func: Callable[..., Any], target: SpanTarget) -> Callable[..., Any]:
+        record = self.record
+        perf_counter = time.perf_counter
+        get_detail = (
+            self._get_detail_getter(func, target.detail) if target.detail is not None else None
+        )
+        name = target.name
+
+        spans = self.spans
+
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:  # noqa: ANN401
+            # keep spans in call order, parents are reported before nested spans
+            if name not in spans:
+                spans.setdefault(name, SpanStats())
+            start = perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                detail = get_detail(args, kwargs) if get_detail is not None else None
+                record(name, perf_counter() - start, detail)
+
+        return wrapper
+
+    @staticmethod
+    def _resolve(target: SpanTarget) -> Optional[tuple[Any, str]]:
+        owner: Any = sys.modules.get(target.module)
+        *owner_names, attr_name = target.qualname.split(".")
+        for owner_name in owner_names:
+            owner = getattr(owner, owner_name, None)
+        if owner is None or attr_name not in vars(owner):
+            return None
+        return owner, attr_name
+
+    def _patch(self, original: object, target: SpanTarget) -> object:
+        # static and class methods are wrapped inside their descriptors
+        if isinstance(original, staticmethod):
+            func = cast("Callable[..., Any]", original.__func__)
+            return staticmethod(self._wrap(func, target))
+        if isinstance(original, classmethod):
+            func = cast("classmethod[Any, ..., Any]", original).__func__
+            return classmethod(self._wrap(func, target))
+        return self._wrap(cast("Callable[..., Any]", original), target)
+
+    def install(self) -> None:
+        """
+        Wrap all registered functions with timers.
+        """
+        for target in get_targets():
+            resolved = self._resolve(target)
+            if resolved is None:
+                continue
+            owner, attr_name = resolved
+            original = cast("object", vars(owner)[attr_name])
+            setattr(owner, attr_name, self._patch(original, target))
+            self._patched.append((owner, attr_name, original))
+
+    def uninstall(self) -> None:
+        """
+        Restore all wrapped functions.
+        """
+        for owner, attr_name, original in reversed(self._patched):
+            setattr(owner, attr_name, original)
+        self._patched.clear()
+
+    def _dump_tracemalloc(self) -> None:
+        import tracemalloc  # noqa: PLC0415
+
+        if self.tracemalloc_path is None:
+            return
+        tracemalloc.take_snapshot().dump(str(self.tracemalloc_path))
+        tracemalloc.stop()
+
+    @contextlib.contextmanager
+    def session(self) -> Generator[None, None, None]:
+        """
+        Install spans and start cProfile and tracemalloc if their output files are set.
+
+        Stats are dumped to files on exit, even if the profiled code fails.
+        """
+        with contextlib.ExitStack() as stack:
+            if self.tracemalloc_path is not None:
+                import tracemalloc  # noqa: PLC0415
+
+                tracemalloc.start()
+                stack.callback(self._dump_tracemalloc)
+            if self.cprofile_path is not None:
+                import cProfile  # noqa: PLC0415
+
+                profile = cProfile.Profile()
+                stack.callback(profile.dump_stats, str(self.cprofile_path))
+                stack.enter_context(profile)
+            self.install()
+            stack.callback(self.uninstall)
+            try:
+                yield
+            finally:
+                self.finished = time.perf_counter()
+
+    def get_report(self) -> ProfileReport:
+        """
+        Get time spent in every span.
+        """
+        finished = self.finished if self.finished is not None else time.perf_counter()
+        with self._lock:
+            spans = dict(self.spans)
+        return ProfileReport(total_seconds=finished - self.started, spans=spans)
@@ -0,0 +1,250 @@
+"""
+Section-aware `pyproject.toml` version lookup.
+"""
+
+import functools
+import importlib
+import re
+from collections.abc import Callable, Iterator
+from dataclasses import dataclass
+from typing import Any, Optional, cast
+
+from newversion.dynamic_version import DynamicVersion
+
+TomlKeyTypeDef = tuple[str, ...]
+TomlLoadsTypeDef = Callable[[str], dict[str, Any]]
+
+
+@functools.cache
+def get_toml_loads() -> Optional[TomlLoadsTypeDef]:
+    """
+    Get `loads` function of `tomllib` or `tomli`.
+
+    Returns:
+        TOML parser, `None` on Python 3.10 and older without `tomli` installed.
+    """
+    for module_name in ("tomllib", "tomli"):
+        try:
+            toml_module = importlib.import_module(module_name)
+        except ImportError:
+            continue
+        loads: TomlLoadsTypeDef = toml_module.loads
+        return loads
+    return None
+
+
+@dataclass(frozen=True)
+class TomlSpan:
+    """
+    Location of a single-line string value in a TOML file.
+
+    Attributes:
+        key: Full key path, e.g. `("project", "version")`.
+        line: Line index, starting from 0.
+        offset: Byte offset of the string content, without quotes.
+        value: String content.
+    """
+
+    key: TomlKeyTypeDef
+    line: int
+    offset: int
+    value: str
+
+
+class PyprojectFile:
+    """
+    Parsed `pyproject.toml` with an index from key paths to source spans.
+
+    The file is parsed once with `tomllib` or `tomli` to decide which key holds the
+    package version, and the index tells `set` which bytes to replace.
+    Only single-line string values outside of arrays of tables are indexed.
+
+    Arguments:
+        data: Parsed TOML document.
+        spans: String value locations by key path.
+    """
+
+    UTF8_BOM = b"\xef\xbb\xbf"
+    # static version keys in priority order
+    VERSION_KEYS: tuple[TomlKeyTypeDef, ...] = (
+        ("project", "version"),
+        ("tool", "poetry", "version"),
+    )
+
+    _RE_TABLE = re.compile(rb"^\s*\[\s*([^\[\]#]+?)\s*\]\s*(?:#.*)?$")
+    _RE_ARRAY_TABLE = re.compile(rb"^\s*\[\[")
+    _RE_KEY_PART = re.compile(rb"\"([^\"]*)\"|'([^']*)'|([A-Za-z0-9_-]+)")
+    _RE_STRING_VALUE = re.compile(
+        rb"^\s*((?:[A-Za-z0-9_-]+|\"[^\"\n]*\"|'[^'\n]*')"
+        rb"(?:\s*\.\s*(?:[A-Za-z0-9_-]+|\"[^\"\n]*\"|'[^'\n]*'))*)"
+        rb"\s*=\s*(?:\"([^\"\\\n]*)\"|'([^'\n]*)')"
+    )
+
+    def __init__(self, data: dict[str, Any], spans: dict[TomlKeyTypeDef, TomlSpan]) -> None:
+        self.data = data
+        self.spans = spans
+
+    @classmethod
+    def parse(cls, content: bytes, loads: TomlLoadsTypeDef) -> "PyprojectFile":
+        """
+        Parse file content and index string values.
+
+        Arguments:
+            content: Raw file content.
+            loads: TOML parser, see `get_toml_loads`.
+
+        Raises:
+            ValueError: If content is not valid UTF-8 TOML.
+        """
+        if content.startswith(cls.UTF8_BOM):
+            content = content[len(cls.UTF8_BOM) :]
+            offset = len(cls.UTF8_BOM)
+        else:
+            offset = 0
+        data = loads(content.decode("utf-8"))
+        spans: dict[TomlKeyTypeDef, TomlSpan] = {}
+        for span in cls._iter_spans(content, offset):
+            spans.setdefault(span.key, span)
+        return cls(data, spans)
+
+    @classmethod
+    def _parse_key(cls, key: bytes) -> TomlKeyTypeDef:
+        result: list[str] = []
+        for match in cls._RE_KEY_PART.finditer(key):
+            part = next(group for group in match.groups() if group is not None)
+            result.append(part.decode("utf-8"))
+        return tuple(result)
+
+    @classmethod
+    def _iter_spans(cls, content: bytes, offset: int) -> Iterator[TomlSpan]:
+        table: Optional[TomlKeyTypeDef] = ()
+        multiline_quote: Optional[bytes] = None
+        for index, line in enumerate(content.splitlines(keepends=True)):
+            line_offset = offset
+            offset += len(line)
+            if multiline_quote is not None:
+                if line.count(multiline_quote) % 2:
+                    multiline_quote = None
+                continue
+            if cls._RE_ARRAY_TABLE.match(line):
+                table = None
+                continue
+            match = cls._RE_TABLE.match(line)
+            if match:
+                table = cls._parse_key(match.group(1))
+                continue
+            for quote in (b'"""', b"'''"):
+                if line.count(quote) % 2:
+                    multiline_quote = quote
+            if table is None:
+                continue
+            match = cls._RE_STRING_VALUE.match(line)
+            if not match:
+                continue
+            group = 2 if match.group(2) is not None else 3
+            yield TomlSpan(
+                key=(*table, *cls._parse_key(match.group(1))),
+                line=index,
+                offset=line_offset + match.start(group),
+                value=match.group(group).decode("utf-8"),
+            )
+
+    def get(self, key: TomlKeyTypeDef) -> Any:  # noqa: ANN401
+        """
+        Get value by key path.
+
+        Returns:
+            Value, `None` if key does not exist.
+        """
+        value: Any = self.data
+        for part in key:
+            if not isinstance(value, dict):
+                return None
+            value = cast("dict[str, Any]", value).get(part)
+        return value
+
+    @property
+    def is_version_dynamic(self) -> bool:
+        """
+        Whether `[project]` declares version as dynamic.
+        """
+        dynamic = self.get(("project", "dynamic"))
+        return isinstance(dynamic, list) and "version" in cast("list[Any]", dynamic)
+
+    def get_version_key(self) -> Optional[TomlKeyTypeDef]:
+        """
+        Find the authoritative static version key.
+
+        `[project]` version wins, `[tool.poetry]` version is used for Poetry projects
+        and for `dynamic = ["version"]` projects that keep it there.
+
+        Returns:
+            Key path, `None` if there is no static version.
+        """
+        for key in self.VERSION_KEYS:
+            if isinstance(self.get(key), str):
+                return key
+        return None
+
+    def get_dynamic_version(self) -> Optional[DynamicVersion]:
+        """
+        Find where a dynamic version is read from by the build backend.
+
+        Supports `[tool.setuptools.dynamic]` `version = {attr = ...}` or `{file = ...}`
+        and `[tool.hatch.version]` `path`.
+
+        Returns:
+            Dynamic version place, `None` if version is not dynamic or its source is unknown.
+        """
+        if not self.is_version_dynamic:
+            return None
+
+        setuptools_version = self.get(("tool", "setuptools", "dynamic", "version"))
+        if isinstance(setuptools_version, dict):
+            attr = cast("dict[str, Any]", setuptools_version).get("attr")
+            if isinstance(attr, str):
+                return DynamicVersion.from_attr(attr)
+            file = cast("dict[str, Any]", setuptools_version).get("file")
+            if isinstance(file, list) and file:
+                file = cast("list[Any]", file)[0]
+            if isinstance(file, str):
+                return DynamicVersion(path=file)
+
+        hatch_path = self.get(("tool", "hatch", "version", "path"))
+        if isinstance(hatch_path, str):
+            return DynamicVersion(path=hatch_path, attribute="__version__")
+        return None
+
+    def get_package_dir(self) -> Optional[str]:
+        """
+        Get root package directory from `[tool.setuptools.package-dir]`.
+        """
+        package_dir = self.get(("tool", "setuptools", "package-dir", ""))
+        return package_dir if isinstance(package_dir, str) else None
+
+    def get_version_span(self) -> Optional[TomlSpan]:
+        """
+        Find the location of the authoritative version value.
+
+        Returns:
+            Version span, `None` if there is no static version or it cannot be located.
+        """
+        key = self.get_version_key()
+        if key is None:
+            return None
+        return self.get_span(key)
+
+    def get_span(self, key: TomlKeyTypeDef) -> Optional[TomlSpan]:
+        """
+        Find the location of a string value that matches its parsed value.
+
+        Arguments:
+            key: Dotted key parts, e.g. `("package", "version")`.
+
+        Returns:
+            Value span, `None` if the key is not defined or cannot be located.
+        """
+        span = self.spans.get(key)
+        if span is None or span.value != self.get(key):
+            return None
+        return span
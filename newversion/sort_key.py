@@ -0,0 +1,166 @@
+"""
+Byte-comparable PEP 440 sort keys.
+"""
+
+from typing import ClassVar, Union
+
+from newversion.constants import Prerelease
+from newversion.type_defs import BaseVersion
+from newversion.version import Version, VersionError
+
+
+class SortKeyOverflowError(VersionError):
+    """
+    Version cannot be represented in a fixed-width sort key.
+    """
+
+    def __init__(self, version: BaseVersion, reason: str) -> None:
+        self.message = f"Cannot encode sort key for {version!r}: {reason}"
+        super().__init__(self.message)
+
+
+class SortKeyEncoder:
+    r"""
+    Encode versions into keys that compare as plain `bytes` in PEP 440 order.
+
+    Key layout, all numbers are unsigned big-endian of `number_size` bytes:
+
+    - epoch
+    - `release_parts` release numbers, padded with zeros, so `1.2 == 1.2.0`
+    - pre-release rank byte and number: dev-only < a < b < rc < no pre-release
+    - post-release rank byte and number: no post-release < post
+    - dev rank byte and number: dev < no dev
+    - local marker byte: `0` for no local segment, `1` if it is present
+
+    This part is fixed-width. Local segment is appended as an order-preserving
+    variable-length suffix: every part is a type byte (`1` for strings, `2` for numbers)
+    followed by `\0`-terminated lowercase string or length-prefixed number,
+    and the segment ends with `\0`, so shorter segments sort first.
+
+    Arguments:
+        release_parts: Maximum number of release parts after trailing zeros are stripped.
+        number_size: Size of every number in bytes.
+
+    Examples:
+        ```python
+        encoder = SortKeyEncoder()
+        encoder.encode(Version("1.2.0rc1")) < encoder.encode(Version("1.2"))  # True
+        encoder.encode(Version("1.2")) == encoder.encode(Version("1.2.0"))  # True
+        ```
+    """
+
+    DEFAULT_RELEASE_PARTS = 6
+    DEFAULT_NUMBER_SIZE = 8
+
+    _PRE_RANK_DEV_ONLY = b"\x00"
+    _PRE_RANKS: ClassVar[dict[str, bytes]] = {
+        Prerelease.A: b"\x01",
+        Prerelease.B: b"\x02",
+        Prerelease.RC: b"\x03",
+    }
+    _PRE_RANK_STABLE = b"\x04"
+    _POST_RANK_NONE = b"\x00"
+    _POST_RANK = b"\x01"
+    _DEV_RANK = b"\x00"
+    _DEV_RANK_NONE = b"\x01"
+    _LOCAL_NONE = b"\x00"
+    _LOCAL = b"\x01"
+    _LOCAL_STR = b"\x01"
+    _LOCAL_INT = b"\x02"
+    _LOCAL_END = b"\x00"
+
+    def __init__(
+        self,
+        release_parts: int = DEFAULT_RELEASE_PARTS,
+        number_size: int = DEFAULT_NUMBER_SIZE,
+    ) -> None:
+        self.release_parts = release_parts
+        self.number_size = number_size
+        self._max_number = 256**number_size - 1
+        self._zero = bytes(number_size)
+        self.fixed_size = (
+            number_size * (1 + release_parts)  # epoch and release
+            + 3 * (1 + number_size)  # pre, post and dev
+            + 1  # local marker
+        )
+
+    def _number(self, base: BaseVersion, number: int) -> bytes:
+        if number > self._max_number:
+            raise SortKeyOverflowError(base, f"{number} does not fit in {self.number_size} bytes")
+        return number.to_bytes(self.number_size, "big")
+
+    def _encode_local(self, local: tuple[Union[int, str], ...]) -> bytes:
+        result: list[bytes] = []
+        for part in local:
+            if isinstance(part, int):
+                number = part.to_bytes((part.bit_length() + 7) // 8 or 1, "big")
+                result.extend((self._LOCAL_INT, bytes((len(number),)), number))
+                continue
+            result.extend((self._LOCAL_STR, part.lower().encode(), b"\x00"))
+        result.append(self._LOCAL_END)
+        return b"".join(result)
+
+    def encode(self, version: Version) -> bytes:
+        """
+        Encode version into a byte-comparable key.
+
+        Arguments:
+            version: Version to encode.
+
+        Returns:
+            Key bytes, at least `fixed_size` long.
+
+        Raises:
+            SortKeyOverflowError: If version does not fit into fixed-width part.
+        """
+        return self.encode_base(version.base)
+
+    def encode_base(self, base: BaseVersion) -> bytes:
+        """
+        Encode version parts into a byte-comparable key.
+
+        Arguments:
+            base: Version parts.
+
+        Returns:
+            Key bytes, at least `fixed_size` long.
+
+        Raises:
+            SortKeyOverflowError: If version does not fit into fixed-width part.
+        """
+        release = base.release
+        release_size = len(release)
+        while release_size and release[release_size - 1] == 0:
+            release_size -= 1
+        if release_size > self.release_parts:
+            raise SortKeyOverflowError(
+                base, f"more than {self.release_parts} significant release parts"
+            )
+
+        result = [self._number(base, base.epoch)]
+        result.extend(self._number(base, part) for part in release[:release_size])
+        result.append(self._zero * (self.release_parts - release_size))
+
+        if base.pre is not None:
+            result.extend((self._PRE_RANKS[base.pre[0]], self._number(base, base.pre[1])))
+        elif base.post is None and base.dev is not None:
+            result.extend((self._PRE_RANK_DEV_ONLY, self._zero))
+        else:
+            result.extend((self._PRE_RANK_STABLE, self._zero))
+
+        if base.post is not None:
+            result.extend((self._POST_RANK, self._number(base, base.post[1])))
+        else:
+            result.extend((self._POST_RANK_NONE, self._zero))
+
+        if base.dev is not None:
+            result.extend((self._DEV_RANK, self._number(base, base.dev[1])))
+        else:
+            result.extend((self._DEV_RANK_NONE, self._zero))
+
+        if base.local is None:
+            result.append(self._LOCAL_NONE)
+        else:
+            result.extend((self._LOCAL, self._encode_local(base.local)))
+
+        return b"".join(result)
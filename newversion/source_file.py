@@ -0,0 +1,191 @@
+"""
+Package files read by version sources.
+"""
+
+import functools
+import re
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+from newversion.profiling import instrument
+from newversion.version import Version
+
+SignatureTypeDef = tuple[Optional[tuple[int, int, int]], ...]
+
+UTF8_BOM = b"\xef\xbb\xbf"
+
+# LF, CRLF and CR only, unlike `str.splitlines` that splits on form feed or `\u2028` as well
+_RE_LINE_END = re.compile(r"(?<=\r\n)|(?<=\r)(?!\n)|(?<=\n)")
+
+
+@functools.cache
+def _get_bytes_pattern(pattern: re.Pattern[str]) -> re.Pattern[bytes]:
+    return re.compile(pattern.pattern.encode("utf-8"), pattern.flags & ~re.UNICODE)
+
+
+@dataclass(frozen=True)
+class VersionLocation:
+    """
+    Place where the package version was found.
+
+    Attributes:
+        path: Source file.
+        line: Line number, starting from 1.
+        version: Package version.
+    """
+
+    path: Path
+    line: int
+    version: Version
+
+
+@dataclass(frozen=True)
+class VersionMatch:
+    """
+    Version literal found in a source file.
+
+    Attributes:
+        line: Line index, starting from 0.
+        offset: Byte offset of the version literal in the file.
+        value: Version literal.
+        pattern: Pattern that matched the line, `None` for a parsed key.
+    """
+
+    line: int
+    offset: int
+    value: str
+    pattern: Optional[re.Pattern[str]]
+
+    def get_location(self, path: Path) -> VersionLocation:
+        """
+        Get version location in file `path`.
+        """
+        return VersionLocation(path, self.line + 1, Version(self.value))
+
+
+@dataclass
+class SourceFile:
+    """
+    Package file content read once per `PackageVersion` session.
+
+    Attributes:
+        path: File path.
+        signature: `(mtime_ns, size, inode)` of the file when it was read.
+        data: Raw file content.
+        text: File content decoded as UTF-8, undecodable bytes are kept as surrogates.
+        matches: Version literals found by each pattern set.
+    """
+
+    path: Path
+    signature: tuple[int, int, int]
+    data: bytes
+    text: str
+    matches: dict[tuple[re.Pattern[str], ...], list[VersionMatch]]
+
+    def get_byte_offset(self, offset: int) -> int:
+        """
+        Convert character offset in `text` to byte offset in `data`.
+        """
+        if len(self.data) == len(self.text):
+            return offset
+        return len(self.text[:offset].encode("utf-8", "surrogateescape"))
+
+    def _split_lines(self) -> list[str]:
+        lines = _RE_LINE_END.split(self.text)
+        if not lines[-1]:
+            lines.pop()
+        return lines
+
+    @instrument("source.find", detail="self.path")
+    def find(self, *patterns: re.Pattern[str]) -> list[VersionMatch]:
+        """
+        Find all lines that start with `version` and match one of `patterns`.
+
+        Lines are split on LF, CRLF and CR, results are cached for the file content.
+
+        Arguments:
+            patterns: Patterns with the version literal in the first group, checked in order.
+
+        Returns:
+            Version literals in file order.
+        """
+        cached = self.matches.get(patterns)
+        if cached is not None:
+            return cached
+
+        result: list[VersionMatch] = []
+        offset = 0
+        for index, line in enumerate(self._split_lines()):
+            line_offset = offset
+            offset += len(line)
+            if index == 0 and line.startswith("﻿"):
+                line = line[1:]  # noqa: PLW2901
+                line_offset += 1
+            if not line.lstrip().startswith("version"):
+                continue
+            for pattern in patterns:
+                match = pattern.match(line)
+                if match:
+                    result.append(
+                        VersionMatch(
+                            line=index,
+                            offset=self.get_byte_offset(line_offset + match.start(1)),
+                            value=match.group(1),
+                            pattern=pattern,
+                        )
+                    )
+                    break
+        self.matches[patterns] = result
+        return result
+
+
+def _iter_lines(f: Iterable[bytes]) -> Iterator[bytes]:
+    # file iteration splits on LF only, CR-only and mixed line endings are split here
+    for line in f:
+        if b"\r" in line:
+            yield from line.splitlines(keepends=True)
+        else:
+            yield line
+
+
+def scan_first_match(path: Path, *patterns: re.Pattern[str]) -> Optional[VersionMatch]:
+    """
+    Find the first version line without reading or decoding the rest of the file.
+
+    The file is read line by line as bytes and only the captured version is decoded.
+    Lines are split on LF, CRLF and CR only, the same way as in `SourceFile.find`.
+    UTF-8 BOM is supported.
+
+    Arguments:
+        path: File path.
+        patterns: Patterns with the version literal in the first group, checked in order.
+
+    Returns:
+        First version literal, `None` if not found.
+
+    Raises:
+        FileNotFoundError: If file does not exist.
+    """
+    bytes_patterns = [_get_bytes_pattern(pattern) for pattern in patterns]
+    offset = 0
+    with path.open("rb") as f:
+        for index, line in enumerate(_iter_lines(f)):
+            line_offset = offset
+            offset += len(line)
+            if index == 0 and line.startswith(UTF8_BOM):
+                line = line[len(UTF8_BOM) :]  # noqa: PLW2901
+                line_offset += len(UTF8_BOM)
+            if not line.lstrip().startswith(b"version"):
+                continue
+            for pattern, bytes_pattern in zip(patterns, bytes_patterns):
+                match = bytes_pattern.match(line)
+                if match:
+                    return VersionMatch(
+                        line=index,
+                        offset=line_offset + match.start(1),
+                        value=match.group(1).decode("utf-8", "surrogateescape"),
+                        pattern=pattern,
+                    )
+    return None
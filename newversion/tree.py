@@ -0,0 +1,143 @@
+"""
+Discover and read versions of every Python package in a directory tree.
+"""
+
+import os
+from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Final, Optional
+
+from newversion.exceptions import PackageVersionError
+from newversion.package_version import PackageVersion
+from newversion.utils import bind_context
+from newversion.version import Version, VersionError
+
+PACKAGE_FILE_NAMES: Final = frozenset(("pyproject.toml", "setup.cfg", "setup.py"))
+
+DEFAULT_EXCLUDE: Final = frozenset(
+    (
+        "__pycache__",
+        "node_modules",
+        "site-packages",
+        "venv",
+        "env",
+        "build",
+        "dist",
+        "vendor",
+        "_vendor",
+        "vendored",
+        "third_party",
+    )
+)
+
+
+@dataclass(frozen=True)
+class TreeEntry:
+    """
+    Package found in a tree.
+
+    Attributes:
+        path: Package root.
+        version: Package version, `None` if it cannot be determined.
+        error: Error message if version cannot be determined.
+    """
+
+    path: Path
+    version: Optional[Version]
+    error: Optional[str] = None
+
+
+def _scan_dir(path: Path, exclude: frozenset[str]) -> tuple[bool, list[Path]]:
+    is_package = False
+    subdirs: list[Path] = []
+    with os.scandir(path) as entries:
+        for entry in entries:
+            name = entry.name
+            if name in PACKAGE_FILE_NAMES:
+                is_package = is_package or entry.is_file()
+                continue
+            if name.startswith(".") or name in exclude or name.endswith(".egg-info"):
+                continue
+            if entry.is_dir(follow_symlinks=False):
+                subdirs.append(path / name)
+    return is_package, subdirs
+
+
+def find_package_roots(root: Path, exclude: Iterable[str] = ()) -> list[Path]:
+    """
+    Find all directories with Python package files in a single tree walk.
+
+    Hidden directories, `*.egg-info`, directories from `DEFAULT_EXCLUDE`
+    and directories named in `exclude` are skipped.
+
+    Arguments:
+        root: Tree root.
+        exclude: Extra directory names to skip.
+
+    Returns:
+        Sorted package roots.
+    """
+    exclude_names = DEFAULT_EXCLUDE.union(exclude)
+    result: list[Path] = []
+    stack = [root]
+    while stack:
+        path = stack.pop()
+        try:
+            is_package, subdirs = _scan_dir(path, exclude_names)
+        except OSError:
+            continue
+        if is_package:
+            result.append(path)
+        stack.extend(subdirs)
+
+    result.sort()
+    return result
+
+
+def read_package_version(path: Path) -> TreeEntry:
+    """
+    Read version of a single package.
+
+    Arguments:
+        path: Package root.
+
+    Returns:
+        Tree entry with a version or an error.
+    """
+    try:
+        return TreeEntry(path=path, version=PackageVersion(path).get())
+    except (PackageVersionError, VersionError, OSError, UnicodeDecodeError) as e:
+        return TreeEntry(path=path, version=None, error=str(e))
+
+
+class TreeReader:
+    """
+    Read versions of all packages in a tree with a thread pool.
+
+    Arguments:
+        jobs: Number of threads, `0` to pick automatically.
+        exclude: Extra directory names to skip.
+    """
+
+    def __init__(self, jobs: int = 0, exclude: Iterable[str] = ()) -> None:
+        self.jobs = jobs if jobs > 0 else min(32, (os.cpu_count() or 1) + 4)
+        self.exclude = frozenset(exclude)
+
+    def read(self, root: Path) -> list[TreeEntry]:
+        """
+        Read versions of all packages in a tree.
+
+        Arguments:
+            root: Tree root.
+
+        Returns:
+            Entries sorted by package path.
+        """
+        paths = find_package_roots(root, self.exclude)
+        if self.jobs == 1 or len(paths) < 2:  # noqa: PLR2004
+            return [read_package_version(path) for path in paths]
+
+        with ThreadPoolExecutor(max_workers=self.jobs) as executor:
+            return list(executor.map(bind_context(read_package_version), paths))
@@ -2,7 +2,14 @@
 Utility functions for newversion.
 """
 
+import contextvars
+import os
+from collections.abc import Callable
 from pathlib import Path
+from typing import TypeVar
+
+_T = TypeVar("_T")
+_R = TypeVar("_R")
 
 
 def print_path(path: Path) -> str:
@@ -20,3 +27,30 @@ def print_path(path: Path) -> str:
         return f"./{path.as_posix()}"
 
     return path.as_posix()
+
+
+def get_cache_dir() -> Path:
+    """
+    Get directory for cache files.
+
+    Returns:
+        `$XDG_CACHE_HOME/newversion`, `~/.cache` is used if `XDG_CACHE_HOME` is not set.
+    """
+    cache_home = os.environ.get("XDG_CACHE_HOME")
+    cache_dir = Path(cache_home) if cache_home else Path.home() / ".cache"
+    return cache_dir / "newversion"
+
+
+def bind_context(func: Callable[[_T], _R]) -> Callable[[_T], _R]:
+    """
+    Run every call of `func` in a copy of the current context, e.g. in worker threads.
+
+    Thread pools do not pass context variables to workers, so log records of workers
+    would not reach the stream set up by `newversion.logger.log_to_stream`.
+    """
+    context = contextvars.copy_context()
+
+    def wrapper(arg: _T) -> _R:
+        return context.copy().run(func, arg)
+
+    return wrapper
@@ -2,12 +2,21 @@
 Extended `packaging.version.Version` implementation.
 """
 
-from typing import Any, Optional, Union
+import re
+import sys
+from typing import Any, ClassVar, Final, Optional, Union, cast
 
 import packaging.version
-from typing_extensions import Self
+from packaging.version import _cmpkey  # noqa: PLC2701 # pyright: ignore[reportPrivateUsage]
+
+if sys.version_info >= (3, 11):
+    from typing import Self
+else:
+    from typing_extensions import Self
 
 from newversion.constants import Prerelease, VersionParts
+from newversion.parse_cache import ParseCache
+from newversion.profiling import instrument
 from newversion.type_defs import (
     BaseVersion,
     PrereleaseLooseTypeDef,
@@ -16,6 +25,24 @@ from newversion.type_defs import (
     ReleaseMainTypeDef,
 )
 
+# `packaging>=26` keeps version parts in slots and builds comparison key lazily,
+# older versions store `_version` NamedTuple and precomputed `_key`.
+_HAS_PARTS_SLOTS: Final = hasattr(packaging.version.Version, "_release")
+
+_PRERELEASE_LETTERS: Final = {
+    "a": Prerelease.A,
+    "alpha": Prerelease.A,
+    "b": Prerelease.B,
+    "beta": Prerelease.B,
+    "c": Prerelease.RC,
+    "rc": Prerelease.RC,
+    "pre": Prerelease.RC,
+    "preview": Prerelease.RC,
+}
+
+_RE_LOCAL_SEPARATORS: Final = re.compile(r"[._-]")
+_RE_LOCAL_PART: Final = re.compile(r"[a-z0-9]+", re.IGNORECASE)
+
 
 class VersionError(packaging.version.InvalidVersion):
     """
@@ -26,8 +53,13 @@ class VersionError(packaging.version.InvalidVersion):
 class Version(packaging.version.Version):
     """
     Extended `packaging.version.Version` implementation.
+
+    Instances are immutable, all modifiers return a new instance.
     """
 
+    parse_cache: ClassVar["ParseCache[tuple[type[Version], str], Version]"] = ParseCache()
+
+    @instrument("version.parse")
     def __init__(self, version: str) -> None:
         try:
             super().__init__(version)
@@ -41,12 +73,132 @@ class Version(packaging.version.Version):
         """
         return cls("0.0.0")
 
+    @classmethod
+    def parse(cls, version: str) -> Self:
+        """
+        Parse version string using a shared process-wide LRU cache.
+
+        Returned instances are shared between callers, so the same string
+        is parsed only once while it stays in `Version.parse_cache`.
+
+        Arguments:
+            version: Version string.
+
+        Examples:
+            ```python
+            Version.parse("1.2.3") is Version.parse("1.2.3")  # True
+            Version.parse_cache.stats().hits  # 1
+            Version.parse_cache.resize(100000)
+            Version.parse_cache.clear()
+            ```
+
+        Returns:
+            Cached or a new instance.
+
+        Raises:
+            VersionError: If version string is invalid.
+        """
+        return cast("Self", cls.parse_cache.get((cls, version), lambda: cls(version)))
+
+    @classmethod
+    def from_base(cls, base: BaseVersion) -> Self:
+        """
+        Create a new instance from version parts without rendering and parsing a string.
+
+        Pre-release names are normalized the same way as in a version string.
+
+        Arguments:
+            base: Version parts.
+
+        Examples:
+            ```python
+            Version.from_base(Version("1.2.3").base)  # "1.2.3"
+            Version.from_base(
+                BaseVersion(
+                    epoch=0,
+                    release=(1, 2, 3),
+                    pre=("alpha", 4),
+                    post=None,
+                    dev=None,
+                    local=None,
+                )
+            )  # "1.2.3a4"
+            ```
+
+        Returns:
+            A new instance.
+
+        Raises:
+            VersionError: If parts do not form a valid version.
+        """
+        new_version = cls.__new__(cls)
+        new_version._set_base(cls._normalize_base(base))
+        return new_version
+
+    @staticmethod
+    def _normalize_base(base: BaseVersion) -> BaseVersion:
+        numbers = [base.epoch, *base.release]
+        pre = base.pre
+        if pre is not None:
+            pre_letter = _PRERELEASE_LETTERS.get(pre[0].lower())
+            if pre_letter is None:
+                message = f"Invalid pre-release: {pre!r}"
+                raise VersionError(message)
+            if pre_letter != pre[0]:
+                pre = (pre_letter, pre[1])
+            numbers.append(pre[1])
+        if base.post is not None:
+            numbers.append(base.post[1])
+        if base.dev is not None:
+            numbers.append(base.dev[1])
+        if not base.release or min(numbers) < 0:
+            message = f"Invalid version: {base!r}"
+            raise VersionError(message)
+
+        if pre is base.pre:
+            return base
+        return base._replace(pre=pre)
+
+    @staticmethod
+    def _parse_local(local: str) -> tuple[Union[int, str], ...]:
+        parts = _RE_LOCAL_SEPARATORS.split(local)
+        if not all(_RE_LOCAL_PART.fullmatch(part) for part in parts):
+            message = f"Invalid local version: {local!r}"
+            raise VersionError(message)
+        return tuple(int(part) if part.isdigit() else part.lower() for part in parts)
+
+    def _set_base(self, base: BaseVersion) -> None:
+        if _HAS_PARTS_SLOTS:
+            self._epoch = base.epoch
+            self._release = base.release
+            self._pre = base.pre  # pyright: ignore[reportAttributeAccessIssue]
+            self._post = base.post  # pyright: ignore[reportAttributeAccessIssue]
+            self._dev = base.dev  # pyright: ignore[reportAttributeAccessIssue]
+            self._local = base.local
+            self._key_cache = None
+            self._hash_cache = None
+            return
+
+        self.__dict__.update(
+            _version=base,
+            _key=_cmpkey(base.epoch, base.release, base.pre, base.post, base.dev, base.local),
+        )
+
     def dumps(self) -> str:
         """
         Render to string.
         """
         return str(self)
 
+    @property
+    def sort_key(self) -> tuple[Any, ...]:
+        """
+        PEP 440 comparison key, computed once per instance.
+
+        Use it as a `key` for `sorted`, `min` and `max` to avoid pairwise comparisons.
+        """
+        return self._key
+
     @property
     def prerelease_type(self) -> Optional[PrereleaseTypeDef]:
         """
@@ -70,22 +222,23 @@ class Version(packaging.version.Version):
         """
         Underlying version NamedTuple.
         """
-        return self._version
+        if _HAS_PARTS_SLOTS:
+            return BaseVersion(
+                epoch=self._epoch,
+                release=self._release,
+                dev=self._dev,
+                pre=self._pre,
+                post=self._post,
+                local=self._local,
+            )
 
-    @base.setter
-    def base(self, base: BaseVersion) -> None:
-        self._version = base
+        return BaseVersion(*self.__dict__["_version"])
 
     def copy(self) -> Self:
         """
         Create a copy of a current version instance.
         """
-        return self.__class__(self.dumps())
-
-    def _replace(self, base: BaseVersion) -> Self:
-        new_version = self.copy()
-        new_version.base = base
-        return new_version.copy()
+        return self.from_base(self.base)
 
     def bump_release(
         self,
@@ -138,7 +291,7 @@ class Version(packaging.version.Version):
         if not self.is_stable and self.minor == 0 and self.micro == 0:
             return self.get_stable().bump_major(inc - 1)
 
-        return self._replace(
+        return self.from_base(
             BaseVersion(
                 epoch=0,
                 release=(self.major + inc, 0, 0),
@@ -173,7 +326,7 @@ class Version(packaging.version.Version):
         if not self.is_stable and self.micro == 0:
             return self.get_stable().bump_minor(inc - 1)
 
-        return self._replace(
+        return self.from_base(
             BaseVersion(
                 epoch=0,
                 release=(self.major, self.minor + inc, 0),
@@ -206,7 +359,7 @@ class Version(packaging.version.Version):
         if not self.is_stable:
             return self.get_stable().bump_micro(inc - 1)
 
-        return self._replace(
+        return self.from_base(
             BaseVersion(
                 epoch=0,
                 release=(self.major, self.minor, self.micro + inc),
@@ -294,7 +447,7 @@ class Version(packaging.version.Version):
         increment = inc if not self.base.pre else (max(self.base.pre[-1], 1) + inc)
         pre = (prerelease_type, increment)
 
-        new_version = self._replace(self._copy_base(pre=pre))
+        new_version = self.from_base(self._copy_base(pre=pre))
         if new_version < self:
             prerelease_type = release_type or VersionParts.RC.value
             new_version = self.get_stable().bump_release(bump_release)
@@ -310,7 +463,7 @@ class Version(packaging.version.Version):
             dev=None,
             local=None,
         )
-        return self._replace(base)
+        return self.from_base(base)
 
     def bump_postrelease(self, inc: int = 1) -> Self:
         """
@@ -331,18 +484,18 @@ class Version(packaging.version.Version):
             A new copy.
         """
         post = (VersionParts.POST.value, max(inc, 1))
-        base_post: Optional[tuple[str, int]] = self._version.post
+        base_post: Optional[tuple[str, int]] = self.base.post
         if base_post:
             post = (VersionParts.POST.value, max(base_post[1], 1) + inc)
         base = BaseVersion(
             epoch=0,
-            release=self._version.release,
+            release=self.release,
             pre=None,
             post=post,
             dev=None,
             local=None,
         )
-        return self._replace(base)
+        return self.from_base(base)
 
     def replace(
         self,
@@ -402,9 +555,9 @@ class Version(packaging.version.Version):
         if epoch is not None:
             kwargs[VersionParts.EPOCH.value] = epoch
         if local is not None:
-            kwargs[VersionParts.LOCAL.value] = [local]
+            kwargs[VersionParts.LOCAL.value] = self._parse_local(local)
 
-        return self._replace(self._copy_base(**kwargs))
+        return self.from_base(self._copy_base(**kwargs))
 
     @property
     def is_stable(self) -> bool:
@@ -430,7 +583,7 @@ class Version(packaging.version.Version):
         Returns:
             A new instance.
         """
-        return self._replace(
+        return self.from_base(
             BaseVersion(
                 epoch=0,
                 release=(self.major, self.minor, self.micro),
@@ -451,11 +604,12 @@ class Version(packaging.version.Version):
         post: Optional[tuple[str, int]] = None,
         local: Optional[tuple[Union[int, str], ...]] = None,
     ) -> BaseVersion:
+        base = self.base
         return BaseVersion(
-            epoch=epoch if epoch is not None else self.base.epoch,
-            release=release if release is not None else self.base.release,
-            pre=pre if pre is not None else self.base.pre,
-            post=post if post is not None else self.base.post,
-            dev=dev if dev is not None else self.base.dev,
-            local=local if local is not None else self.base.local,
+            epoch=epoch if epoch is not None else base.epoch,
+            release=release if release is not None else base.release,
+            pre=pre if pre is not None else base.pre,
+            post=post if post is not None else base.post,
+            dev=dev if dev is not None else base.dev,
+            local=local if local is not None else base.local,
         )
@@ -0,0 +1,388 @@
+"""
+Versions grouped by release line for fast series queries.
+"""
+
+import bisect
+import operator
+from collections.abc import Callable, Iterable, Iterator
+from dataclasses import dataclass
+from typing import Any, Final, Optional
+
+from newversion.constants import Prerelease, VersionParts
+from newversion.type_defs import BaseVersion, PrereleaseTypeDef
+from newversion.version import Version, VersionError
+
+GroupKeyTypeDef = tuple[int, int, int]
+SortKeyTypeDef = tuple[Any, ...]
+FlatVersionTypeDef = tuple[Any, ...]
+CounterTableTypeDef = dict[FlatVersionTypeDef, "_Counters"]
+
+SORT_KEY: Final = operator.attrgetter("sort_key")
+
+# pre-release letter and the lowest suffix of the next type, an upper bound for the type
+_PRERELEASE_BOUNDS: Final[dict[str, tuple[str, str]]] = {
+    VersionParts.ALPHA.value: (Prerelease.A, f"{Prerelease.B}0.dev0"),
+    VersionParts.BETA.value: (Prerelease.B, f"{Prerelease.RC}0.dev0"),
+    VersionParts.RC.value: (Prerelease.RC, ""),
+}
+
+
+def _flatten(base: BaseVersion, length: int) -> Optional[FlatVersionTypeDef]:
+    """
+    Get version parts as a flat tuple with release padded to `length`.
+
+    Equal versions have equal tuples, `None` if release is longer than `length`.
+    """
+    release = base.release
+    if len(release) > length:
+        if any(release[length:]):
+            return None
+        release = release[:length]
+    elif len(release) < length:
+        release = (*release, *(0,) * (length - len(release)))
+    pre_letter, pre_number = base.pre or (None, None)
+    return (
+        base.epoch,
+        *release,
+        pre_letter,
+        pre_number,
+        base.post[1] if base.post else None,
+        base.dev[1] if base.dev else None,
+        base.local,
+    )
+
+
+def _unflatten(flat: FlatVersionTypeDef, length: int) -> BaseVersion:
+    epoch, *release = flat[: length + 1]
+    pre_letter, pre_number, post, dev, local = flat[length + 1 :]
+    return BaseVersion(
+        epoch=epoch,
+        release=tuple(release),
+        pre=(pre_letter, pre_number) if pre_letter is not None else None,
+        post=(VersionParts.POST.value, post) if post is not None else None,
+        dev=(VersionParts.DEV.value, dev) if dev is not None else None,
+        local=local,
+    )
+
+
+@dataclass(frozen=True)
+class _Counters:
+    values: frozenset[int]
+    sorted_values: list[int]
+    # `value - position` does not decrease and is constant within a run of consecutive values
+    offsets: list[int]
+
+    @classmethod
+    def build(cls, values: set[int]) -> "_Counters":
+        sorted_values = sorted(values)
+        offsets = [value - position for position, value in enumerate(sorted_values)]
+        return cls(frozenset(values), sorted_values, offsets)
+
+    def get_free(self, start: int, delta: int) -> int:
+        if start not in self.values:
+            return start
+        if delta != 1:
+            value = start
+            while value in self.values:
+                value += delta
+            return value
+
+        position = bisect.bisect_left(self.sorted_values, start)
+        end = bisect.bisect_right(self.offsets, self.offsets[position], position)
+        return self.sorted_values[end - 1] + 1
+
+
+@dataclass(frozen=True)
+class _ReleaseLine:
+    keys: list[SortKeyTypeDef]
+    versions: list[Version]
+
+
+@dataclass(frozen=True)
+class _ReleaseLines:
+    group_keys: list[GroupKeyTypeDef]
+    groups: dict[GroupKeyTypeDef, _ReleaseLine]
+
+    @classmethod
+    def build(cls, versions: Iterable[Version]) -> "_ReleaseLines":
+        grouped: dict[GroupKeyTypeDef, list[Version]] = {}
+        for version in versions:
+            grouped.setdefault(VersionIndex.get_group_key(version), []).append(version)
+
+        groups: dict[GroupKeyTypeDef, _ReleaseLine] = {}
+        for group_key in sorted(grouped):
+            group = sorted(grouped[group_key], key=SORT_KEY)
+            groups[group_key] = _ReleaseLine([i.sort_key for i in group], group)
+        return cls(list(groups), groups)
+
+    def get_last(self, group_key: Optional[GroupKeyTypeDef] = None) -> Optional[Version]:
+        if group_key is None:
+            group_key = self.group_keys[-1] if self.group_keys else None
+        line = self.groups.get(group_key) if group_key is not None else None
+        return line.versions[-1] if line is not None else None
+
+
+class VersionIndex:
+    """
+    Unique versions grouped by epoch, major and minor release, each group is kept sorted.
+
+    The index is built once, then the latest version of a series or of a pre-release type
+    is found with a binary search and membership is checked with a hash lookup.
+    Release lines are grouped on the first series query, so an index used only
+    for membership and `bump` is not sorted at all.
+
+    Arguments:
+        versions: Versions to index, duplicates are dropped.
+
+    Examples:
+        ```python
+        index = VersionIndex(Version(i) for i in ["1.4.2", "1.4.10", "2.0.0rc1", "2.0.0rc2"])
+        index.latest("1.4")  # Version("1.4.10")
+        index.latest("2.0.0", prerelease="rc")  # Version("2.0.0rc2")
+        index.latest(stable_only=True)  # Version("1.4.10")
+        index.next_free(Version.bump_micro, "1.4")  # Version("1.4.11")
+        index.bump(Version("1.4.1"), Version.bump_micro)  # Version("1.4.3")
+        Version("1.4.2") in index  # True
+        ```
+    """
+
+    def __init__(self, versions: Iterable[Version] = ()) -> None:
+        self._versions = frozenset(versions)
+        self._all_lines: Optional[_ReleaseLines] = None
+        self._stable_lines: Optional[_ReleaseLines] = None
+        self._counter_tables: dict[tuple[int, int], CounterTableTypeDef] = {}
+
+    @property
+    def _all(self) -> _ReleaseLines:
+        if self._all_lines is None:
+            self._all_lines = _ReleaseLines.build(self._versions)
+        return self._all_lines
+
+    @property
+    def _stable(self) -> _ReleaseLines:
+        if self._stable_lines is None:
+            self._stable_lines = _ReleaseLines.build(i for i in self._versions if i.is_stable)
+        return self._stable_lines
+
+    def __len__(self) -> int:
+        """
+        Get number of unique versions.
+        """
+        return len(self._versions)
+
+    def __contains__(self, version: object) -> bool:
+        """
+        Check if version is in the index with a hash lookup.
+        """
+        return version in self._versions
+
+    def __iter__(self) -> Iterator[Version]:
+        """
+        Iterate over versions in ascending order.
+        """
+        for group_key in self._all.group_keys:
+            yield from self._all.groups[group_key].versions
+
+    @staticmethod
+    def get_group_key(version: Version) -> GroupKeyTypeDef:
+        """
+        Get `(epoch, major, minor)` release line of a version.
+        """
+        release = version.release
+        return (version.epoch, release[0], release[1] if len(release) > 1 else 0)
+
+    @staticmethod
+    def parse_series(series: str) -> Version:
+        """
+        Parse a release series, e.g. `1`, `1.4` or `2.0.0`.
+
+        Raises:
+            VersionError: If series is not a plain release.
+        """
+        version = Version.parse(series)
+        if version.pre or version.post is not None or version.dev is not None or version.local:
+            message = f"Invalid series: {series!r}, expected a release like 1.4"
+            raise VersionError(message)
+        return version
+
+    @staticmethod
+    def _get_release_string(version: Version, release: tuple[int, ...]) -> str:
+        epoch = f"{version.epoch}!" if version.epoch else ""
+        return f"{epoch}{'.'.join(str(i) for i in release)}"
+
+    def _get_bounds(
+        self, series: Version, prerelease: Optional[PrereleaseTypeDef]
+    ) -> tuple[SortKeyTypeDef, SortKeyTypeDef]:
+        release = series.release
+        release_string = self._get_release_string(series, release)
+        if prerelease is not None:
+            letter, upper_suffix = _PRERELEASE_BOUNDS[prerelease]
+            return (
+                Version.parse(f"{release_string}{letter}0.dev0").sort_key,
+                Version.parse(f"{release_string}{upper_suffix}").sort_key,
+            )
+
+        next_release = (*release[:-1], release[-1] + 1)
+        return (
+            Version.parse(f"{release_string}.dev0").sort_key,
+            Version.parse(f"{self._get_release_string(series, next_release)}.dev0").sort_key,
+        )
+
+    def latest(
+        self,
+        series: Optional[str] = None,
+        *,
+        prerelease: Optional[PrereleaseTypeDef] = None,
+        stable_only: bool = False,
+    ) -> Optional[Version]:
+        """
+        Find the greatest version in `O(log n)`.
+
+        Arguments:
+            series: Release prefix, e.g. `1` for `1.*`, `1.4` for `1.4.*`, all versions if `None`.
+            prerelease: Only pre-releases of this type with release equal to `series`.
+            stable_only: Skip pre- and dev releases.
+
+        Returns:
+            The greatest matching version, `None` if there is none.
+
+        Raises:
+            VersionError: If series is not a plain release.
+            ValueError: If `prerelease` is used without `series` or with `stable_only`.
+        """
+        if prerelease is not None and (series is None or stable_only):
+            message = "prerelease can be used only with series and without stable_only"
+            raise ValueError(message)
+
+        lines = self._stable if stable_only else self._all
+        if series is None:
+            return lines.get_last()
+
+        series_version = self.parse_series(series)
+        release = series_version.release
+        epoch = series_version.epoch
+        if len(release) == 1 and prerelease is None:
+            index = bisect.bisect_left(lines.group_keys, (epoch, release[0] + 1, 0)) - 1
+            group_key = lines.group_keys[index] if index >= 0 else None
+            if group_key is None or group_key[:2] != (epoch, release[0]):
+                return None
+            return lines.get_last(group_key)
+
+        line = lines.groups.get(self.get_group_key(series_version))
+        if line is None:
+            return None
+        lower, upper = self._get_bounds(series_version, prerelease)
+        start = bisect.bisect_left(line.keys, lower)
+        end = bisect.bisect_left(line.keys, upper, start)
+        return line.versions[end - 1] if end > start else None
+
+    def next_free(
+        self, bump: Callable[[Version], Version], series: Optional[str] = None
+    ) -> Version:
+        """
+        Bump the latest version of a series until the result is not in the index.
+
+        Arguments:
+            bump: Function that returns a greater version, e.g. `Version.bump_micro`.
+            series: Release prefix, all versions if `None`.
+
+        Returns:
+            The first bumped version that is not taken, the series padded to `X.Y.Z`
+            if it has no versions yet, or bumped `0.0.0` for an empty index.
+
+        Raises:
+            VersionError: If series is not a plain release.
+            ValueError: If `bump` does not increase the version.
+        """
+        latest = self.latest(series)
+        if latest is None and series is not None:
+            series_version = self.parse_series(series)
+            release = (*series_version.release, 0, 0)[: max(3, len(series_version.release))]
+            return Version(self._get_release_string(series_version, release))
+
+        return self.bump(latest or Version.zero(), bump)
+
+    @staticmethod
+    def _check_increase(version: Version, next_version: Version) -> None:
+        if next_version.sort_key <= version.sort_key:
+            message = f"Bump of {version} does not increase it: {next_version}"
+            raise ValueError(message)
+
+    @staticmethod
+    def _find_step(
+        flat: FlatVersionTypeDef, next_flat: FlatVersionTypeDef
+    ) -> Optional[tuple[int, int]]:
+        positions = [i for i, (old, new) in enumerate(zip(flat, next_flat)) if old != new]
+        if len(positions) != 1:
+            return None
+        position = positions[0]
+        old, new = flat[position], next_flat[position]
+        if not isinstance(old, int) or not isinstance(new, int) or new <= old:
+            return None
+        return position, new - old
+
+    def _get_counter_table(self, length: int, position: int) -> CounterTableTypeDef:
+        key = (length, position)
+        if key in self._counter_tables:
+            return self._counter_tables[key]
+
+        grouped: dict[FlatVersionTypeDef, set[int]] = {}
+        for version in self._versions:
+            flat = _flatten(version.base, length)
+            if flat is None or not isinstance(flat[position], int):
+                continue
+            grouped.setdefault((*flat[:position], *flat[position + 1 :]), set()).add(flat[position])
+        table = {group_key: _Counters.build(values) for group_key, values in grouped.items()}
+        self._counter_tables[key] = table
+        return table
+
+    def bump(self, version: Version, bump: Callable[[Version], Version]) -> Version:
+        """
+        Find the smallest bump of a version that is not in the index.
+
+        `bump` is applied to its own result until the result is free. When repeated bumps
+        change a single number by a fixed step, e.g. `rc1`, `rc2`, `rc3`, taken numbers are
+        grouped once per step kind: a run of consecutive taken numbers is skipped with
+        a binary search, other steps use hash lookups, and no versions are created
+        for taken candidates.
+
+        Arguments:
+            version: Version to bump.
+            bump: Function that returns a greater version, e.g. `Version.bump_micro`.
+
+        Returns:
+            The first bumped version that is not taken.
+
+        Raises:
+            ValueError: If `bump` does not increase the version.
+        """
+        candidate = bump(version)
+        self._check_increase(version, candidate)
+        if candidate not in self._versions:
+            return candidate
+
+        next_candidate = bump(candidate)
+        self._check_increase(candidate, next_candidate)
+        length = max(len(candidate.release), len(next_candidate.release))
+        flat = _flatten(candidate.base, length)
+        next_flat = _flatten(next_candidate.base, length)
+        step = self._find_step(flat, next_flat) if flat and next_flat else None
+        if flat is None or step is None:
+            return self._bump_linear(next_candidate, bump)
+
+        position, delta = step
+        counters = self._get_counter_table(length, position).get(
+            (*flat[:position], *flat[position + 1 :])
+        )
+        if counters is None:
+            return self._bump_linear(next_candidate, bump)
+        counter = counters.get_free(flat[position], delta)
+        result = (*flat[:position], counter, *flat[position + 1 :])
+        return Version.from_base(_unflatten(result, length))
+
+    def _bump_linear(self, version: Version, bump: Callable[[Version], Version]) -> Version:
+        while version in self._versions:
+            next_version = bump(version)
+            self._check_increase(version, next_version)
+            version = next_version
+        return version
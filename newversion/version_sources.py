@@ -0,0 +1,662 @@
+"""
+Registry of package version sources.
+"""
+
+import abc
+import logging
+import os
+import re
+import sys
+import threading
+from collections.abc import Iterable, Sequence
+from pathlib import Path
+from typing import TYPE_CHECKING, ClassVar, Final, Optional
+
+from newversion.constants import LOGGER_NAME
+from newversion.dynamic_version import VERSION_FILE_NAMES, DynamicVersion, get_setup_py_versions
+from newversion.eol_fixer import EOLFixer
+from newversion.exceptions import VersionSourceError
+from newversion.file_edit import BytePatch, FileEdit
+from newversion.profiling import instrument
+from newversion.pyproject import TomlKeyTypeDef, get_toml_loads
+from newversion.source_file import SourceFile, VersionLocation, VersionMatch, scan_first_match
+from newversion.utils import print_path
+from newversion.version import Version
+
+if TYPE_CHECKING:
+    from newversion.package_version import PackageVersion
+
+FoundTypeDef = Optional[tuple[SourceFile, VersionMatch]]
+
+
+def _get_location(found: FoundTypeDef) -> Optional[VersionLocation]:
+    if found is None:
+        return None
+    source, match = found
+    return match.get_location(source.path)
+
+
+def _plan_found(
+    package: "PackageVersion", found: FoundTypeDef, version: Version
+) -> Optional[FileEdit]:
+    if found is None:
+        return None
+    source, match = found
+    return package.plan_patch(source, [match], version)
+
+
+class VersionSource(abc.ABC):
+    """
+    Base class for a package file that defines the package version.
+
+    Subclasses set `name` and `file_names`, and implement abstract `locate` and `plan_set`,
+    a subclass that misses them cannot be instantiated.
+    Custom sources are registered in `newversion.sources` entry point group,
+    an entry point can be a `VersionSource` subclass or instance.
+
+    Examples:
+        ```python
+        class ChartSource(VersionSource):
+            name = "helm"
+            file_names = ("Chart.yaml",)
+            RE_VERSION = re.compile(r"^version: (.+)$")
+
+            def locate(self, package, paths):
+                source = package.read(paths[0])
+                matches = source.find(self.RE_VERSION) if source else []
+                return matches[0].get_location(paths[0]) if matches else None
+
+            def plan_set(self, package, paths, version):
+                source = package.read(paths[0])
+                return package.plan_patch(source, source.find(self.RE_VERSION), version)
+        ```
+    """
+
+    name: ClassVar[str] = ""
+    file_names: ClassVar[tuple[str, ...]] = ()
+
+    def __init__(self) -> None:
+        self._logger = logging.getLogger(LOGGER_NAME)
+
+    def match(self, entry: "os.DirEntry[str]") -> bool:
+        """
+        Check if a package root directory entry belongs to this source.
+        """
+        return entry.name in self.file_names and entry.is_file()
+
+    @abc.abstractmethod
+    def locate(self, package: "PackageVersion", paths: list[Path]) -> Optional[VersionLocation]:
+        """
+        Find package version.
+
+        Arguments:
+            package: Package session, use its `read` to read files.
+            paths: Matched package root entries, sorted by `file_names` order.
+
+        Returns:
+            Version location, `None` if version is not defined in this source.
+        """
+
+    @abc.abstractmethod
+    def plan_set(
+        self, package: "PackageVersion", paths: list[Path], version: Version
+    ) -> Optional[FileEdit]:
+        """
+        Prepare a change that sets package version.
+
+        Arguments:
+            package: Package session, use its `read` and `plan_patch` to plan an edit.
+            paths: Matched package root entries, sorted by `file_names` order.
+            version: New version.
+
+        Returns:
+            File edit, `None` if nothing needs to be changed.
+        """
+
+
+class PyprojectSource(VersionSource):
+    """
+    `[project]` or `[tool.poetry]` version in `pyproject.toml`, or a dynamic version it defines.
+    """
+
+    name = "pyproject"
+    file_names = ("pyproject.toml",)
+    RE_VERSION = re.compile(r"^version\s*=\s*['\"](\S+)['\"]")
+
+    def _find(self, package: "PackageVersion", source: SourceFile) -> list[VersionMatch]:
+        pyproject = package.parse_toml(source)
+        if pyproject is None:
+            return source.find(self.RE_VERSION)
+
+        span = pyproject.get_version_span()
+        if span is not None:
+            match = VersionMatch(line=span.line, offset=span.offset, value=span.value, pattern=None)
+            return [match]
+        if pyproject.get_version_key() is not None:
+            self._logger.debug(f"Cannot locate version in {print_path(source.path)}")
+            return source.find(self.RE_VERSION)
+        if pyproject.is_version_dynamic:
+            self._logger.debug(f"Version is dynamic in {print_path(source.path)}")
+        return []
+
+    @staticmethod
+    def _get_dynamic(package: "PackageVersion", source: SourceFile) -> Optional[DynamicVersion]:
+        pyproject = package.parse_toml(source)
+        return pyproject.get_dynamic_version() if pyproject is not None else None
+
+    def locate(self, package: "PackageVersion", paths: list[Path]) -> Optional[VersionLocation]:
+        """
+        Find package version in `pyproject.toml`.
+        """
+        path = paths[0]
+        self._logger.debug(f"Found {print_path(path)}, extracting version from it")
+        if get_toml_loads() is None:
+            match = scan_first_match(path, self.RE_VERSION)
+            return match.get_location(path) if match else None
+
+        source = package.read(path)
+        if source is None:
+            return None
+        matches = self._find(package, source)
+        if matches:
+            return matches[0].get_location(path)
+        dynamic = self._get_dynamic(package, source)
+        if dynamic is None:
+            return None
+        self._logger.debug(f"Resolving dynamic version in {print_path(path)}")
+        return _get_location(package.find_dynamic(dynamic))
+
+    def plan_set(
+        self, package: "PackageVersion", paths: list[Path], version: Version
+    ) -> Optional[FileEdit]:
+        """
+        Prepare a `pyproject.toml` or dynamic version source change.
+        """
+        source = package.read(paths[0])
+        if source is None:
+            return None
+
+        matches = self._find(package, source)
+        dynamic = None if matches else self._get_dynamic(package, source)
+        if dynamic is not None:
+            return _plan_found(package, package.find_dynamic(dynamic), version)
+        return package.plan_patch(source, matches, version)
+
+
+class SetupCfgSource(VersionSource):
+    """
+    `version` in `setup.cfg`, including `file:` and `attr:` directives.
+    """
+
+    name = "setup_cfg"
+    file_names = ("setup.cfg",)
+    RE_FILE = re.compile(r"^version\s*=\s*file:\s*(\S+)")
+    RE_ATTR = re.compile(r"^version\s*=\s*attr:\s*(\S+)")
+    RE_VERSION = re.compile(r"^version\s*=\s*(\S+)")
+
+    def locate(self, package: "PackageVersion", paths: list[Path]) -> Optional[VersionLocation]:
+        """
+        Find package version in `setup.cfg`.
+        """
+        path = paths[0]
+        self._logger.debug(f"Found {print_path(path)}, extracting version from it")
+        match = scan_first_match(path, self.RE_FILE, self.RE_ATTR, self.RE_VERSION)
+        if match is None:
+            return None
+
+        if match.pattern is self.RE_FILE:
+            version_path = package.path / Path(match.value)
+            self._logger.debug(f"Getting version from {match.value}")
+            version_source = package.read(version_path)
+            if version_source is None:
+                raise FileNotFoundError(version_path)
+            return VersionLocation(version_path, 1, Version(version_source.text.strip()))
+
+        if match.pattern is self.RE_ATTR:
+            self._logger.debug(f"Getting version from {match.value}")
+            return _get_location(package.find_dynamic(DynamicVersion.from_attr(match.value)))
+
+        self._logger.debug(f"Version {match.value} found")
+        return match.get_location(path)
+
+    def plan_set(
+        self, package: "PackageVersion", paths: list[Path], version: Version
+    ) -> Optional[FileEdit]:
+        """
+        Prepare a `setup.cfg` or referenced version file change.
+        """
+        source = package.read(paths[0])
+        if source is None:
+            return None
+
+        new_version = version.dumps()
+        matches: list[VersionMatch] = []
+        for match in source.find(self.RE_FILE, self.RE_ATTR, self.RE_VERSION):
+            if match.pattern is self.RE_FILE:
+                self._logger.info(f"Changing version in {match.value} to {new_version}")
+                version_path = package.path / Path(match.value)
+                return self._plan_version_file(package, version_path, source, version)
+            if match.pattern is self.RE_ATTR:
+                found = package.find_dynamic(DynamicVersion.from_attr(match.value))
+                return _plan_found(package, found, version)
+            matches.append(match)
+            if match.value == new_version:
+                break
+
+        return package.plan_patch(source, matches, version)
+
+    @staticmethod
+    def _plan_version_file(
+        package: "PackageVersion", path: Path, setup_cfg: SourceFile, version: Version
+    ) -> FileEdit:
+        source = package.read(path)
+        if source is None or not source.data.strip():
+            line_ending = EOLFixer.get_line_ending(setup_cfg.text)
+            return FileEdit.from_text(path, f"{version.dumps()}{line_ending}")
+
+        old_version = source.data.strip()
+        patch = BytePatch(
+            offset=len(source.data) - len(source.data.lstrip()),
+            old=old_version,
+            new=version.dumps().encode("utf-8"),
+        )
+        return FileEdit.from_patches(path, source.data, [patch])
+
+
+class SetupPySource(VersionSource):
+    """
+    `version` argument of `setup()` in `setup.py`, literal or computed.
+    """
+
+    name = "setup_py"
+    file_names = ("setup.py",)
+    RE_VERSION = re.compile(r"^\s*version\s*=\s*['\"](\S+)['\"]\s*,?")
+
+    @staticmethod
+    def _find_dynamic(package: "PackageVersion", source: SourceFile) -> FoundTypeDef:
+        for dynamic in get_setup_py_versions(source.data):
+            found = package.find_dynamic(dynamic)
+            if found is not None:
+                return found
+        return None
+
+    def locate(self, package: "PackageVersion", paths: list[Path]) -> Optional[VersionLocation]:
+        """
+        Find package version in `setup.py`.
+        """
+        path = paths[0]
+        self._logger.debug(f"Found {print_path(path)}, extracting version from it")
+        match = scan_first_match(path, self.RE_VERSION)
+        if match is not None:
+            self._logger.debug(f"Version {match.value} found")
+            return match.get_location(path)
+
+        source = package.read(path)
+        if source is None:
+            return None
+        self._logger.debug(f"Resolving computed version in {print_path(path)}")
+        return _get_location(self._find_dynamic(package, source))
+
+    def plan_set(
+        self, package: "PackageVersion", paths: list[Path], version: Version
+    ) -> Optional[FileEdit]:
+        """
+        Prepare a `setup.py` or computed version source change.
+        """
+        source = package.read(paths[0])
+        if source is None:
+            return None
+
+        matches = source.find(self.RE_VERSION)
+        if not matches:
+            return _plan_found(package, self._find_dynamic(package, source), version)
+        return package.plan_patch(source, matches, version)
+
+
+class ModuleSource(VersionSource):
+    """
+    `__version__` in a root module or in a package directory, including `src` layout.
+    """
+
+    name = "module"
+    file_names = ("_version.py", "__about__.py", "__init__.py")
+    EXCLUDE_NAMES: Final = frozenset(
+        (
+            "test",
+            "tests",
+            "doc",
+            "docs",
+            "example",
+            "examples",
+            "scripts",
+            "benchmarks",
+            "build",
+            "dist",
+            "env",
+            "venv",
+            "vendor",
+            "third_party",
+        )
+    )
+
+    def match(self, entry: "os.DirEntry[str]") -> bool:
+        """
+        Match root modules and directories that can be Python packages.
+        """
+        if entry.name in self.file_names:
+            return entry.is_file()
+        return (
+            entry.name.isidentifier()
+            and entry.name not in self.EXCLUDE_NAMES
+            and not entry.name.startswith("_")
+            and entry.is_dir()
+        )
+
+    def _iter_module_paths(self, paths: list[Path]) -> Iterable[Path]:
+        dir_paths: list[Path] = []
+        for path in paths:
+            if path.name in self.file_names:
+                yield path
+                continue
+            if path.name == "src":
+                with os.scandir(path) as entries:
+                    dir_paths.extend(Path(entry.path) for entry in entries if self.match(entry))
+                continue
+            dir_paths.append(path)
+        for dir_path in dir_paths:
+            for file_name in self.file_names:
+                yield dir_path / file_name
+
+    def _find(self, package: "PackageVersion", paths: list[Path]) -> FoundTypeDef:
+        for path in self._iter_module_paths(paths):
+            relative_path = path.relative_to(package.path).as_posix()
+            found = package.find_dynamic(
+                DynamicVersion(path=relative_path, attribute="__version__")
+            )
+            if found is not None:
+                return found
+        return None
+
+    def locate(self, package: "PackageVersion", paths: list[Path]) -> Optional[VersionLocation]:
+        """
+        Find `__version__` in package modules.
+        """
+        return _get_location(self._find(package, paths))
+
+    def plan_set(
+        self, package: "PackageVersion", paths: list[Path], version: Version
+    ) -> Optional[FileEdit]:
+        """
+        Prepare a `__version__` change.
+        """
+        return _plan_found(package, self._find(package, paths), version)
+
+
+class VersionFileSource(VersionSource):
+    """
+    Plain text version file in the package root.
+    """
+
+    name = "version_file"
+    file_names = VERSION_FILE_NAMES
+
+    @staticmethod
+    def _find(package: "PackageVersion", paths: list[Path]) -> FoundTypeDef:
+        for path in paths:
+            found = package.find_dynamic(DynamicVersion(path=path.name))
+            if found is not None:
+                return found
+        return None
+
+    def locate(self, package: "PackageVersion", paths: list[Path]) -> Optional[VersionLocation]:
+        """
+        Read version from a version file.
+        """
+        return _get_location(self._find(package, paths))
+
+    def plan_set(
+        self, package: "PackageVersion", paths: list[Path], version: Version
+    ) -> Optional[FileEdit]:
+        """
+        Prepare a version file change.
+        """
+        return _plan_found(package, self._find(package, paths), version)
+
+
+class PackageJsonSource(VersionSource):
+    """
+    Top-level `version` in `package.json`.
+    """
+
+    name = "package_json"
+    file_names = ("package.json",)
+    _RE_TOKEN = re.compile(rb'"(?:[^"\\]|\\.)*"|[{}\[\]:,]')
+
+    def _find(self, package: "PackageVersion", path: Path) -> FoundTypeDef:
+        source = package.read(path)
+        if source is None:
+            return None
+
+        depth = 0
+        tokens = list(self._RE_TOKEN.finditer(source.data))
+        for index, token in enumerate(tokens):
+            value = token.group()
+            if value in {b"{", b"["}:
+                depth += 1
+            elif value in {b"}", b"]"}:
+                depth -= 1
+            elif depth == 1 and value == b'"version"' and index + 2 < len(tokens):
+                separator, version_token = tokens[index + 1], tokens[index + 2]
+                if separator.group() != b":" or not version_token.group().startswith(b'"'):
+                    continue
+                offset = version_token.start() + 1
+                match = VersionMatch(
+                    line=source.data.count(b"\n", 0, offset),
+                    offset=offset,
+                    value=version_token.group()[1:-1].decode("utf-8", "surrogateescape"),
+                    pattern=None,
+                )
+                return source, match
+        return None
+
+    def locate(self, package: "PackageVersion", paths: list[Path]) -> Optional[VersionLocation]:
+        """
+        Find version in `package.json`.
+        """
+        return _get_location(self._find(package, paths[0]))
+
+    def plan_set(
+        self, package: "PackageVersion", paths: list[Path], version: Version
+    ) -> Optional[FileEdit]:
+        """
+        Prepare a `package.json` change.
+        """
+        return _plan_found(package, self._find(package, paths[0]), version)
+
+
+class CargoTomlSource(VersionSource):
+    """
+    `[package]` or `[workspace.package]` version in `Cargo.toml`.
+    """
+
+    name = "cargo"
+    file_names = ("Cargo.toml",)
+    VERSION_KEYS: tuple[TomlKeyTypeDef, ...] = (
+        ("package", "version"),
+        ("workspace", "package", "version"),
+    )
+
+    def _find(self, package: "PackageVersion", path: Path) -> FoundTypeDef:
+        source = package.read(path)
+        cargo = package.parse_toml(source) if source is not None else None
+        if source is None or cargo is None:
+            return None
+
+        for key in self.VERSION_KEYS:
+            span = cargo.get_span(key)
+            if span is not None:
+                match = VersionMatch(
+                    line=span.line, offset=span.offset, value=span.value, pattern=None
+                )
+                return source, match
+        return None
+
+    def locate(self, package: "PackageVersion", paths: list[Path]) -> Optional[VersionLocation]:
+        """
+        Find version in `Cargo.toml`.
+        """
+        return _get_location(self._find(package, paths[0]))
+
+    def plan_set(
+        self, package: "PackageVersion", paths: list[Path], version: Version
+    ) -> Optional[FileEdit]:
+        """
+        Prepare a `Cargo.toml` change.
+        """
+        return _plan_found(package, self._find(package, paths[0]), version)
+
+
+class VersionSourceRegistry:
+    """
+    Named version sources matched against a package root in a single directory scan.
+
+    Sources from `newversion.sources` entry points are loaded on first lookup
+    of a name that is not registered.
+
+    Arguments:
+        sources: Sources to register.
+    """
+
+    ENTRY_POINT_GROUP: Final = "newversion.sources"
+
+    def __init__(self, sources: Iterable[VersionSource] = ()) -> None:
+        self._sources: dict[str, VersionSource] = {}
+        self._entry_points_loaded = False
+        self._lock = threading.Lock()
+        for source in sources:
+            self.register(source)
+
+    @property
+    def names(self) -> list[str]:
+        """
+        Registered source names in registration order.
+        """
+        return list(self._sources)
+
+    def register(self, source: VersionSource) -> None:
+        """
+        Register a source, replacing a source with the same name.
+        """
+        self._sources[source.name] = source
+
+    def load_entry_points(self) -> None:
+        """
+        Register sources from `newversion.sources` entry points, built-in sources are kept.
+
+        Raises:
+            VersionSourceError: If an entry point is not a `VersionSource`
+                or does not implement its abstract methods.
+        """
+        import importlib.metadata  # noqa: PLC0415
+
+        with self._lock:
+            if self._entry_points_loaded:
+                return
+            self._entry_points_loaded = True
+            if sys.version_info >= (3, 10):
+                entry_points = list(importlib.metadata.entry_points(group=self.ENTRY_POINT_GROUP))
+            else:
+                entry_points = importlib.metadata.entry_points().get(self.ENTRY_POINT_GROUP, [])
+            for entry_point in entry_points:
+                source = self._get_entry_point_source(entry_point.name, entry_point.load())
+                self._sources.setdefault(source.name, source)
+
+    @staticmethod
+    def _get_entry_point_source(name: str, loaded: object) -> VersionSource:
+        if isinstance(loaded, type) and issubclass(loaded, VersionSource):
+            abstract_methods = sorted(getattr(loaded, "__abstractmethods__", ()))
+            if abstract_methods:
+                message = f"entry point {name} does not implement {', '.join(abstract_methods)}"
+                raise VersionSourceError(message)
+            loaded = loaded()
+        if not isinstance(loaded, VersionSource):
+            message = f"entry point {name} is not a VersionSource"
+            raise VersionSourceError(message)
+        return loaded
+
+    def get(self, name: str) -> VersionSource:
+        """
+        Get source by name.
+
+        Raises:
+            VersionSourceError: If source is not registered.
+        """
+        if name not in self._sources:
+            self.load_entry_points()
+        source = self._sources.get(name)
+        if source is None:
+            message = f"unknown source {name}"
+            raise VersionSourceError(message)
+        return source
+
+    def get_file_paths(self, path: Path) -> list[Path]:
+        """
+        Get paths of all files that registered sources look for in a package root.
+        """
+        return [path / name for source in self._sources.values() for name in source.file_names]
+
+    @staticmethod
+    @instrument("sources.scan", detail="path")
+    def scan(path: Path, sources: Sequence[VersionSource]) -> dict[str, list[Path]]:
+        """
+        List package root once and match every entry to sources.
+
+        Arguments:
+            path: Package root.
+            sources: Sources to match.
+
+        Returns:
+            Matched paths for every source, sorted by `file_names` order and then by name.
+        """
+        result: dict[str, list[Path]] = {source.name: [] for source in sources}
+        try:
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    for source in sources:
+                        if source.match(entry):
+                            result[source.name].append(Path(entry.path))
+        except (FileNotFoundError, NotADirectoryError):
+            return result
+
+        for source in sources:
+            order = {name: index for index, name in enumerate(source.file_names)}
+            result[source.name].sort(key=lambda i: (order.get(i.name, len(order)), i.name))
+        return result
+
+
+DEFAULT_SOURCE_NAMES: Final = (
+    PyprojectSource.name,
+    SetupCfgSource.name,
+    SetupPySource.name,
+    ModuleSource.name,
+    VersionFileSource.name,
+    PackageJsonSource.name,
+    CargoTomlSource.name,
+)
+DEFAULT_AUTHORITATIVE_NAMES: Final = (
+    PyprojectSource.name,
+    SetupCfgSource.name,
+    SetupPySource.name,
+)
+
+default_registry = VersionSourceRegistry(
+    (
+        PyprojectSource(),
+        SetupCfgSource(),
+        SetupPySource(),
+        ModuleSource(),
+        VersionFileSource(),
+        PackageJsonSource(),
+        CargoTomlSource(),
+    )
+)
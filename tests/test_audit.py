@@ -0,0 +1,76 @@
+import io
+import json
+import tempfile
+from collections.abc import Iterator
+from pathlib import Path
+
+import pytest
+
+from newversion.audit import Auditor, audit_package
+from newversion.main import run_cli
+from newversion.version import Version
+
+
+@pytest.fixture
+def tree_path() -> Iterator[Path]:
+    with tempfile.TemporaryDirectory() as path_str:
+        path = Path(path_str)
+        files = {
+            "packages/a/pyproject.toml": '[project]\nname = "a"\nversion = "1.0.0"\n',
+            "packages/a/src/a/__init__.py": '__version__ = "1.0.0"\n',
+            "packages/a/VERSION": "1.0\n",
+            "packages/b/setup.cfg": "[metadata]\nversion = 2.0.0\n",
+            "packages/b/b/__init__.py": '__version__ = "2.0.1"\n',
+            "packages/c/pyproject.toml": '[project]\ndynamic = ["version"]\n',
+        }
+        for name, text in files.items():
+            (path / name).parent.mkdir(parents=True, exist_ok=True)
+            (path / name).write_text(text)
+        yield path
+
+
+class TestAudit:
+    def test_audit_package(self, tree_path: Path) -> None:
+        entry = audit_package(tree_path / "packages/a")
+        assert list(entry.locations) == ["pyproject", "module", "version_file"]
+        assert entry.versions == [Version("1.0.0")]
+        assert entry.is_consistent
+
+        entry = audit_package(tree_path / "packages/b")
+        assert entry.versions == [Version("2.0.0"), Version("2.0.1")]
+        assert entry.locations["module"].path == tree_path / "packages/b/b/__init__.py"
+        assert not entry.is_consistent
+
+        entry = audit_package(tree_path / "packages/c")
+        assert entry.error
+        assert not entry.is_consistent
+
+    def test_audit_tree(self, tree_path: Path) -> None:
+        entries = Auditor(jobs=4).audit_tree(tree_path)
+        assert [i.path.name for i in entries] == ["a", "b", "c"]
+        assert [i.is_consistent for i in entries] == [True, False, False]
+        assert Auditor(jobs=1).audit_tree(tree_path) == entries
+
+    def test_cli(self, tree_path: Path) -> None:
+        stdout = io.StringIO()
+        stderr = io.StringIO()
+        args = ["--tree", ".", "audit"]
+        code = run_cli(args, stdin=io.StringIO(), stdout=stdout, stderr=stderr, cwd=tree_path)
+        assert code == 1
+        assert stdout.getvalue() == (
+            "packages/b/setup.cfg:2 2.0.0 setup_cfg\npackages/b/b/__init__.py:1 2.0.1 module\n"
+        )
+        assert "packages/c" in stderr.getvalue()
+
+        stdout = io.StringIO()
+        args = ["--path", "packages/a", "--format", "json", "audit"]
+        code = run_cli(args, stdin=io.StringIO(), stdout=stdout, stderr=stderr, cwd=tree_path)
+        assert code == 0
+        result = json.loads(stdout.getvalue())
+        assert result["."]["consistent"] is True
+        assert result["."]["locations"][2] == {
+            "source": "version_file",
+            "path": "VERSION",
+            "line": 1,
+            "version": "1.0",
+        }
@@ -0,0 +1,86 @@
+import io
+import logging
+from pathlib import Path
+
+import pytest
+
+from newversion.batch import BatchRunner, clean_version_line
+from newversion.constants import InvalidLinePolicy, VersionParts
+from newversion.exceptions import CLIError, ValueMustBeIntError
+from newversion.main import run_cli
+from newversion.version import Version
+
+LINES = ["1.2.3\n", 'version = "2.0.0rc1"\n', "\n", "invalid\n", "3.4.5.dev1\n"]
+
+
+def bump_minor(version: Version) -> str:
+    return version.bump_minor().dumps()
+
+
+class TestBatchRunner:
+    def test_clean_version_line(self) -> None:
+        assert clean_version_line("1.2.3\n") == "1.2.3"
+        assert clean_version_line('version = "1.2.3"\r\n') == "1.2.3"
+        assert not clean_version_line("  \n")
+
+    def test_run(self) -> None:
+        output = io.StringIO()
+        runner = BatchRunner(bump_minor, on_invalid=InvalidLinePolicy.SKIP, chunk_size=2)
+        runner.run(LINES, output)
+        assert output.getvalue() == "1.3.0\n2.0.0\n3.5.0\n"
+        assert runner.invalid_count == 1
+
+    def test_run_abort(self) -> None:
+        output = io.StringIO()
+        runner = BatchRunner(bump_minor, chunk_size=10)
+        with pytest.raises(CLIError, match="Line 4"):
+            runner.run(LINES, output)
+        assert output.getvalue() == "1.3.0\n2.0.0\n"
+
+    def test_run_report(self, caplog: pytest.LogCaptureFixture) -> None:
+        def fail(version: Version) -> str:
+            raise ValueMustBeIntError(VersionParts.MAJOR, version.dumps())
+
+        output = io.StringIO()
+        runner = BatchRunner(fail, on_invalid=InvalidLinePolicy.REPORT)
+        with caplog.at_level(logging.ERROR):
+            runner.run(["1.2.3"], output)
+        assert not output.getvalue()
+        assert runner.invalid_count == 1
+        assert "Line 1: Value for major must be a number" in caplog.text
+
+    def test_process_line(self) -> None:
+        runner = BatchRunner(lambda _version: None)
+        assert runner.process_line("1.2.3", 1) is None
+        assert runner.process_line("", 2) is None
+
+    def test_iter_versions(self) -> None:
+        runner = BatchRunner(on_invalid=InvalidLinePolicy.SKIP)
+        versions = list(runner.iter_versions(LINES))
+        assert versions == [Version("1.2.3"), Version("2.0.0rc1"), Version("3.4.5.dev1")]
+        assert runner.invalid_count == 1
+        with pytest.raises(CLIError, match="Line 4"):
+            list(BatchRunner().iter_versions(LINES))
+
+    def test_each_package_commands(self, tmp_path: Path) -> None:
+        pyproject_path = tmp_path / "pyproject.toml"
+        pyproject_path.write_text('[project]\nversion = "1.2.3"\n', encoding="utf-8")
+        (tmp_path / "versions.txt").write_text("2.0.0\n3.0.0\n", encoding="utf-8")
+        for args in (
+            ["--each", "set_package"],
+            ["--each", "package"],
+            ["--each-file", "versions.txt", "set_package"],
+        ):
+            stdout = io.StringIO()
+            stderr = io.StringIO()
+            code = run_cli(
+                args,
+                stdin=io.StringIO("2.0.0\n3.0.0\n"),
+                stdout=stdout,
+                stderr=stderr,
+                cwd=tmp_path,
+            )
+            assert code == 2
+            assert not stdout.getvalue()
+            assert "--each cannot be used with" in stderr.getvalue()
+        assert pyproject_path.read_text(encoding="utf-8") == '[project]\nversion = "1.2.3"\n'
@@ -0,0 +1,128 @@
+import io
+import tempfile
+from collections.abc import Iterator
+from pathlib import Path
+
+import pytest
+
+from newversion.bulk import BulkSetter, parse_manifest
+from newversion.exceptions import FileEditConflictError, ManifestError
+from newversion.main import run_cli
+from newversion.version import Version
+
+
+@pytest.fixture
+def tree_path() -> Iterator[Path]:
+    with tempfile.TemporaryDirectory() as path_str:
+        path = Path(path_str)
+        files = {
+            "a/pyproject.toml": '[project]\nversion = "1.0.0"\n',
+            "a/setup.py": "setup(\n    version='1.0.0',\n)\n",
+            "b/setup.cfg": "[metadata]\nversion = 2.0.0\n",
+            "c/setup.cfg": "[metadata]\nversion = file: ../VERSION\n",
+            "d/setup.cfg": "[metadata]\nversion = file: ../VERSION\n",
+            "VERSION": "3.0.0\n",
+        }
+        for name, text in files.items():
+            (path / name).parent.mkdir(parents=True, exist_ok=True)
+            (path / name).write_text(text)
+        yield path
+
+
+class TestBulk:
+    def test_parse_manifest(self) -> None:
+        root = Path("/repo")
+        expected = {root / "a": Version("1.1.0"), root / "b/c": Version("2.0.0rc1")}
+        assert parse_manifest('{"a": "1.1.0", "b/c": "2.0.0rc1"}', root) == expected
+        assert parse_manifest('a = "1.1.0"\n"b/c" = "2.0.0rc1"\n', root, ".toml") == expected
+        assert parse_manifest("# comment\na 1.1.0\n\nb/c  2.0.0rc1\n", root) == expected
+
+        with pytest.raises(ManifestError):
+            parse_manifest("a 1.1.0 extra", root)
+        with pytest.raises(ManifestError):
+            parse_manifest('{"a": 1}', root)
+        with pytest.raises(ManifestError):
+            parse_manifest("[1, 2]", root, ".json")
+        with pytest.raises(ManifestError):
+            parse_manifest("a invalid", root)
+        with pytest.raises(ManifestError, match="outside"):
+            parse_manifest("/srv/other 1.1.0", root)
+        with pytest.raises(ManifestError, match="outside"):
+            parse_manifest("a/../../other 1.1.0", root)
+
+    def test_run(self, tree_path: Path) -> None:
+        manifest = {
+            tree_path / "a": Version("1.1.0"),
+            tree_path / "b": Version("2.1.0"),
+            tree_path / "c": Version("3.1.0"),
+            tree_path / "d": Version("3.1.0"),
+        }
+        result = BulkSetter(jobs=2).run(manifest)
+        assert [i.old_version for i in result.items] == [
+            Version("1.0.0"),
+            Version("2.0.0"),
+            Version("3.0.0"),
+            Version("3.0.0"),
+        ]
+        assert result.edit_count == 4
+        assert (tree_path / "a/pyproject.toml").read_text() == '[project]\nversion = "1.1.0"\n'
+        assert (tree_path / "a/setup.py").read_text() == "setup(\n    version='1.1.0',\n)\n"
+        assert (tree_path / "b/setup.cfg").read_text() == "[metadata]\nversion = 2.1.0\n"
+        assert (tree_path / "VERSION").read_text() == "3.1.0\n"
+
+    def test_conflict(self, tree_path: Path) -> None:
+        manifest = {
+            tree_path / "a": Version("1.1.0"),
+            tree_path / "c": Version("3.1.0"),
+            tree_path / "d": Version("3.2.0"),
+        }
+        with pytest.raises(FileEditConflictError):
+            BulkSetter(jobs=1).run(manifest)
+        assert (tree_path / "a/pyproject.toml").read_text() == '[project]\nversion = "1.0.0"\n'
+        assert (tree_path / "VERSION").read_text() == "3.0.0\n"
+
+    def test_no_version(self, tree_path: Path) -> None:
+        (tree_path / "e").mkdir()
+        manifest = {tree_path / "a": Version("1.1.0"), tree_path / "e": Version("1.0.0")}
+        with pytest.raises(ManifestError, match="no version to update"):
+            BulkSetter(jobs=1).run(manifest)
+        assert (tree_path / "a/pyproject.toml").read_text() == '[project]\nversion = "1.0.0"\n'
+
+        result = BulkSetter(jobs=1).run({tree_path / "b": Version("2.0.0")})
+        assert result.edit_count == 0
+
+    def test_cli(self, tree_path: Path) -> None:
+        stdout = io.StringIO()
+        stderr = io.StringIO()
+        args = ["-j", "2", "set_package", "--manifest", "-"]
+        stdin = io.StringIO("a 1.1.0\nb 2.1.0\n")
+        code = run_cli(args, stdin=stdin, stdout=stdout, stderr=stderr, cwd=tree_path)
+        assert code == 0
+        assert stdout.getvalue() == "a 1.0.0 -> 1.1.0\nb 2.0.0 -> 2.1.0\n"
+
+        (tree_path / "manifest.json").write_text('{"c": "3.1.0", "d": "3.2.0"}')
+        stdout = io.StringIO()
+        args = ["set_package", "--manifest", "manifest.json"]
+        code = run_cli(args, stdin=io.StringIO(), stdout=stdout, stderr=stderr, cwd=tree_path)
+        assert code == 1
+        assert not stdout.getvalue()
+        assert "VERSION" in stderr.getvalue()
+
+        # manifest file is relative to cwd, package paths are relative to --path
+        (tree_path / "a/manifest.txt").write_text("b 2.2.0\n")
+        stdout = io.StringIO()
+        args = ["--path", "..", "set_package", "--manifest", "manifest.txt"]
+        code = run_cli(args, stdin=io.StringIO(), stdout=stdout, stderr=stderr, cwd=tree_path / "a")
+        assert code == 0
+        assert stdout.getvalue() == "b 2.1.0 -> 2.2.0\n"
+
+        with tempfile.TemporaryDirectory() as other_path_str:
+            other_path = Path(other_path_str)
+            (other_path / "pyproject.toml").write_text('[project]\nversion = "1.0.0"\n')
+            stderr = io.StringIO()
+            args = ["set_package", "--manifest", "-"]
+            stdin = io.StringIO(f"{other_path.as_posix()} 2.0.0\n")
+            code = run_cli(args, stdin=stdin, stdout=stdout, stderr=stderr, cwd=tree_path)
+            assert code == 1
+            assert "outside" in stderr.getvalue()
+            assert (other_path / "pyproject.toml").read_text() == '[project]\nversion = "1.0.0"\n'
@@ -0,0 +1,201 @@
+import io
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+from collections.abc import Iterator
+from pathlib import Path
+
+import pytest
+
+from newversion import daemon
+from newversion.constants import DAEMON_ENV_NAME, SOCKET_ENV_NAME
+from newversion.daemon import (
+    DaemonServer,
+    forward,
+    get_default_socket_dir,
+    get_socket_path,
+    is_alive,
+    send_request,
+)
+from newversion.exceptions import DaemonAlreadyRunningError, DaemonSocketError
+from newversion.main import main_cli, run_cli
+
+
+@pytest.fixture
+def socket_path() -> Iterator[Path]:
+    # AF_UNIX paths are limited to about 100 bytes, so pytest tmp_path can be too long
+    with tempfile.TemporaryDirectory(prefix="nv-") as temp_dir:
+        yield Path(temp_dir) / "daemon.sock"
+
+
+def start_server(socket_path: Path, idle_timeout: float = 0.0) -> threading.Thread:
+    server = DaemonServer(socket_path, idle_timeout=idle_timeout)
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    return thread
+
+
+class TestDaemon:
+    def test_run_cli(self) -> None:
+        stdout = io.StringIO()
+        stderr = io.StringIO()
+        code = run_cli(
+            ["bump", "minor"], stdin=io.StringIO("1.2.3\n"), stdout=stdout, stderr=stderr
+        )
+        assert code == 0
+        assert stdout.getvalue() == "1.3.0\n"
+
+        stdout = io.StringIO()
+        code = run_cli(["lt", "1.0.0"], stdin=io.StringIO("1.2.3"), stdout=stdout, stderr=stderr)
+        assert code == 1
+        assert "not lesser than" in stderr.getvalue()
+
+        code = run_cli(["unknown"], stdin=io.StringIO(), stdout=stdout, stderr=stderr)
+        assert code == 2
+        assert "invalid choice" in stderr.getvalue()
+
+    def test_serve(self, socket_path: Path) -> None:
+        thread = start_server(socket_path)
+        assert is_alive(socket_path)
+        assert socket_path.stat().st_mode & 0o777 == 0o600
+        with pytest.raises(DaemonAlreadyRunningError):
+            DaemonServer(socket_path)
+
+        response = send_request(
+            socket_path, {"argv": ["bump", "pre"], "cwd": "/", "stdin": "1.2.3rc1\n"}
+        )
+        assert response == {"code": 0, "stdout": "1.2.3rc2\n", "stderr": ""}
+
+        with tempfile.TemporaryDirectory() as path_str:
+            (Path(path_str) / "setup.cfg").write_text("version = 1.2.3\n")
+            response = send_request(socket_path, {"argv": ["package"], "cwd": path_str})
+            assert response["stdout"] == "1.2.3\n"
+
+        stdout = io.StringIO()
+        code = forward(["get", "minor"], io.StringIO("4.5.6"), stdout, io.StringIO(), socket_path)
+        assert code == 0
+        assert stdout.getvalue() == "5\n"
+
+        send_request(socket_path, {"command": "stop"})
+        thread.join(5)
+        assert not thread.is_alive()
+        assert not socket_path.exists()
+        assert forward(["get"], io.StringIO(), io.StringIO(), io.StringIO(), socket_path) is None
+
+    def test_private_bind(self, socket_path: Path) -> None:
+        bind_modes: list[int] = []
+
+        class Server(DaemonServer):
+            def server_bind(self) -> None:
+                super().server_bind()
+                bind_modes.append(self.socket_path.stat().st_mode & 0o777)
+
+        old_umask = os.umask(0o022)
+        try:
+            server = Server(socket_path)
+        finally:
+            os.umask(old_umask)
+        server.server_close()
+        assert len(bind_modes) == 1
+        assert not bind_modes[0] & 0o077
+
+    def test_forward_private_socket(self, socket_path: Path) -> None:
+        thread = start_server(socket_path)
+        socket_path.chmod(0o666)
+        stdout = io.StringIO()
+        stderr = io.StringIO()
+        code = forward(["get", "minor"], io.StringIO("4.5.6"), stdout, stderr, socket_path)
+        assert code is None
+        assert not stdout.getvalue()
+        assert "not private to current user" in stderr.getvalue()
+
+        send_request(socket_path, {"command": "stop"})
+        thread.join(5)
+
+    def test_forward_dead_socket(self, socket_path: Path) -> None:
+        # a socket file left by a killed daemon
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as server:
+            server.bind(str(socket_path))
+        socket_path.chmod(0o600)
+        stdin = io.StringIO("1.2.3\n")
+        stdout = io.StringIO()
+        stderr = io.StringIO()
+        assert forward(["bump"], stdin, stdout, stderr, socket_path) is None
+        assert not stderr.getvalue()
+        code = run_cli(["bump"], stdin=stdin, stdout=stdout, stderr=stderr)
+        assert code == 0
+        assert stdout.getvalue() == "1.2.4\n"
+
+    def test_forward_broken_daemon(self, socket_path: Path) -> None:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as server:
+            server.bind(str(socket_path))
+            socket_path.chmod(0o600)
+            server.listen(1)
+
+            def close_request() -> None:
+                connection, _ = server.accept()
+                with connection:
+                    connection.recv(1024)
+
+            thread = threading.Thread(target=close_request, daemon=True)
+            thread.start()
+            stderr = io.StringIO()
+            code = forward(["bump"], io.StringIO("1.2.3\n"), io.StringIO(), stderr, socket_path)
+            thread.join(5)
+        assert code == 1
+        assert "closed connection" in stderr.getvalue()
+
+    def test_main_cli_each(
+        self, socket_path: Path, monkeypatch: pytest.MonkeyPatch, capsys: pytest.CaptureFixture[str]
+    ) -> None:
+        thread = start_server(socket_path)
+        monkeypatch.setenv(DAEMON_ENV_NAME, "1")
+        monkeypatch.setenv(SOCKET_ENV_NAME, str(socket_path))
+        monkeypatch.setattr(daemon, "forward", pytest.fail)
+        monkeypatch.setattr(sys, "stdin", io.StringIO("1.2.3\n1.3.0\n"))
+        monkeypatch.setattr(sys, "argv", ["newversion", "--each", "bump"])
+        with pytest.raises(SystemExit) as exc_info:
+            main_cli()
+        assert exc_info.value.code == 0
+        assert capsys.readouterr().out == "1.2.4\n1.3.1\n"
+
+        send_request(socket_path, {"command": "stop"})
+        thread.join(5)
+
+    def test_socket_dir(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        with tempfile.TemporaryDirectory(prefix="nv-") as temp_dir:
+            monkeypatch.delenv("NEWVERSION_SOCKET", raising=False)
+            monkeypatch.delenv("XDG_RUNTIME_DIR", raising=False)
+            monkeypatch.setattr(tempfile, "tempdir", temp_dir)
+            socket_path = get_socket_path()
+            assert socket_path.parent == get_default_socket_dir()
+            assert socket_path.parent.parent == Path(temp_dir)
+
+            thread = start_server(socket_path)
+            assert socket_path.parent.stat().st_mode & 0o777 == 0o700
+            send_request(socket_path, {"command": "stop"})
+            thread.join(5)
+
+            # directory that anyone can write to is rejected
+            socket_path.parent.chmod(0o777)
+            with pytest.raises(DaemonSocketError, match="directory is not private"):
+                DaemonServer(socket_path)
+
+    def test_stale_socket(self, socket_path: Path) -> None:
+        socket_path.write_text("", encoding="utf-8")
+        thread = start_server(socket_path)
+        assert is_alive(socket_path)
+        send_request(socket_path, {"command": "stop"})
+        thread.join(5)
+
+    def test_idle_timeout(self, socket_path: Path) -> None:
+        thread = start_server(socket_path, idle_timeout=0.2)
+        assert is_alive(socket_path)
+        start = time.monotonic()
+        thread.join(5)
+        assert not thread.is_alive()
+        assert time.monotonic() - start < 5
+        assert not is_alive(socket_path)
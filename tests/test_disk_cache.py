@@ -0,0 +1,78 @@
+import io
+import tempfile
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from newversion.disk_cache import DiskPackageVersionCache, get_cache_path
+from newversion.main import run_cli
+from newversion.version import Version
+
+
+@pytest.fixture
+def temp_path(monkeypatch: pytest.MonkeyPatch) -> Iterator[Path]:
+    with tempfile.TemporaryDirectory() as path_str:
+        path = Path(path_str)
+        monkeypatch.setenv("XDG_CACHE_HOME", (path / "cache").as_posix())
+        (path / "package").mkdir()
+        (path / "package/setup.cfg").write_text("[metadata]\nversion = file: VERSION\n")
+        (path / "package/VERSION").write_text("1.2.3\n")
+        yield path
+
+
+class TestDiskPackageVersionCache:
+    def test_get(self, temp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+        package_path = temp_path / "package"
+        assert DiskPackageVersionCache().get(package_path) == Version("1.2.3")
+        assert get_cache_path().exists()
+
+        read_paths: list[str] = []
+        read_text = Path.read_text
+
+        def read_text_spy(self: Path, *args: Any, **kwargs: Any) -> str:  # noqa: ANN401
+            read_paths.append(self.name)
+            return read_text(self, *args, **kwargs)
+
+        monkeypatch.setattr(Path, "read_text", read_text_spy)
+        assert DiskPackageVersionCache().get(package_path) == Version("1.2.3")
+        assert read_paths == ["package-versions.json"]
+
+        (package_path / "VERSION").write_text("1.2.4\n")
+        assert DiskPackageVersionCache().get(package_path) == Version("1.2.4")
+        (package_path / "pyproject.toml").write_text('[project]\nversion = "2.0.0"\n')
+        cache = DiskPackageVersionCache()
+        assert cache.get(package_path) == Version("2.0.0")
+        [entry] = cache.get_entries()
+        assert entry.source == package_path / "pyproject.toml"
+        assert entry.line == 2
+
+    def test_invalid_file(self, temp_path: Path) -> None:
+        cache_path = temp_path / "cache.json"
+        cache_path.write_text('{"format": 1, "entries": {"/x": {"line": "a"}}}')
+        cache = DiskPackageVersionCache(cache_path)
+        assert cache.get_entries() == []
+        assert cache.get(temp_path / "package") == Version("1.2.3")
+        assert len(DiskPackageVersionCache(cache_path).get_entries()) == 1
+
+    def test_cli(self, temp_path: Path) -> None:
+        def run(*args: str) -> str:
+            stdout = io.StringIO()
+            code = run_cli(
+                args, stdin=io.StringIO(), stdout=stdout, stderr=io.StringIO(), cwd=temp_path
+            )
+            assert code == 0
+            return stdout.getvalue()
+
+        assert run("--cache", "--path", "package", "-p") == "1.2.3\n"
+        root = temp_path / "package"
+        output = run("cache")
+        assert output.splitlines()[1] == f"{root} 1.2.3 {root / 'VERSION'}:1 valid"
+        (temp_path / "package/VERSION").write_text("1.2.30\n")
+        assert run("cache").endswith(" stale\n")
+        assert run("cache", "--invalidate", "package") == f"invalidated: {root}\n"
+        assert len(run("cache").splitlines()) == 1
+        run("--cache", "--path", "package", "-p")
+        assert run("cache", "--clear").startswith("cleared: ")
+        assert not get_cache_path().exists()
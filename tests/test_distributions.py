@@ -0,0 +1,115 @@
+import io
+from pathlib import Path
+
+from newversion.distributions import (
+    DistributionFilter,
+    iter_simple_index_file_names,
+    normalize_project_name,
+    read_distribution_versions,
+)
+from newversion.main import run_cli
+from newversion.version import Version
+
+SIMPLE_INDEX = """<!DOCTYPE html>
+<html><body>
+<a href="../../packages/my_pkg-2.0.0.tar.gz#sha256=00" data-requires-python="&gt;=3.9">
+  my_pkg-2.0.0.tar.gz
+</a><br/>
+<A HREF="../../packages/my_pkg-2.0.1-py3-none-any.whl">my_pkg-2.0.1-py3-none-any.whl</A>
+<a href="../../packages/my_pkg_extra-3.0.tar.gz">my_pkg_extra-3.0.tar.gz</a>
+</body></html>
+"""
+
+
+class TestDistributions:
+    def test_normalize_project_name(self) -> None:
+        assert normalize_project_name("My_Pkg") == "my-pkg"
+        assert normalize_project_name("my.-_pkg") == "my-pkg"
+
+    def test_get_version_string(self) -> None:
+        any_filter = DistributionFilter.from_project()
+        project_filter = DistributionFilter.from_project("My.Pkg")
+        cases = [
+            ("my_pkg-1.2.3-py3-none-any.whl", "1.2.3", "1.2.3"),
+            ("my_pkg-1.2.3-1-cp39-cp39-linux_x86_64.whl", "1.2.3", "1.2.3"),
+            ("My-Pkg-1.2.3rc1.tar.gz", "1.2.3rc1", "1.2.3rc1"),
+            ("my.pkg-1.2.3.zip", "1.2.3", "1.2.3"),
+            ("my_pkg_extra-1.0.tar.gz", "1.0", None),
+            ("my-pkg-extra-1.0.tar.gz", "1.0", None),
+            ("my_pkg-1.2.3.whl", None, None),
+            ("my_pkg-docs.tar.gz", None, None),
+            ("archive.tar.gz", None, None),
+            ("README.md", None, None),
+        ]
+        for file_name, version_string, project_version_string in cases:
+            assert any_filter.get_version_string(file_name) == version_string
+            assert project_filter.get_version_string(file_name) == project_version_string
+
+    def test_parse_versions(self) -> None:
+        names = [
+            "a-1.0-py3-none-any.whl",
+            "a-1.0.0.tar.gz",
+            "a-x1.tar.gz",
+            "a-0.9.zip",
+            "b-2.0.zip",
+        ]
+        assert DistributionFilter.from_project("A").parse_versions(names) == [
+            Version("0.9"),
+            Version("1.0"),
+        ]
+
+    def test_iter_simple_index_file_names(self) -> None:
+        assert list(iter_simple_index_file_names(SIMPLE_INDEX)) == [
+            "my_pkg-2.0.0.tar.gz",
+            "my_pkg-2.0.1-py3-none-any.whl",
+            "my_pkg_extra-3.0.tar.gz",
+        ]
+
+    def test_read_distribution_versions(self, tmp_path: Path) -> None:
+        (tmp_path / "a" / "b").mkdir(parents=True)
+        for name in [
+            "a/b/my_pkg-1.0.0-py3-none-any.whl",
+            "a/my_pkg-1.1.0rc1.tar.gz",
+            "my_pkg-1.0.1.zip",
+            "other-9.0.tar.gz",
+        ]:
+            (tmp_path / name).touch()
+        (tmp_path / "index.html").write_text(SIMPLE_INDEX, encoding="utf-8")
+        assert read_distribution_versions(tmp_path, "my-pkg") == [
+            Version("1.0.0"),
+            Version("1.0.1"),
+            Version("1.1.0rc1"),
+        ]
+        assert read_distribution_versions(tmp_path)[-1] == Version("9.0")
+        assert read_distribution_versions(tmp_path / "index.html", "my-pkg") == [
+            Version("2.0.0"),
+            Version("2.0.1"),
+        ]
+
+    def test_cli(self, tmp_path: Path) -> None:
+        for name in ["my_pkg-1.0.0-py3-none-any.whl", "my_pkg-1.0.1.tar.gz", "other-2.0.zip"]:
+            (tmp_path / name).touch()
+        (tmp_path / "index.html").write_text(SIMPLE_INDEX, encoding="utf-8")
+        cases = [
+            (["--from-dist", ".", "--project", "My.Pkg", "sort"], "1.0.0\n1.0.1\n"),
+            (["--from-dist", ".", "latest"], "2.0\n"),
+            (
+                ["--from-dist", ".", "--project", "my-pkg", "next_free", "--series", "1.0"],
+                "1.0.2\n",
+            ),
+            (["--from-dist", "index.html", "--project", "my-pkg", "max"], "2.0.1\n"),
+            (["-i", "2.0.0", "--project", "my-pkg", "bump", "--taken", "index.html"], "2.0.2\n"),
+        ]
+        for args, expected in cases:
+            stdout = io.StringIO()
+            code = run_cli(
+                args, stdin=io.StringIO(), stdout=stdout, stderr=io.StringIO(), cwd=tmp_path
+            )
+            assert code == 0
+            assert stdout.getvalue() == expected
+
+        stderr = io.StringIO()
+        args = ["--from-dist", ".", "bump"]
+        code = run_cli(args, stdin=io.StringIO(), stdout=io.StringIO(), stderr=stderr, cwd=tmp_path)
+        assert code == 2
+        assert "--from-dist can be used only with" in stderr.getvalue()
@@ -0,0 +1,170 @@
+import tempfile
+from collections.abc import Iterator
+from pathlib import Path
+
+import pytest
+
+from newversion.dynamic_version import (
+    Assignment,
+    DynamicVersion,
+    ImportReference,
+    find_assignment,
+    find_module_path,
+    get_setup_py_versions,
+)
+from newversion.package_version import PackageVersion, PackageVersionCache
+from newversion.version import Version
+
+
+@pytest.fixture
+def temp_path() -> Iterator[Path]:
+    with tempfile.TemporaryDirectory() as path_str:
+        yield Path(path_str)
+
+
+def write_files(root: Path, files: dict[str, str]) -> None:
+    for name, text in files.items():
+        (root / name).parent.mkdir(parents=True, exist_ok=True)
+        (root / name).write_text(text)
+
+
+class TestDynamicVersion:
+    def test_find_assignment(self) -> None:
+        data = b'"""Doc."""\nimport os\n__version__: str = "1.2.3"  # comment\n'
+        assert find_assignment(data, "__version__") == Assignment(2, 41, "1.2.3")
+        data = b"VERSION = u'1.2.3'\n__version__ = VERSION\n"
+        assert find_assignment(data, "__version__") == Assignment(0, 12, "1.2.3")
+        data = b"from ._version import version as __version__\n"
+        assert find_assignment(data, "__version__") == ImportReference("._version", "version")
+        assert find_assignment(b"__version__ = get_version()\n", "__version__") is None
+        assert find_assignment(b"a = b\nb = a\n", "a") is None
+
+    def test_find_module_path(self, temp_path: Path) -> None:
+        write_files(temp_path, {"src/pkg/__init__.py": "", "src/pkg/about.py": ""})
+        bases = [temp_path, temp_path / "src"]
+        assert find_module_path(bases, "pkg") == temp_path / "src/pkg/__init__.py"
+        assert find_module_path(bases, "pkg.about") == temp_path / "src/pkg/about.py"
+        assert find_module_path(bases, "other") is None
+
+    def test_get_setup_py_versions(self) -> None:
+        data = (
+            b"import os\n"
+            b"def get_version():\n"
+            b"    return open(os.path.join('my_pkg', '__init__.py')).read()\n"
+            b"setup(name='my-pkg', version=get_version())\n"
+        )
+        assert get_setup_py_versions(data) == [
+            DynamicVersion(path="my_pkg/__init__.py", attribute="__version__"),
+            DynamicVersion(path="__init__.py", attribute="__version__"),
+            DynamicVersion(module="my_pkg", attribute="__version__"),
+        ]
+        assert get_setup_py_versions(b"setup(version=pkg.__version__)\n") == [
+            DynamicVersion(module="pkg", attribute="__version__"),
+        ]
+        assert get_setup_py_versions(b"setup(name='pkg')\n") == []
+
+
+class TestPackageVersionDynamic:
+    def test_setuptools_attr(self, temp_path: Path) -> None:
+        write_files(
+            temp_path,
+            {
+                "pyproject.toml": (
+                    '[project]\nname = "pkg"\ndynamic = ["version"]\n\n'
+                    '[tool.setuptools.dynamic]\nversion = {attr = "pkg.__version__"}\n'
+                ),
+                "src/pkg/__init__.py": (
+                    'raise RuntimeError("must not be imported")\n'
+                    "from ._version import version as __version__\n"
+                ),
+                "src/pkg/_version.py": "version = '1.2.3'\n",
+            },
+        )
+        location = PackageVersion(temp_path).locate()
+        assert location.path == temp_path / "src/pkg/_version.py"
+        assert location.line == 1
+        assert location.version == Version("1.2.3")
+
+        PackageVersion(temp_path, fsync=False).set(Version("1.3.0"))
+        assert (temp_path / "src/pkg/_version.py").read_text() == "version = '1.3.0'\n"
+
+    def test_version_files(self, temp_path: Path) -> None:
+        write_files(
+            temp_path,
+            {
+                "pyproject.toml": (
+                    '[project]\ndynamic = ["version"]\n'
+                    '[tool.setuptools.dynamic]\nversion = {file = ["VERSION"]}\n'
+                ),
+                "VERSION": "1.2.3\n",
+            },
+        )
+        assert PackageVersion(temp_path).get() == Version("1.2.3")
+        PackageVersion(temp_path, fsync=False).set(Version("1.3.0"))
+        assert (temp_path / "VERSION").read_text() == "1.3.0\n"
+
+        write_files(
+            temp_path,
+            {
+                "pyproject.toml": (
+                    '[project]\ndynamic = ["version"]\n'
+                    '[tool.hatch.version]\npath = "pkg/__about__.py"\n'
+                ),
+                "pkg/__about__.py": '__version__ = "2.0.0"\n',
+            },
+        )
+        assert PackageVersion(temp_path).get() == Version("2.0.0")
+
+    def test_setup_cfg_attr(self, temp_path: Path) -> None:
+        write_files(
+            temp_path,
+            {
+                "setup.cfg": "[metadata]\nversion = attr: pkg.__version__\n",
+                "setup.py": "from setuptools import setup\nsetup()\n",
+                "pkg/__init__.py": '__version__ = "1.2.3"\n',
+            },
+        )
+        assert PackageVersion(temp_path).get() == Version("1.2.3")
+        PackageVersion(temp_path, fsync=False).set(Version("1.3.0"))
+        assert (temp_path / "pkg/__init__.py").read_text() == '__version__ = "1.3.0"\n'
+        assert (temp_path / "setup.cfg").read_text() == (
+            "[metadata]\nversion = attr: pkg.__version__\n"
+        )
+
+    def test_setup_py(self, temp_path: Path) -> None:
+        write_files(
+            temp_path,
+            {
+                "setup.py": (
+                    "import re\n\n"
+                    "def get_version():\n"
+                    "    text = open('pkg/__init__.py').read()\n"
+                    "    return re.search('__version__ = \"(.+)\"', text).group(1)\n\n"
+                    "setup(name='pkg', version=get_version())\n"
+                ),
+                "pkg/__init__.py": '__version__ = "1.2.3"\n',
+            },
+        )
+        assert PackageVersion(temp_path).get() == Version("1.2.3")
+        PackageVersion(temp_path, fsync=False).set(Version("1.3.0"))
+        assert (temp_path / "pkg/__init__.py").read_text() == '__version__ = "1.3.0"\n'
+
+        write_files(temp_path, {"setup.py": "VERSION = '2.0.0'\nsetup(version=VERSION)\n"})
+        assert PackageVersion(temp_path).get() == Version("2.0.0")
+        PackageVersion(temp_path, fsync=False).set(Version("2.1.0"))
+        assert (temp_path / "setup.py").read_text() == (
+            "VERSION = '2.1.0'\nsetup(version=VERSION)\n"
+        )
+
+    def test_cache(self, temp_path: Path) -> None:
+        write_files(
+            temp_path,
+            {
+                "setup.cfg": "[metadata]\nversion = attr: pkg.__version__\n",
+                "pkg/__init__.py": '__version__ = "1.2.3"\n',
+            },
+        )
+        cache = PackageVersionCache()
+        assert cache.get(temp_path) == Version("1.2.3")
+        (temp_path / "pkg/__init__.py").write_text('__version__ = "1.2.40"\n')
+        assert cache.get(temp_path) == Version("1.2.40")
@@ -6,6 +6,7 @@ from newversion.constants import VersionParts
 from newversion.exceptions import (
     ComparisonFailedError,
     ExecutorError,
+    NoVersionsError,
     PackageVersionError,
     ReleaseCannotBeBumpedError,
     VersionIsNotStableError,
@@ -128,3 +129,30 @@ class TestVersion:
             set_mock.side_effect = PackageVersionError
             with pytest.raises(ExecutorError):
                 Executor(Version("1.2.0")).command_set_version(Version("1.2.3"))
+
+    def test_command_sort(self) -> None:
+        versions = [Version(i) for i in ("1.10.0", "1.2.0", "1.2.0rc1", "1.2", "0.9")]
+        result = Executor().command_sort(versions)
+        assert [i.dumps() for i in result] == ["0.9", "1.2.0rc1", "1.2.0", "1.2", "1.10.0"]
+        result = Executor().command_sort(versions, reverse=True, stable_only=True)
+        assert [i.dumps() for i in result] == ["1.10.0", "1.2.0", "1.2", "0.9"]
+        assert Executor().command_sort([]) == []
+
+    def test_command_max_min(self) -> None:
+        versions = [Version(i) for i in ("1.10.0", "2.0.0rc1", "1.2.0rc1", "1.2", "1.2.0")]
+        assert Executor().command_max(versions).dumps() == "2.0.0rc1"
+        assert Executor().command_max(versions, stable_only=True).dumps() == "1.10.0"
+        assert Executor().command_min(versions).dumps() == "1.2.0rc1"
+        assert Executor().command_min(versions, stable_only=True).dumps() == "1.2"
+        assert Executor().command_max(iter(versions)).dumps() == "2.0.0rc1"
+        with pytest.raises(NoVersionsError):
+            Executor().command_max([])
+        with pytest.raises(NoVersionsError):
+            Executor().command_min([Version("1.2.3a1")], stable_only=True)
+
+    def test_command_unique(self) -> None:
+        versions = [Version(i) for i in ("1.2", "1.2.0", "1.2.0rc1", "1.2.0-rc1", "1.2")]
+        result = Executor().command_unique(versions)
+        assert [i.dumps() for i in result] == ["1.2", "1.2.0", "1.2.0rc1"]
+        result = Executor().command_unique(versions, stable_only=True)
+        assert [i.dumps() for i in result] == ["1.2", "1.2.0"]
@@ -0,0 +1,30 @@
+import random
+import tempfile
+from pathlib import Path
+
+from newversion.external_sort import ExternalSorter
+from newversion.version import Version
+
+
+class TestExternalSorter:
+    def test_sort(self) -> None:
+        rng = random.Random(1)  # noqa: S311
+        versions = [
+            Version(f"{rng.randint(0, 3)}.{rng.randint(0, 9)}{rng.choice(['', 'rc1', '.0'])}")
+            for _ in range(500)
+        ]
+        expected = [i.dumps() for i in sorted(versions)]
+        expected_reverse = [i.dumps() for i in sorted(versions, reverse=True)]
+        with tempfile.TemporaryDirectory() as temp_dir:
+            sorter = ExternalSorter(memory_budget=2000, temp_dir=Path(temp_dir), max_fan_in=3)
+            assert list(sorter.sort(versions)) == expected
+            assert sorter.run_count > 3
+            assert list(sorter.sort(versions, reverse=True)) == expected_reverse
+            assert not list(Path(temp_dir).iterdir())
+
+    def test_sort_in_memory(self) -> None:
+        sorter = ExternalSorter()
+        versions = [Version("1.2.0"), Version("1.0"), Version("1.2")]
+        assert list(sorter.sort(versions)) == ["1.0", "1.2.0", "1.2"]
+        assert list(sorter.sort([])) == []
+        assert sorter.run_count == 0
@@ -0,0 +1,102 @@
+import os
+import tempfile
+from collections.abc import Iterator
+from pathlib import Path
+
+import pytest
+
+from newversion.exceptions import FileChangedError
+from newversion.file_edit import AtomicWriter, BytePatch, FileEdit
+from newversion.package_version import PackageVersion
+from newversion.version import Version
+
+
+@pytest.fixture
+def temp_path() -> Iterator[Path]:
+    with tempfile.TemporaryDirectory() as path_str:
+        yield Path(path_str)
+
+
+class TestAtomicWriter:
+    def test_write(self, temp_path: Path) -> None:
+        (temp_path / "a.txt").write_text("a")
+        (temp_path / "a.txt").chmod(0o640)
+        AtomicWriter().write(
+            [
+                FileEdit.from_text(temp_path / "a.txt", "new a\n"),
+                FileEdit.from_text(temp_path / "b.txt", "new b\n"),
+            ]
+        )
+        assert (temp_path / "a.txt").read_text() == "new a\n"
+        assert (temp_path / "b.txt").read_text() == "new b\n"
+        assert (temp_path / "a.txt").stat().st_mode & 0o777 == 0o640
+        assert sorted(i.name for i in temp_path.iterdir()) == ["a.txt", "b.txt"]
+
+    def test_fsync(self, temp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+        calls: list[int] = []
+        monkeypatch.setattr(os, "fsync", calls.append)
+        edits = [FileEdit.from_text(temp_path / f"{i}.txt", "text") for i in range(3)]
+        AtomicWriter().write(edits)
+        # one call per file and a single call for the shared directory
+        assert len(calls) == 4
+
+        calls.clear()
+        AtomicWriter(fsync=False).write(edits)
+        assert not calls
+
+    def test_rollback(self, temp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+        (temp_path / "a.txt").write_text("a")
+        (temp_path / "c.txt").write_text("c")
+        real_replace = Path.replace
+
+        def replace(self: Path, target: Path) -> Path:
+            if Path(target).name == "c.txt":
+                raise PermissionError(target)
+            return real_replace(self, target)
+
+        monkeypatch.setattr(Path, "replace", replace)
+        with pytest.raises(PermissionError):
+            AtomicWriter().write(
+                [
+                    FileEdit.from_text(temp_path / "a.txt", "new a"),
+                    FileEdit.from_text(temp_path / "b.txt", "new b"),
+                    FileEdit.from_text(temp_path / "c.txt", "new c"),
+                ]
+            )
+        monkeypatch.undo()
+
+        assert sorted(i.name for i in temp_path.iterdir()) == ["a.txt", "c.txt"]
+        assert (temp_path / "a.txt").read_text() == "a"
+        assert (temp_path / "c.txt").read_text() == "c"
+
+    def test_package_version(self, temp_path: Path) -> None:
+        (temp_path / "pyproject.toml").write_text('[project]\nversion = "1.0.0"\n')
+        (temp_path / "setup.py").write_text("setup(\n    version='1.0.0',\n)\n")
+        PackageVersion(temp_path, fsync=False).set(Version("1.1.0"))
+        assert PackageVersion(temp_path).get() == Version("1.1.0")
+        assert (temp_path / "setup.py").read_text() == "setup(\n    version='1.1.0',\n)\n"
+        assert sorted(i.name for i in temp_path.iterdir()) == ["pyproject.toml", "setup.py"]
+
+    def test_in_place(self, temp_path: Path) -> None:
+        data = b"a = 1.2.3\r\nb = 1.2.3"
+        (temp_path / "a.txt").write_bytes(data)
+        (temp_path / "b.txt").write_bytes(data)
+        patches = [BytePatch(4, b"1.2.3", b"1.2.40"), BytePatch(15, b"1.2.3", b"1.2.40")]
+        edits = [
+            FileEdit.from_patches(temp_path / "a.txt", data, patches[:1]),
+            FileEdit.from_patches(temp_path / "b.txt", data, patches),
+        ]
+        AtomicWriter(in_place=True).write(edits)
+        assert (temp_path / "a.txt").read_bytes() == b"a = 1.2.40\r\nb = 1.2.3"
+        assert (temp_path / "b.txt").read_bytes() == b"a = 1.2.40\r\nb = 1.2.40"
+
+        # second file no longer has the old version, first one is restored
+        (temp_path / "a.txt").write_bytes(data)
+        edits = [
+            FileEdit.from_patches(temp_path / "a.txt", data, [BytePatch(4, b"1.2.3", b"1.2.4")]),
+            FileEdit.from_patches(temp_path / "b.txt", data, patches),
+        ]
+        with pytest.raises(FileChangedError):
+            AtomicWriter(in_place=True).write(edits)
+        assert (temp_path / "a.txt").read_bytes() == data
+        assert (temp_path / "b.txt").read_bytes() == b"a = 1.2.40\r\nb = 1.2.40"
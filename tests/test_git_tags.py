@@ -0,0 +1,121 @@
+import io
+import json
+import os
+import tempfile
+from collections.abc import Iterator
+from pathlib import Path
+
+import pytest
+
+from newversion.exceptions import GitTagsError
+from newversion.git_tags import GitTagReader, TagPattern, find_git_dir, iter_packed_tags
+from newversion.main import run_cli
+from newversion.version import Version
+
+SHA = "4cadfa4050ce3efbf4472a2ae7f9fd735b85d142"
+
+
+@pytest.fixture
+def repo_path() -> Iterator[Path]:
+    with tempfile.TemporaryDirectory() as path_str:
+        path = Path(path_str)
+        tags = ["v1.0.0", "v1.2.0", "v2.0.0rc1", "pkg-3.0.0", "foo", "v1.3.0"]
+        lines = ["# pack-refs with: peeled fully-peeled sorted", f"{SHA} refs/heads/main"]
+        lines.extend(f"{SHA} refs/tags/{tag}" for tag in tags)
+        lines.append(f"^{SHA}")
+        (path / ".git/refs/tags/release").mkdir(parents=True)
+        (path / ".git/packed-refs").write_text("\n".join(lines) + "\n")
+        (path / ".git/refs/tags/v1.4.0").write_text(f"{SHA}\n")
+        (path / ".git/refs/tags/release/v1.5.0").write_text(f"{SHA}\n")
+        (path / "src").mkdir()
+        yield path
+
+
+class TestGitTags:
+    def test_find_git_dir(self, repo_path: Path) -> None:
+        assert find_git_dir(repo_path / "src") == repo_path / ".git"
+        assert find_git_dir(Path("/")) is None
+
+        worktree_path = repo_path / "worktree"
+        worktree_git_dir = repo_path / ".git/worktrees/worktree"
+        worktree_git_dir.mkdir(parents=True)
+        (worktree_git_dir / "commondir").write_text("../..\n")
+        worktree_path.mkdir()
+        (worktree_path / ".git").write_text(f"gitdir: {worktree_git_dir}\n")
+        assert find_git_dir(worktree_path).resolve() == (repo_path / ".git").resolve()
+
+    def test_iter_packed_tags(self) -> None:
+        data = f"# header\n{SHA} refs/heads/main\n{SHA} refs/tags/v1.0\n^{SHA}\n".encode()
+        assert list(iter_packed_tags(data)) == ["v1.0"]
+
+    def test_tag_pattern(self) -> None:
+        pattern = TagPattern.from_prefix("pkg-")
+        assert pattern.get_version_string("pkg-1.2.3") == "1.2.3"
+        assert pattern.get_version_string("pkg-v1.2.3") == "v1.2.3"
+        assert pattern.get_version_string("pkg-docs") is None
+        assert pattern.get_version_string("other-1.2.3") is None
+        pattern = TagPattern.from_regex(r"release/(?P<version>.+)-final")
+        assert pattern.get_version_string("release/1.2-final") == "1.2"
+        assert pattern.parse_versions(["release/x-final", "release/1.0-final"]) == [Version("1.0")]
+        with pytest.raises(GitTagsError, match="no version group"):
+            TagPattern.from_regex("v.+")
+
+    def test_read(self, repo_path: Path) -> None:
+        reader = GitTagReader(repo_path / "src")
+        assert reader.read() == [
+            Version("1.0.0"),
+            Version("1.2.0"),
+            Version("1.3.0"),
+            Version("1.4.0"),
+            Version("2.0.0rc1"),
+        ]
+        assert reader.get_latest() == Version("2.0.0rc1")
+        assert reader.get_latest(stable_only=True) == Version("1.4.0")
+
+        reader = GitTagReader(repo_path, TagPattern.from_prefix("release/"))
+        assert reader.get_latest() == Version("1.5.0")
+        with pytest.raises(GitTagsError, match="no tags"):
+            GitTagReader(repo_path, TagPattern.from_prefix("nope-")).get_latest()
+        with pytest.raises(GitTagsError, match="not inside a git repository"):
+            GitTagReader(Path("/"))
+
+    def test_cache(self, repo_path: Path) -> None:
+        cache_dir = repo_path / "cache"
+        reader = GitTagReader(repo_path, cache_dir=cache_dir)
+        assert reader.get_latest(stable_only=True) == Version("1.4.0")
+        (cache_path,) = cache_dir.iterdir()
+        data = json.loads(cache_path.read_text())
+        assert data["latest"] == "v2.0.0rc1"
+        assert data["latest_stable"] == "v1.3.0"
+        assert reader.get_packed_index() is reader.get_packed_index()
+
+        packed_refs_path = repo_path / ".git/packed-refs"
+        with packed_refs_path.open("a") as f:
+            f.write(f"{SHA} refs/tags/v1.9.0\n")
+        stat = packed_refs_path.stat()
+        os.utime(packed_refs_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+        assert reader.get_latest(stable_only=True) == Version("1.9.0")
+        assert json.loads(cache_path.read_text())["latest_stable"] == "v1.9.0"
+
+    def test_cli(self, repo_path: Path) -> None:
+        stdout = io.StringIO()
+        stderr = io.StringIO()
+        args = ["--from-git-tags", "--stable-tags", "bump", "minor"]
+        code = run_cli(args, stdin=io.StringIO(), stdout=stdout, stderr=stderr, cwd=repo_path)
+        assert code == 0
+        assert stdout.getvalue() == "1.5.0\n"
+
+        stdout = io.StringIO()
+        args = ["--from-git-tags", "--tag-prefix", "pkg-"]
+        code = run_cli(args, stdin=io.StringIO(), stdout=stdout, stderr=stderr, cwd=repo_path)
+        assert code == 0
+        assert stdout.getvalue() == "3.0.0\n"
+
+        args = ["--from-git-tags", "--tag-prefix", "nope-"]
+        code = run_cli(args, stdin=io.StringIO(), stdout=stdout, stderr=stderr, cwd=repo_path)
+        assert code == 1
+        assert "Cannot read git tags" in stderr.getvalue()
+
+        args = ["--from-git-tags", "-p"]
+        code = run_cli(args, stdin=io.StringIO(), stdout=stdout, stderr=stderr, cwd=repo_path)
+        assert code == 2
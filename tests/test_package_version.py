@@ -1,8 +1,16 @@
+import contextlib
 import tempfile
+from collections.abc import Generator, Iterator
 from pathlib import Path
 
-from newversion.package_version import PackageVersion
+import pytest
+
+from newversion.exceptions import FileChangedError
+from newversion.file_edit import AtomicWriter
+from newversion.package_version import PackageVersion, PackageVersionCache
+from newversion.source_file import scan_first_match
 from newversion.version import Version
+from newversion.version_sources import SetupCfgSource
 
 
 class TestPackageVersion:
@@ -31,11 +39,159 @@ class TestPackageVersion:
                 '[tool.poetry]\nname= "mypackage"\n\nversion = "1.1.1"\n\n'
             )
             assert PackageVersion(path).set(Version("1.2.3")) is None
-            assert (path / "setup.py").read_text() == "\n\nsetup(\n    version ='1.2.3',\n)\n"
-            assert (path / "setup.cfg").read_text() == "name=mypackage\n\nversion= 1.2.3\n"
+            assert (path / "setup.py").read_text() == "\n\nsetup(\n    version ='1.2.3',\n)"
+            assert (path / "setup.cfg").read_text() == "name=mypackage\n\nversion= 1.2.3\n\n"
             assert (
                 path / "pyproject.toml"
-            ).read_text() == '[tool.poetry]\nname= "mypackage"\n\nversion = "1.2.3"\n'
+            ).read_text() == '[tool.poetry]\nname= "mypackage"\n\nversion = "1.2.3"\n\n'
             (path / "setup.cfg").write_text("name=mypackage\n\nversion = file: version.txt\n\n")
             assert PackageVersion(path).set(Version("1.2.3")) is None
             assert (path / "version.txt").read_text() == "1.2.3\n"
+
+    def test_session(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        with tempfile.TemporaryDirectory() as path_str:
+            path = Path(path_str)
+            (path / "setup.py").write_text("setup(\n    version='1.2.0',\n)\n")
+            (path / "pyproject.toml").write_text('[project]\nversion = "1.2.0"\n')
+            read_paths: list[str] = []
+            read_bytes = Path.read_bytes
+
+            def read_bytes_spy(self: Path) -> bytes:
+                read_paths.append(self.name)
+                return read_bytes(self)
+
+            monkeypatch.setattr(Path, "read_bytes", read_bytes_spy)
+            package_version = PackageVersion(path)
+            # pyproject.toml is parsed once for both get and set
+            assert package_version.get() == Version("1.2.0")
+            assert read_paths == ["pyproject.toml"]
+            package_version.plan_set(Version("1.2.1"))
+            package_version.set(Version("1.2.1"))
+            assert sorted(read_paths) == ["pyproject.toml", "setup.py"]
+
+            # file changed after it was read is read again, not overwritten
+            read_paths.clear()
+            package_version.plan_set(Version("1.2.2"))
+            (path / "pyproject.toml").write_text('[project]\nname = "pkg"\nversion = "1.2.1"\n')
+            package_version.set(Version("1.2.2"))
+            assert read_paths == ["pyproject.toml", "setup.py", "pyproject.toml"]
+            assert (path / "pyproject.toml").read_text() == (
+                '[project]\nname = "pkg"\nversion = "1.2.2"\n'
+            )
+
+    @pytest.mark.parametrize("in_place", [False, True])
+    def test_set_preserves_bytes(self, in_place: bool) -> None:
+        with tempfile.TemporaryDirectory() as path_str:
+            path = Path(path_str)
+            pyproject = b'[project]\r\nname = "caf\xc3\xa9"\nversion = "1.2.3"  # 1.2.3\r\n\r\n'
+            setup_cfg = b"[metadata]\r\n# \xff\xfe\r\nversion = 1.2.3"
+            setup_py = b"setup(\n\tversion='1.2.3',\r\n)\n\n\n"
+            (path / "pyproject.toml").write_bytes(pyproject)
+            (path / "setup.cfg").write_bytes(setup_cfg)
+            (path / "setup.py").write_bytes(setup_py)
+
+            PackageVersion(path, fsync=False, in_place=in_place).set(Version("1.2.4"))
+            assert (path / "pyproject.toml").read_bytes() == pyproject.replace(
+                b'"1.2.3"', b'"1.2.4"'
+            )
+            assert (path / "setup.cfg").read_bytes() == setup_cfg.replace(b"1.2.3", b"1.2.4")
+            assert (path / "setup.py").read_bytes() == setup_py.replace(b"1.2.3", b"1.2.4")
+
+            PackageVersion(path, fsync=False, in_place=in_place).set(Version("1.2.4rc1"))
+            assert (path / "setup.cfg").read_bytes() == setup_cfg.replace(b"1.2.3", b"1.2.4rc1")
+            assert (path / "setup.py").read_bytes() == setup_py.replace(b"1.2.3", b"1.2.4rc1")
+
+            (path / "setup.cfg").write_bytes(b"[metadata]\nversion = file: VERSION\n")
+            (path / "VERSION").write_bytes(b"  1.2.3\r\n")
+            PackageVersion(path, fsync=False, in_place=in_place).set(Version("1.3.0"))
+            assert (path / "VERSION").read_bytes() == b"  1.3.0\r\n"
+
+    def test_get_bytes(self) -> None:
+        with tempfile.TemporaryDirectory() as path_str:
+            path = Path(path_str)
+            (path / "setup.py").write_bytes(b"\xef\xbb\xbfversion = '1.2.3'\r\n\xff\r\n")
+            assert PackageVersion(path).locate().line == 1
+            assert PackageVersion(path).get() == Version("1.2.3")
+            (path / "setup.cfg").write_bytes(b"[metadata]\r\n# \xff\r\nversion = 1.2.4\r\n")
+            assert PackageVersion(path).locate().line == 3
+            assert PackageVersion(path).get() == Version("1.2.4")
+            (path / "pyproject.toml").write_bytes(b'\xef\xbb\xbf[project]\r\nversion = "1.2.5"\r\n')
+            assert PackageVersion(path).get() == Version("1.2.5")
+
+            PackageVersion(path, fsync=False).set(Version("1.3.0"))
+            assert (path / "pyproject.toml").read_bytes() == (
+                b'\xef\xbb\xbf[project]\r\nversion = "1.3.0"\r\n'
+            )
+            assert (path / "setup.py").read_bytes() == b"\xef\xbb\xbfversion = '1.3.0'\r\n\xff\r\n"
+
+    def test_get_cr(self) -> None:
+        with tempfile.TemporaryDirectory() as path_str:
+            path = Path(path_str)
+            setup_cfg = b"[metadata]\r# version = 0.0.1\rname = test\r\nversion = 1.2.4\r"
+            (path / "setup.cfg").write_bytes(setup_cfg)
+            assert PackageVersion(path).locate().line == 4
+            assert PackageVersion(path).get() == Version("1.2.4")
+
+            PackageVersion(path, fsync=False).set(Version("1.3.0"))
+            assert (path / "setup.cfg").read_bytes() == setup_cfg.replace(b"1.2.4", b"1.3.0")
+            assert PackageVersion(path).locate().line == 4
+
+    def test_other_line_breaks(self) -> None:
+        with tempfile.TemporaryDirectory() as path_str:
+            path = Path(path_str)
+            setup_cfg = "[metadata]\nname = x\f\n# \u2028\x85\nversion = 1.2.3\n".encode()
+            (path / "setup.cfg").write_bytes(setup_cfg)
+            pattern = SetupCfgSource.RE_VERSION
+            source = PackageVersion(path).read(path / "setup.cfg")
+            assert source is not None
+            scanned = scan_first_match(path / "setup.cfg", pattern)
+            assert scanned is not None
+            assert source.find(pattern) == [scanned]
+            assert scanned.line == 3
+            assert PackageVersion(path).locate().line == 4
+
+            PackageVersion(path, fsync=False).set(Version("1.3.0"))
+            assert (path / "setup.cfg").read_bytes() == setup_cfg.replace(b"1.2.3", b"1.3.0")
+
+    def test_get_early_exit(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        with tempfile.TemporaryDirectory() as path_str:
+            path = Path(path_str)
+            (path / "setup.py").write_bytes(b"setup(\n    version='1.2.3',\n" + b"#\n" * 10_000)
+            read_lines: list[bytes] = []
+            real_open = Path.open
+
+            @contextlib.contextmanager
+            def open_spy(self: Path, mode: str = "r") -> Generator[Iterator[bytes], None, None]:
+                with real_open(self, mode) as f:
+                    yield (read_lines.append(line) or line for line in f)
+
+            monkeypatch.setattr(Path, "open", open_spy)
+            assert PackageVersion(path).get() == Version("1.2.3")
+            assert read_lines == [b"setup(\n", b"    version='1.2.3',\n"]
+
+    def test_set_in_place_changed(self) -> None:
+        with tempfile.TemporaryDirectory() as path_str:
+            path = Path(path_str)
+            (path / "setup.py").write_text("setup(\n    version='1.2.3',\n)\n")
+            edits = PackageVersion(path).plan_set(Version("1.2.4"))
+            (path / "setup.py").write_text("setup(\n    version='1.2.5',\n)\n")
+            with pytest.raises(FileChangedError):
+                AtomicWriter(in_place=True).write(edits)
+            assert (path / "setup.py").read_text() == "setup(\n    version='1.2.5',\n)\n"
+
+
+class TestPackageVersionCache:
+    def test_get(self) -> None:
+        with tempfile.TemporaryDirectory() as path_str:
+            path = Path(path_str)
+            cache = PackageVersionCache()
+            (path / "setup.cfg").write_text("name=mypackage\n\nversion = file: version.txt\n")
+            (path / "version.txt").write_text("1.2.3\n")
+            assert cache.get(path) == Version("1.2.3")
+            assert cache.get(path) is cache.get(path)
+            (path / "version.txt").write_text("1.2.40\n")
+            assert cache.get(path) == Version("1.2.40")
+            (path / "pyproject.toml").write_text('[project]\nversion = "2.0.0"\n')
+            assert cache.get(path) == Version("2.0.0")
+            cache.clear()
+            assert cache.get(path) == Version("2.0.0")
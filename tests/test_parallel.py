@@ -0,0 +1,78 @@
+import io
+import tempfile
+from pathlib import Path
+
+import pytest
+
+from newversion.constants import InvalidLinePolicy
+from newversion.exceptions import CLIError
+from newversion.parallel import (
+    ByteRange,
+    ParallelRunner,
+    RangeTask,
+    process_range,
+    split_byte_ranges,
+)
+from newversion.version import Version
+
+
+def bump_minor(version: Version) -> str:
+    return version.bump_minor().dumps()
+
+
+class TestParallel:
+    def test_split_byte_ranges(self) -> None:
+        with tempfile.TemporaryDirectory() as path_str:
+            path = Path(path_str) / "versions.txt"
+            path.write_bytes(b"1.2.3\n1.2.4\r\n10.0.0\n1.0")
+            assert split_byte_ranges(path, 4) == [
+                ByteRange(0, 6),
+                ByteRange(6, 13),
+                ByteRange(13, 20),
+                ByteRange(20, 23),
+            ]
+            assert split_byte_ranges(path, 6) == [
+                ByteRange(0, 6),
+                ByteRange(6, 13),
+                ByteRange(13, 20),
+                ByteRange(20, 23),
+            ]
+            assert split_byte_ranges(path, 100) == [ByteRange(0, 23)]
+            path.write_bytes(b"")
+            assert split_byte_ranges(path, 100) == []
+
+    def test_process_range(self) -> None:
+        with tempfile.TemporaryDirectory() as path_str:
+            path = Path(path_str) / "versions.txt"
+            path.write_bytes(b"1.2.3\ninvalid\n\n2.0.0rc1\n")
+            task = RangeTask(path, ByteRange(0, 24), bump_minor, stop_on_invalid=False)
+            result = process_range(task)
+            assert result.results == ["1.3.0", "2.0.0"]
+            assert result.errors == [(2, "Invalid version: 'invalid'")]
+            assert result.line_count == 4
+            task = RangeTask(path, ByteRange(6, 24), bump_minor, stop_on_invalid=True)
+            result = process_range(task)
+            assert result.results == []
+            assert result.line_count == 1
+
+    def test_run(self) -> None:
+        with tempfile.TemporaryDirectory() as path_str:
+            path = Path(path_str) / "versions.txt"
+            lines = [f"1.{i}.0rc1" for i in range(200)]
+            lines.insert(150, "invalid")
+            path.write_text("\n".join(lines))
+            expected = [f"1.{i}.0" for i in range(200)]
+
+            output = io.StringIO()
+            runner = ParallelRunner(
+                bump_minor, on_invalid=InvalidLinePolicy.SKIP, jobs=2, chunk_size=64
+            )
+            runner.run(path, output)
+            assert output.getvalue().splitlines() == expected
+            assert runner.invalid_count == 1
+
+            output = io.StringIO()
+            runner = ParallelRunner(bump_minor, jobs=2, chunk_size=64)
+            with pytest.raises(CLIError, match="Line 151"):
+                runner.run(path, output)
+            assert output.getvalue().splitlines() == expected[:150]
@@ -0,0 +1,34 @@
+from newversion.parse_cache import ParseCache, ParseCacheStats
+
+
+class TestParseCache:
+    def test_get(self) -> None:
+        cache: ParseCache[str, list[str]] = ParseCache(max_size=2)
+        first = cache.get("a", lambda: ["a"])
+        assert cache.get("a", lambda: ["other"]) is first
+        cache.get("b", lambda: ["b"])
+        cache.get("a", lambda: ["a"])
+        cache.get("c", lambda: ["c"])
+        assert cache.get("a", lambda: ["new"]) is first
+        assert cache.get("b", lambda: ["new"]) == ["new"]
+        assert cache.stats() == ParseCacheStats(hits=3, misses=4, evictions=2, size=2, max_size=2)
+
+    def test_resize(self) -> None:
+        cache: ParseCache[int, int] = ParseCache()
+        for i in range(10):
+            cache.get(i, lambda i=i: i)
+        cache.resize(3)
+        assert len(cache) == 3
+        assert cache.stats().evictions == 7
+        cache.resize(0)
+        assert cache.get(1, lambda: 2) == 2
+        assert len(cache) == 0
+
+    def test_clear(self) -> None:
+        cache: ParseCache[int, int] = ParseCache()
+        cache.get(1, lambda: 1)
+        cache.get(1, lambda: 1)
+        cache.clear()
+        assert cache.stats() == ParseCacheStats(
+            hits=0, misses=0, evictions=0, size=0, max_size=ParseCache.DEFAULT_MAX_SIZE
+        )
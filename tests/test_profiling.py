@@ -0,0 +1,125 @@
+import io
+import json
+import pstats
+import tracemalloc
+from pathlib import Path
+
+import pytest
+
+from newversion.constants import PROFILE_ENV_NAME
+from newversion.executor import Executor
+from newversion.main import run_cli
+from newversion.package_version import PackageVersion
+from newversion.profiling import Profiler, ProfileReport, SpanStats, get_targets
+from newversion.version import Version
+
+
+class TestProfiling:
+    def test_targets(self) -> None:
+        names = {target.name for target in get_targets()}
+        assert {"version.parse", "package.get", "package.set", "executor.bump"} <= names
+
+    def test_install(self, tmp_path: Path) -> None:
+        (tmp_path / "pyproject.toml").write_text('[project]\nversion = "1.2.3"\n')
+        version_init = Version.__init__
+        command_sort = vars(Executor)["command_sort"]
+        profiler = Profiler()
+        with profiler.session():
+            assert Version.__init__ is not version_init
+            executor = Executor(path=tmp_path, fsync=False)
+            executor.command_set_version(executor.command_get_version().bump_minor())
+            executor.command_sort([Version("1.0.0")])
+        assert Version.__init__ is version_init
+        assert vars(Executor)["command_sort"] is command_sort
+        assert PackageVersion(tmp_path).get() == Version("1.3.0")
+
+        report = profiler.get_report()
+        names = list(report.spans)
+        assert names.index("executor.get_version") < names.index("package.get")
+        assert report.spans["executor.sort"].calls == 1
+        assert report.spans["package.get"].details[tmp_path.as_posix()].calls == 1
+        assert report.spans["version.parse"].calls >= 2
+        file_write = report.spans["file.write"]
+        assert file_write.calls == 1
+        assert len(file_write.details) == 1
+        assert report.total_seconds >= report.spans["executor.get_version"].seconds
+
+    def test_report(self) -> None:
+        report = ProfileReport(
+            total_seconds=0.01,
+            spans={
+                "cli.parse_args": SpanStats(calls=1, seconds=0.002),
+                "package.read": SpanStats(
+                    calls=2,
+                    seconds=0.001,
+                    details={"./setup.cfg": SpanStats(calls=2, seconds=0.001)},
+                ),
+            },
+        )
+        assert report.to_dict() == {
+            "total_ms": 10.0,
+            "spans": [
+                {
+                    "name": "cli.parse_args",
+                    "calls": 1,
+                    "total_ms": 2.0,
+                    "percent": 20.0,
+                    "details": [],
+                },
+                {
+                    "name": "package.read",
+                    "calls": 2,
+                    "total_ms": 1.0,
+                    "percent": 10.0,
+                    "details": [{"detail": "./setup.cfg", "calls": 2, "total_ms": 1.0}],
+                },
+            ],
+        }
+        lines = report.render_text().splitlines()
+        assert lines[0] == "profile: 10.00 ms total"
+        assert lines[2].split() == ["cli.parse_args", "1", "2.000", "20.0%"]
+        assert lines[4].split() == ["./setup.cfg", "2", "1.000"]
+
+    def test_cli(self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+        stdout = io.StringIO()
+        stderr = io.StringIO()
+        args = ["--profile", "-i", "1.2.3", "bump", "minor"]
+        code = run_cli(args, stdin=io.StringIO(), stdout=stdout, stderr=stderr, cwd=tmp_path)
+        assert code == 0
+        assert stdout.getvalue() == "1.3.0\n"
+        assert "cli.parse_args" in stderr.getvalue()
+        assert "executor.bump" in stderr.getvalue()
+
+        stderr = io.StringIO()
+        monkeypatch.setenv(PROFILE_ENV_NAME, "json")
+        args = ["--profile-output", "profile.json", "-i", "1.2.3", "bump", "minor"]
+        code = run_cli(args, stdin=io.StringIO(), stdout=stdout, stderr=stderr, cwd=tmp_path)
+        assert code == 0
+        assert not stderr.getvalue()
+        data = json.loads((tmp_path / "profile.json").read_text())
+        assert [span["name"] for span in data["spans"]][:2] == ["cli.parse_args", "executor.bump"]
+
+        monkeypatch.setenv(PROFILE_ENV_NAME, "0")
+        stderr = io.StringIO()
+        args = [
+            "--profile-cprofile",
+            "stats.prof",
+            "--profile-tracemalloc",
+            "memory.snapshot",
+            "-i",
+            "1.2.3",
+            "bump",
+            "minor",
+        ]
+        code = run_cli(args, stdin=io.StringIO(), stdout=stdout, stderr=stderr, cwd=tmp_path)
+        assert code == 0
+        assert "executor.bump" in stderr.getvalue()
+        assert pstats.Stats((tmp_path / "stats.prof").as_posix()).total_calls
+        assert tracemalloc.Snapshot.load((tmp_path / "memory.snapshot").as_posix()).traces
+        assert not tracemalloc.is_tracing()
+
+        stderr = io.StringIO()
+        args = ["-i", "1.2.3", "bump", "minor"]
+        code = run_cli(args, stdin=io.StringIO(), stdout=stdout, stderr=stderr, cwd=tmp_path)
+        assert code == 0
+        assert not stderr.getvalue()
@@ -0,0 +1,88 @@
+import tempfile
+from pathlib import Path
+
+import pytest
+
+from newversion.package_version import PackageVersion
+from newversion.pyproject import PyprojectFile, get_toml_loads
+from newversion.version import Version
+
+
+def parse(content: bytes) -> PyprojectFile:
+    loads = get_toml_loads()
+    assert loads is not None
+    return PyprojectFile.parse(content, loads)
+
+
+class TestPyprojectFile:
+    def test_get_version_span(self) -> None:
+        content = (
+            b'[tool.other]\nversion = "0.1.0"\n\n'
+            b'[project]\nname = "pkg"\ndescription = """\nversion = "0.2.0"\n"""\n'
+            b'"version" = "1.2.3"  # comment\n'
+        )
+        span = parse(content).get_version_span()
+        assert span is not None
+        assert span.key == ("project", "version")
+        assert span.line == 8
+        assert content[span.offset : span.offset + 5] == b"1.2.3"
+
+        content = b'[tool]\npoetry.version = "1.2.4"\n[project]\ndynamic = ["version"]\n'
+        pyproject = parse(content)
+        assert pyproject.is_version_dynamic
+        span = pyproject.get_version_span()
+        assert span is not None
+        assert span.key == ("tool", "poetry", "version")
+        assert content[span.offset : span.offset + 5] == b"1.2.4"
+
+    def test_no_version(self) -> None:
+        pyproject = parse(b'[project]\ndynamic = ["version"]\n[tool.other]\nversion = "1.0"\n')
+        assert pyproject.is_version_dynamic
+        assert pyproject.get_version_key() is None
+        assert pyproject.get_version_span() is None
+
+        # value that cannot be patched as a single-line string
+        pyproject = parse(b'project = { version = "1.2.3" }\n')
+        assert pyproject.get_version_key() == ("project", "version")
+        assert pyproject.get_version_span() is None
+
+        with pytest.raises(ValueError, match="table declaration"):
+            parse(b"[project\n")
+
+
+class TestPackageVersionPyproject:
+    def test_get_set(self) -> None:
+        with tempfile.TemporaryDirectory() as path_str:
+            path = Path(path_str)
+            content = (
+                '[tool.commitizen]\nversion = "0.1.0"\n\n[tool.poetry]\nname = "pkg"\n'
+                'version = "1.2.3"\n'
+            )
+            (path / "pyproject.toml").write_text(content)
+            assert PackageVersion(path).locate().line == 6
+            PackageVersion(path, fsync=False).set(Version("1.3.0"))
+            assert (path / "pyproject.toml").read_text() == content.replace("1.2.3", "1.3.0")
+
+    def test_dynamic(self) -> None:
+        with tempfile.TemporaryDirectory() as path_str:
+            path = Path(path_str)
+            content = '[project]\ndynamic = ["version"]\n\n[tool.other]\nversion = "0.1.0"\n'
+            (path / "pyproject.toml").write_text(content)
+            (path / "setup.cfg").write_text("[metadata]\nversion = 1.2.3\n")
+            assert PackageVersion(path).get() == Version("1.2.3")
+            PackageVersion(path, fsync=False).set(Version("1.3.0"))
+            assert (path / "pyproject.toml").read_text() == content
+            assert (path / "setup.cfg").read_text() == "[metadata]\nversion = 1.3.0\n"
+
+    @pytest.mark.parametrize("has_parser", [False, True])
+    def test_fallback(self, has_parser: bool, monkeypatch: pytest.MonkeyPatch) -> None:
+        if not has_parser:
+            monkeypatch.setattr("newversion.package_version.get_toml_loads", lambda: None)
+        with tempfile.TemporaryDirectory() as path_str:
+            path = Path(path_str)
+            # duplicate table is invalid TOML
+            content = '[tool.other]\nname = "a"\n[tool.other]\nversion = "1.2.3"\n'
+            (path / "pyproject.toml").write_text(content)
+            assert PackageVersion(path).get() == Version("1.2.3")
+            PackageVersion(path, fsync=False).set(Version("1.3.0"))
+            assert (path / "pyproject.toml").read_text() == content.replace("1.2.3", "1.3.0")
@@ -0,0 +1,55 @@
+import random
+
+import pytest
+
+from newversion.sort_key import SortKeyEncoder, SortKeyOverflowError
+from newversion.version import Version
+
+
+def random_version(rng: random.Random) -> str:
+    release = ".".join(str(rng.choice([0, 0, 1, 2, 10])) for _ in range(rng.randint(1, 5)))
+    return "".join(
+        (
+            rng.choice(["", "1!", "2!"]),
+            release,
+            rng.choice(["", "a1", "b0", "rc2", "a10"]),
+            rng.choice(["", ".post0", ".post3"]),
+            rng.choice(["", ".dev0", ".dev5"]),
+            rng.choice(["", "+abc", "+abc.1", "+1", "+1.abc", "+ab", "+2", "+10", "+abc.1.2"]),
+        )
+    )
+
+
+class TestSortKeyEncoder:
+    def test_encode(self) -> None:
+        encoder = SortKeyEncoder()
+        encode = encoder.encode
+        assert len(encode(Version("1.2.3"))) == encoder.fixed_size
+        assert encode(Version("1.2")) == encode(Version("1.2.0"))
+        assert encode(Version("1.2.dev1")) < encode(Version("1.2a1"))
+        assert encode(Version("1.2a1")) < encode(Version("1.2b1"))
+        assert encode(Version("1.2b1")) < encode(Version("1.2rc1"))
+        assert encode(Version("1.2rc1")) < encode(Version("1.2"))
+        assert encode(Version("1.2")) < encode(Version("1.2+abc"))
+        assert encode(Version("1.2+abc")) < encode(Version("1.2+1"))
+        assert encode(Version("1.2+1")) < encode(Version("1.2+1.0"))
+        assert encode(Version("1.2")) < encode(Version("1.2.post1.dev1"))
+        assert encode(Version("1.2.post1.dev1")) < encode(Version("1.2.post1"))
+        assert encode(Version("1.10")) > encode(Version("1.9"))
+        assert encode(Version("1!0.1")) > encode(Version("2.0"))
+
+    def test_encode_matches_pep440(self) -> None:
+        rng = random.Random(42)  # noqa: S311
+        encoder = SortKeyEncoder()
+        versions = [Version(random_version(rng)) for _ in range(2000)]
+        by_key = sorted(versions, key=encoder.encode)
+        assert [i.sort_key for i in by_key] == [i.sort_key for i in sorted(versions)]
+
+    def test_encode_overflow(self) -> None:
+        encoder = SortKeyEncoder(release_parts=2, number_size=1)
+        assert encoder.fixed_size == 10
+        assert encoder.encode(Version("1.2.0.0"))
+        with pytest.raises(SortKeyOverflowError):
+            encoder.encode(Version("1.2.3"))
+        with pytest.raises(SortKeyOverflowError):
+            encoder.encode(Version("1.256"))
@@ -0,0 +1,70 @@
+import io
+import subprocess  # noqa: S404
+import sys
+
+from newversion.cli_parser import create_command_parser, parse_args
+from newversion.constants import Commands
+from newversion.main import run_cli
+
+# modules that only some subcommands need, they must be imported lazily
+LAZY_MODULES = (
+    "importlib.metadata",
+    "concurrent.futures",
+    "multiprocessing",
+    "socket",
+    "tempfile",
+    "newversion.parallel",
+    "newversion.external_sort",
+    "newversion.daemon",
+    "newversion.disk_cache",
+    "newversion.git_tags",
+    "newversion.version_index",
+    "newversion.distributions",
+    "html",
+    "hashlib",
+    "cProfile",
+    "tracemalloc",
+)
+
+# generous budget for slow CI runners, typical value is below 100 ms
+IMPORT_TIME_BUDGET_US = 400_000
+
+
+def get_import_times(module_name: str) -> dict[str, int]:
+    result = subprocess.run(  # noqa: S603
+        [sys.executable, "-X", "importtime", "-c", f"import {module_name}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    import_times: dict[str, int] = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _self_us, cumulative_us, name = line.removeprefix("import time:").split("|")
+        import_times[name.strip()] = int(cumulative_us)
+    return import_times
+
+
+class TestStartup:
+    def test_import_time(self) -> None:
+        import_times = get_import_times("newversion.main")
+        assert "newversion.main" in import_times
+        assert not [name for name in LAZY_MODULES if name in import_times]
+        assert import_times["newversion.main"] < IMPORT_TIME_BUDGET_US
+
+    def test_command_parser(self) -> None:
+        create_command_parser.cache_clear()
+        parse_args(["bump", "minor"], stdin=io.StringIO("1.2.3"))
+        assert create_command_parser.cache_info().currsize == 1
+        parse_args([], stdin=io.StringIO("1.2.3"))
+        assert create_command_parser.cache_info().currsize == 1
+        parse_args(["sort", "-r"])
+        assert create_command_parser.cache_info().currsize == 2
+        assert create_command_parser(Commands.SORT) is create_command_parser(Commands.SORT)
+
+    def test_version(self) -> None:
+        stdout = io.StringIO()
+        code = run_cli(["--version"], stdin=io.StringIO(), stdout=stdout, stderr=io.StringIO())
+        assert code == 0
+        assert stdout.getvalue().count(".") == 2
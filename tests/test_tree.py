@@ -0,0 +1,105 @@
+import io
+import json
+import logging
+import tempfile
+import threading
+from collections.abc import Iterator
+from pathlib import Path
+
+import pytest
+
+from newversion.logger import log_to_stream
+from newversion.main import run_cli
+from newversion.tree import TreeReader, find_package_roots
+from newversion.version import Version
+
+
+@pytest.fixture
+def tree_path() -> Iterator[Path]:
+    with tempfile.TemporaryDirectory() as path_str:
+        path = Path(path_str)
+        files = {
+            "pyproject.toml": '[project]\nversion = "0.1.0"\n',
+            "packages/a/pyproject.toml": '[project]\nversion = "1.0.0"\n',
+            "packages/b/setup.cfg": "[metadata]\nversion = 2.0.0\n",
+            "packages/b/nested/setup.py": "setup(\n    version='3.0.0',\n)\n",
+            "packages/dynamic/pyproject.toml": '[project]\ndynamic = ["version"]\n',
+            "packages/a/README.md": "",
+            ".venv/lib/pyproject.toml": '[project]\nversion = "9.0.0"\n',
+            "node_modules/x/setup.py": "setup(version='9.0.0')\n",
+            "packages/c.egg-info/setup.cfg": "[metadata]\nversion = 9.0.0\n",
+            "packages/skipped/pyproject.toml": '[project]\nversion = "9.0.0"\n',
+        }
+        for name, text in files.items():
+            (path / name).parent.mkdir(parents=True, exist_ok=True)
+            (path / name).write_text(text)
+        yield path
+
+
+class TestTree:
+    def test_find_package_roots(self, tree_path: Path) -> None:
+        roots = find_package_roots(tree_path)
+        assert [i.relative_to(tree_path).as_posix() for i in roots] == [
+            ".",
+            "packages/a",
+            "packages/b",
+            "packages/b/nested",
+            "packages/dynamic",
+            "packages/skipped",
+        ]
+        roots = find_package_roots(tree_path, exclude=["packages"])
+        assert roots == [tree_path]
+
+    def test_read(self, tree_path: Path) -> None:
+        entries = TreeReader(jobs=4, exclude=["skipped"]).read(tree_path)
+        assert [i.version for i in entries] == [
+            Version("0.1.0"),
+            Version("1.0.0"),
+            Version("2.0.0"),
+            Version("3.0.0"),
+            None,
+        ]
+        assert entries[-1].error
+        assert TreeReader(jobs=1, exclude=["skipped"]).read(tree_path) == entries
+
+    def test_cli(self, tree_path: Path) -> None:
+        stdout = io.StringIO()
+        stderr = io.StringIO()
+        args = ["--tree", ".", "--tree-exclude", "skipped", "package"]
+        code = run_cli(args, stdin=io.StringIO(), stdout=stdout, stderr=stderr, cwd=tree_path)
+        assert code == 1
+        assert stdout.getvalue() == (
+            ". 0.1.0\npackages/a 1.0.0\npackages/b 2.0.0\npackages/b/nested 3.0.0\n"
+        )
+        assert "packages/dynamic" in stderr.getvalue()
+
+        stdout = io.StringIO()
+        args = ["--tree", str(tree_path), "--format", "json", "-j", "2", "package"]
+        code = run_cli(args, stdin=io.StringIO(), stdout=stdout, stderr=stderr)
+        assert code == 1
+        result = json.loads(stdout.getvalue())
+        assert list(result) == sorted(result)
+        assert result["packages/dynamic"] is None
+        assert result["packages/skipped"] == "9.0.0"
+
+        stdout = io.StringIO()
+        args = ["--tree", ".", "--tree-exclude", "dynamic", "package"]
+        code = run_cli(args, stdin=io.StringIO(), stdout=stdout, stderr=stderr, cwd=tree_path)
+        assert code == 0
+        assert "packages/skipped 9.0.0" in stdout.getvalue()
+
+    def test_cli_verbose(self, tree_path: Path) -> None:
+        stderr = io.StringIO()
+        args = ["-v", "--tree", ".", "--jobs", "4", "package"]
+        run_cli(args, stdin=io.StringIO(), stdout=io.StringIO(), stderr=stderr, cwd=tree_path)
+        for name in ("packages/a/pyproject.toml", "packages/b/setup.cfg", "packages/skipped"):
+            assert name in stderr.getvalue()
+
+        stderr = io.StringIO()
+        with log_to_stream(logging.DEBUG, stderr) as logger:
+            thread = threading.Thread(target=logger.debug, args=("other call",))
+            thread.start()
+            thread.join()
+            TreeReader(jobs=4).read(tree_path / "packages")
+        assert "other call" not in stderr.getvalue()
+        assert "packages/b/setup.cfg" in stderr.getvalue()
@@ -1,5 +1,6 @@
 import pytest
 
+from newversion.type_defs import BaseVersion
 from newversion.version import Version, VersionError
 
 
@@ -117,3 +118,44 @@ class TestVersion:
         assert Version("1.2.3.post3") > Version("1.2.3")
         assert Version("1.2.3.dev0") > Version("1.2.2")
         assert Version("1.2.3.dev9") < Version("1.2.3")
+
+    def test_from_base(self) -> None:
+        assert Version.from_base(Version("1.2.3rc4").base).dumps() == "1.2.3rc4"
+        assert Version.from_base(Version("1!1.2.post3.dev4+loc.5").base) == Version(
+            "1!1.2.post3.dev4+loc.5"
+        )
+        base = BaseVersion(
+            epoch=0, release=(1, 2, 3), pre=("alpha", 4), post=None, dev=None, local=None
+        )
+        assert Version.from_base(base).dumps() == "1.2.3a4"
+        assert Version.from_base(base).pre == ("a", 4)
+        assert hash(Version.from_base(base)) == hash(Version("1.2.3a4"))
+        assert Version("1.2.3").copy() == Version("1.2.3")
+        with pytest.raises(VersionError):
+            Version.from_base(base._replace(pre=("gamma", 1)))
+        with pytest.raises(VersionError):
+            Version.from_base(base._replace(release=(1, -1, 0)))
+        with pytest.raises(VersionError):
+            Version.from_base(base._replace(release=()))
+        with pytest.raises(VersionError):
+            Version("1.2.3").replace(local="invalid local")
+
+    def test_parse_cached(self) -> None:
+        Version.parse_cache.clear()
+        version = Version.parse("1.2.3rc1")
+        assert version == Version("1.2.3rc1")
+        assert Version.parse("1.2.3rc1") is version
+        assert version.bump_prerelease() is not version
+        assert Version.parse("1.2.3rc1").dumps() == "1.2.3rc1"
+        assert Version.parse_cache.stats().hits == 2
+        assert Version.parse_cache.stats().misses == 1
+        with pytest.raises(VersionError):
+            Version.parse("invalid")
+        Version.parse_cache.clear()
+        assert Version.parse("1.2.3rc1") is not version
+
+    def test_sort_key(self) -> None:
+        assert Version("1.2").sort_key == Version("1.2.0").sort_key
+        assert Version("1.2rc1").sort_key < Version("1.2").sort_key
+        versions = [Version("1.10"), Version("1.2.post1"), Version("1.2")]
+        assert sorted(versions, key=lambda i: i.sort_key) == sorted(versions)
@@ -0,0 +1,168 @@
+import io
+from pathlib import Path
+
+import pytest
+
+from newversion.constants import VersionParts
+from newversion.exceptions import ExecutorError
+from newversion.executor import Executor
+from newversion.main import run_cli
+from newversion.version import Version, VersionError
+from newversion.version_index import VersionIndex
+
+VERSIONS = [
+    "1.4.2",
+    "1.4.10",
+    "1.4.11rc1",
+    "1.10.0",
+    "2.0.0a1",
+    "2.0.0b2",
+    "2.0.0rc1",
+    "2.0.0rc2",
+    "2.0.0",
+    "2.0.1.dev1",
+    "1!0.1.0",
+]
+
+
+def create_index(versions: list[str]) -> VersionIndex:
+    return VersionIndex(Version(i) for i in versions)
+
+
+class TestVersionIndex:
+    def test_container(self) -> None:
+        index = create_index(["1.2", "1.10", "1.2.0", "1.9", "0.1"])
+        assert len(index) == 4
+        assert Version("1.2.0") in index
+        assert Version("1.3") not in index
+        assert list(index) == [Version("0.1"), Version("1.2"), Version("1.9"), Version("1.10")]
+
+    def test_latest(self) -> None:
+        index = create_index(VERSIONS)
+        assert index.latest() == Version("1!0.1.0")
+        assert index.latest(stable_only=True) == Version("1!0.1.0")
+        assert index.latest("1") == Version("1.10.0")
+        assert index.latest("1.4") == Version("1.4.11rc1")
+        assert index.latest("1.4", stable_only=True) == Version("1.4.10")
+        assert index.latest("1.4.10") == Version("1.4.10")
+        assert index.latest("2") == Version("2.0.1.dev1")
+        assert index.latest("2.0.0") == Version("2.0.0")
+        assert index.latest("1!0") == Version("1!0.1.0")
+        assert index.latest("3") is None
+        assert index.latest("1.5") is None
+        assert VersionIndex().latest() is None
+
+    def test_latest_prerelease(self) -> None:
+        index = create_index(VERSIONS)
+        assert index.latest("2.0.0", prerelease="alpha") == Version("2.0.0a1")
+        assert index.latest("2.0.0", prerelease="beta") == Version("2.0.0b2")
+        assert index.latest("2.0.0", prerelease="rc") == Version("2.0.0rc2")
+        assert index.latest("1.4.11", prerelease="rc") == Version("1.4.11rc1")
+        assert index.latest("1.4.11", prerelease="alpha") is None
+        with pytest.raises(ValueError, match="only with series"):
+            index.latest(prerelease="rc")
+        with pytest.raises(VersionError, match="Invalid series"):
+            index.latest("2.0.0rc1")
+
+    def test_next_free(self) -> None:
+        index = create_index(["1.4.2", "1.4.3", "1.4.4", "1.5.0", "2.0.0rc1"])
+        assert index.next_free(Version.bump_micro, "1.4") == Version("1.4.5")
+        assert index.next_free(Version.bump_minor, "1") == Version("1.6.0")
+        assert index.next_free(Version.bump_micro, "3.1") == Version("3.1.0")
+        assert index.next_free(Version.bump_micro) == Version("2.0.0")
+        assert VersionIndex().next_free(Version.bump_micro) == Version("0.0.1")
+
+        index = create_index(["1.0.0", "1.0.1", "1.0.2"])
+        assert index.next_free(lambda version: version.bump_micro(), "1.0.0") == Version("1.0.3")
+        with pytest.raises(ValueError, match="does not increase"):
+            index.next_free(lambda version: version, "1.0")
+
+    def test_executor(self) -> None:
+        versions = [Version(i) for i in VERSIONS]
+        executor = Executor()
+        assert executor.command_latest(versions, series="1.4") == Version("1.4.11rc1")
+        with pytest.raises(ExecutorError, match="No input versions in series 3"):
+            executor.command_latest(versions, series="3")
+        with pytest.raises(ExecutorError, match="No input versions for latest"):
+            executor.command_latest([])
+        with pytest.raises(ExecutorError, match="Invalid version"):
+            executor.command_latest(versions, series="x")
+        result = executor.command_next_free(versions, VersionParts.MICRO, 1, series="2.0")
+        assert result == Version("2.0.1")
+        with pytest.raises(ExecutorError, match="Unsupported release local"):
+            executor.command_next_free(versions, VersionParts.LOCAL, 1)
+
+    def test_cli(self, tmp_path: Path) -> None:
+        stdin = "\n".join(VERSIONS[:-1])
+        cases = [
+            (["latest", "--series", "1.4", "--stable-only"], "1.4.10\n"),
+            (["latest", "--series", "2.0.0", "--pre", "beta"], "2.0.0b2\n"),
+            (["next_free", "minor", "--series", "1"], "1.11.0\n"),
+            (["next_free", "--series", "1.4"], "1.4.11\n"),
+        ]
+        for args, expected in cases:
+            stdout = io.StringIO()
+            code = run_cli(args, stdin=io.StringIO(stdin), stdout=stdout, stderr=io.StringIO())
+            assert code == 0
+            assert stdout.getvalue() == expected
+
+        stderr = io.StringIO()
+        args = ["latest", "--series", "5"]
+        code = run_cli(args, stdin=io.StringIO(stdin), stdout=io.StringIO(), stderr=stderr)
+        assert code == 1
+        assert "No input versions in series 5" in stderr.getvalue()
+
+        (tmp_path / ".git/refs/tags").mkdir(parents=True)
+        for tag in ["v1.4.2", "v1.4.3", "v1.5.0rc1"]:
+            (tmp_path / ".git/refs/tags" / tag).write_text("0" * 40)
+        stdout = io.StringIO()
+        args = ["--from-git-tags", "next_free", "--series", "1.4"]
+        code = run_cli(args, stdin=io.StringIO(), stdout=stdout, stderr=stderr, cwd=tmp_path)
+        assert code == 0
+        assert stdout.getvalue() == "1.4.4\n"
+
+    def test_bump(self) -> None:
+        taken = [f"3.1.0rc{i}" for i in range(1, 3001) if i != 2000]
+        index = create_index([*taken, "1.4", "1.4.1", "1.4.3", "1.5.0", "1.4.5.dev0", "1!1.0.1"])
+        bump_rc = Executor.get_bump(VersionParts.RC, 1)
+        assert index.bump(Version("3.1.0rc1"), bump_rc) == Version("3.1.0rc2000")
+        assert index.bump(Version("3.1.0rc2000"), bump_rc) == Version("3.1.0rc3001")
+        assert index.bump(Version("3.1.0rc4"), Executor.get_bump(VersionParts.RC, 2)) == Version(
+            "3.1.0rc2000"
+        )
+        assert index.bump(Version("1.4"), Version.bump_micro) == Version("1.4.2")
+        assert index.bump(Version("1.3.9"), Version.bump_minor) == Version("1.6.0")
+        assert index.bump(Version("1.4.2"), Version.bump_micro) == Version("1.4.4")
+        assert index.bump(Version("1.4.5.dev0"), Version.bump_dev) == Version("1.4.5.dev1")
+        assert index.bump(Version("1.3.0"), Version.bump_minor) == Version("1.6.0")
+        bump_epoch_micro = lambda version: version.replace(micro=version.micro + 1)  # noqa: E731
+        assert index.bump(Version("1!1.0.0"), bump_epoch_micro) == Version("1!1.0.2")
+        assert index.bump(Version("1.4.2"), Version.bump_postrelease) == Version("1.4.2.post1")
+        with pytest.raises(ValueError, match="does not increase"):
+            index.bump(Version("1.4"), lambda version: version)
+
+    def test_cli_taken(self, tmp_path: Path) -> None:
+        (tmp_path / "taken.txt").write_text("1.2.3rc1\n1.2.3rc2\nv1.2.3rc3\nfoo\n1.2.4\n")
+        (tmp_path / "dist").mkdir()
+        (tmp_path / "dist" / "pkg-1.2.5-py3-none-any.whl").touch()
+        (tmp_path / "dist" / "pkg-1.2.6.tar.gz").touch()
+        cases = [
+            (["bump", "rc", "--taken", "taken.txt"], "1.2.3rc1\n", "1.2.3rc4\n"),
+            (["-i", "1.2.3", "bump", "--taken", "taken.txt"], "", "1.2.5\n"),
+            (["-i", "1.2.4", "bump", "--taken", "dist"], "", "1.2.7\n"),
+            (["-i", "1.2.3", "bump", "--taken", "-"], "1.2.4\n1.2.5\n", "1.2.6\n"),
+            (["--each", "bump", "--taken", "taken.txt"], "1.2.2\n1.2.3\n", "1.2.3\n1.2.5\n"),
+        ]
+        for args, stdin, expected in cases:
+            stdout = io.StringIO()
+            code = run_cli(
+                args, stdin=io.StringIO(stdin), stdout=stdout, stderr=io.StringIO(), cwd=tmp_path
+            )
+            assert code == 0
+            assert stdout.getvalue() == expected
+
+        stderr = io.StringIO()
+        args = ["bump", "--taken", "-"]
+        code = run_cli(args, stdin=io.StringIO(), stdout=io.StringIO(), stderr=stderr)
+        assert code == 2
+        assert "--taken - needs input version" in stderr.getvalue()
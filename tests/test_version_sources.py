@@ -0,0 +1,231 @@
+import importlib.metadata
+import tempfile
+from collections.abc import Iterator
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+import pytest
+
+from newversion.exceptions import VersionSourceError
+from newversion.file_edit import FileEdit
+from newversion.package_version import PackageVersion, PackageVersionCache
+from newversion.source_file import VersionLocation
+from newversion.version import Version
+from newversion.version_sources import (
+    CargoTomlSource,
+    PackageJsonSource,
+    SetupPySource,
+    VersionSource,
+    VersionSourceRegistry,
+    default_registry,
+)
+
+
+@pytest.fixture
+def temp_path() -> Iterator[Path]:
+    with tempfile.TemporaryDirectory() as path_str:
+        yield Path(path_str)
+
+
+def write_files(root: Path, files: dict[str, str]) -> None:
+    for name, text in files.items():
+        (root / name).parent.mkdir(parents=True, exist_ok=True)
+        (root / name).write_text(text)
+
+
+class ChartSource(VersionSource):
+    name = "chart"
+    file_names = ("Chart.yaml",)
+
+    def locate(self, package: PackageVersion, paths: list[Path]) -> Optional[VersionLocation]:
+        source = package.read(paths[0])
+        matches = source.find(SetupPySource.RE_VERSION) if source else []
+        return matches[0].get_location(paths[0]) if matches else None
+
+    def plan_set(
+        self, package: PackageVersion, paths: list[Path], version: Version
+    ) -> Optional[FileEdit]:
+        source = package.read(paths[0])
+        if source is None:
+            return None
+        return package.plan_patch(source, source.find(SetupPySource.RE_VERSION), version)
+
+
+class PartialSource(VersionSource):
+    name = "partial"
+    file_names = ("Chart.yaml",)
+
+    def locate(self, package: PackageVersion, paths: list[Path]) -> Optional[VersionLocation]:
+        return None
+
+
+@dataclass
+class FakeEntryPoint:
+    name: str
+    value: object
+
+    def load(self) -> object:
+        return self.value
+
+
+class TestVersionSourceRegistry:
+    def test_scan(self, temp_path: Path) -> None:
+        write_files(
+            temp_path,
+            {
+                "setup.py": "",
+                "version.txt": "",
+                "VERSION": "",
+                "src/pkg/__init__.py": "",
+                "tests/__init__.py": "",
+                "__init__.py": "",
+            },
+        )
+        sources = [default_registry.get(name) for name in default_registry.names]
+        paths = VersionSourceRegistry.scan(temp_path, sources)
+        assert paths["setup_py"] == [temp_path / "setup.py"]
+        assert paths["pyproject"] == []
+        assert paths["version_file"] == [temp_path / "VERSION", temp_path / "version.txt"]
+        assert paths["module"] == [temp_path / "__init__.py", temp_path / "src"]
+        assert VersionSourceRegistry.scan(temp_path / "missing", sources)["setup_py"] == []
+
+    def test_get(self) -> None:
+        registry = VersionSourceRegistry([ChartSource()])
+        assert registry.get("chart").file_names == ("Chart.yaml",)
+        assert registry.names == ["chart"]
+        with pytest.raises(VersionSourceError, match="unknown source missing"):
+            registry.get("missing")
+
+
+class TestVersionSources:
+    def test_package_json(self, temp_path: Path) -> None:
+        write_files(
+            temp_path,
+            {
+                "package.json": (
+                    '{\n  "name": "pkg",\n  "dependencies": {"version": "9.9.9"},\n'
+                    '  "version": "1.2.3"\n}\n'
+                ),
+            },
+        )
+        location = PackageVersion(temp_path).locate()
+        assert location == VersionLocation(temp_path / "package.json", 4, Version("1.2.3"))
+
+        PackageVersion(temp_path, fsync=False).set(Version("1.3.0"))
+        assert '"version": "1.3.0"' in (temp_path / "package.json").read_text()
+        assert '{"version": "9.9.9"}' in (temp_path / "package.json").read_text()
+        assert PackageJsonSource.name in default_registry.names
+
+    def test_cargo_toml(self, temp_path: Path) -> None:
+        write_files(
+            temp_path,
+            {
+                "Cargo.toml": (
+                    '[workspace]\nmembers = ["a"]\n\n[workspace.package]\nversion = "0.4.0"\n'
+                ),
+            },
+        )
+        assert PackageVersion(temp_path).get() == Version("0.4.0")
+        PackageVersion(temp_path, fsync=False).set(Version("0.5.0"))
+        assert (temp_path / "Cargo.toml").read_text().endswith('version = "0.5.0"\n')
+        assert CargoTomlSource.name in default_registry.names
+
+    def test_module_and_version_file(self, temp_path: Path) -> None:
+        write_files(
+            temp_path,
+            {
+                "tests/__init__.py": '__version__ = "0.0.0"\n',
+                "src/pkg/__init__.py": "from ._version import __version__\n",
+                "src/pkg/_version.py": '__version__ = "1.2.3"\n',
+            },
+        )
+        location = PackageVersion(temp_path).locate()
+        assert location.path == temp_path / "src/pkg/_version.py"
+        assert location.version == Version("1.2.3")
+
+        write_files(temp_path, {"VERSION": "2.0.0\n"})
+        package_version = PackageVersion(temp_path, sources=["version_file", "module"])
+        assert package_version.get() == Version("2.0.0")
+        package_version.set(Version("2.1.0"))
+        assert (temp_path / "VERSION").read_text() == "2.1.0\n"
+        assert (temp_path / "src/pkg/_version.py").read_text() == '__version__ = "1.2.3"\n'
+
+    def test_config(self, temp_path: Path) -> None:
+        write_files(
+            temp_path,
+            {
+                "pyproject.toml": (
+                    '[project]\nname = "pkg"\nversion = "1.2.3"\n\n'
+                    '[tool.newversion]\nsources = ["package_json", "pyproject"]\n'
+                    'authoritative = ["pyproject", "package_json"]\n'
+                ),
+                "package.json": '{"version": "1.2.4"}\n',
+                "setup.py": "setup(\n    version='1.2.2',\n)\n",
+            },
+        )
+        assert PackageVersion(temp_path).get() == Version("1.2.4")
+        assert PackageVersion(temp_path, sources=["setup_py"]).get() == Version("1.2.2")
+
+        PackageVersion(temp_path, fsync=False).set(Version("1.3.0"))
+        assert (temp_path / "package.json").read_text() == '{"version": "1.3.0"}\n'
+        assert 'version = "1.3.0"' in (temp_path / "pyproject.toml").read_text()
+        assert "1.2.2" in (temp_path / "setup.py").read_text()
+
+        with pytest.raises(VersionSourceError, match="unknown source missing"):
+            PackageVersion(temp_path, sources=["missing"]).get()
+        write_files(temp_path, {"pyproject.toml": '[tool.newversion]\nsources = "setup_py"\n'})
+        with pytest.raises(VersionSourceError, match="must be a list"):
+            PackageVersion(temp_path).get()
+
+    def test_authoritative_default(self, temp_path: Path) -> None:
+        write_files(
+            temp_path,
+            {
+                "setup.py": "setup(\n    version='1.2.3',\n)\n",
+                "package.json": '{"version": "0.0.1"}\n',
+            },
+        )
+        PackageVersion(temp_path, fsync=False).set(Version("1.3.0"))
+        assert "1.3.0" in (temp_path / "setup.py").read_text()
+        assert (temp_path / "package.json").read_text() == '{"version": "0.0.1"}\n'
+
+    def test_custom_source(self, temp_path: Path) -> None:
+        write_files(temp_path, {"Chart.yaml": "name: chart\nversion = '1.2.3'\n"})
+        registry = VersionSourceRegistry([ChartSource()])
+        package_version = PackageVersion(
+            temp_path, fsync=False, sources=["chart"], authoritative=[], registry=registry
+        )
+        assert package_version.get() == Version("1.2.3")
+        package_version.set(Version("1.3.0"))
+        assert (temp_path / "Chart.yaml").read_text() == "name: chart\nversion = '1.3.0'\n"
+
+        cache = PackageVersionCache(registry)
+        with pytest.raises(VersionSourceError, match="unknown source pyproject"):
+            cache.get(temp_path)
+
+    def test_abstract_source(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        with pytest.raises(TypeError, match="plan_set"):
+            PartialSource()  # type: ignore[abstract]
+
+        def get_entry_points(values: list[object]) -> object:
+            entry_points = [FakeEntryPoint(f"source{i}", value) for i, value in enumerate(values)]
+            return lambda group=None: (
+                entry_points if group else {VersionSourceRegistry.ENTRY_POINT_GROUP: entry_points}
+            )
+
+        monkeypatch.setattr(importlib.metadata, "entry_points", get_entry_points([PartialSource]))
+        with pytest.raises(
+            VersionSourceError, match="entry point source0 does not implement plan_set"
+        ):
+            VersionSourceRegistry().load_entry_points()
+
+        monkeypatch.setattr(
+            importlib.metadata, "entry_points", get_entry_points([ChartSource, Path])
+        )
+        with pytest.raises(VersionSourceError, match="entry point source1 is not a VersionSource"):
+            VersionSourceRegistry().load_entry_points()
+
+        monkeypatch.setattr(importlib.metadata, "entry_points", get_entry_points([ChartSource]))
+        registry = VersionSourceRegistry()
+        assert registry.get("chart").name == "chart"